@@ -4,6 +4,8 @@ JWT-ONLY SECURE Django settings for forka_backend project.
 REST API menggunakan JWT, CSRF hanya untuk Django Admin
 """
 
+import os
+import sys
 from pathlib import Path
 from decouple import config, Csv
 from datetime import timedelta
@@ -16,6 +18,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-CHANGE-THIS-IN-PRODUCTION')
 DEBUG = config('DEBUG', default=False, cast=bool)
+TESTING = sys.argv[1:2] == ['test']
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=Csv())
 
 # ✨ SECURITY HEADERS
@@ -95,6 +98,10 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'forum.User'
 
 MIDDLEWARE = [
+    'forum.timing.RequestTimingMiddleware',  # ✅ First, so 'total' covers every other middleware
+    'forum.metrics.MetricsMiddleware',  # ✅ Prometheus latency / query count per route
+    'forum.querylog.QueryLogMiddleware',  # ✅ Route of origin for slow-query samples
+    'forum.profiler.ProfilerMiddleware',  # ✅ Admin-only per-request CPU / memory profile
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -144,6 +151,25 @@ DATABASES = {
 }
 
 
+# ============================================
+# CACHE (Shared state: login lockout, etc.)
+# ============================================
+
+# ✅ Development: LocMem (per process)
+# ⚠️ Production: use a shared cache so every worker sees the same state, e.g.
+#    CACHE_BACKEND=django.core.cache.backends.redis.RedisCache  (pip install redis)
+#    CACHE_LOCATION=redis://127.0.0.1:6379/1
+#    or a Memcached backend. DatabaseCache / FileBasedCache are not supported: their incr()
+#    is not atomic, so concurrent failed logins / requests lose counts
+# `python manage.py check --deploy` reports per-process or non-atomic caches (forum/checks.py)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='forka-default'),
+    }
+}
+
+
 # ============================================
 # PASSWORD VALIDATION (Strong Requirements)
 # ============================================
@@ -182,6 +208,20 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)  # seconds
+
+# ✅ Email Outbox (delivered by: python manage.py send_queued_emails)
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BASE = 30  # seconds, doubled on every failed attempt
+EMAIL_OUTBOX_RETRY_MAX = 3600  # seconds
+EMAIL_OUTBOX_LOCK_TIMEOUT = 300  # seconds before a stuck 'sending' email is retried, renewed before every send
+EMAIL_OUTBOX_RETENTION_DAYS = 30  # sent/failed rows kept this long (python manage.py purge_email_outbox)
+
+# ✅ Admin Broadcast (delivered by: python manage.py send_broadcasts)
+EMAIL_BROADCAST_BATCH_SIZE = 100
+EMAIL_BROADCAST_RATE = config('EMAIL_BROADCAST_RATE', default=10, cast=float)  # emails per second
+EMAIL_BROADCAST_LOCK_TIMEOUT = 300  # seconds without progress before another worker resumes
 
 
 # ============================================
@@ -212,10 +252,77 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+# ✅ Media URLs in API responses (forum/media_urls.py)
+MEDIA_CDN_URL = config('MEDIA_CDN_URL', default='')  # e.g. https://cdn.forka.id/media/
+MEDIA_PUBLIC_URL = config('MEDIA_PUBLIC_URL', default='')  # absolute base when there is no request (emails, workers)
+MEDIA_URL_VERSION = config('MEDIA_URL_VERSION', default='')  # ?v= on non content-hashed files, bump to bust caches
+
+# ✅ Media storage driver (forum/storage.py)
+# 'local' -> MEDIA_ROOT on this node's disk
+# 's3'    -> S3 / MinIO / any S3-compatible bucket (requires boto3), shared by all nodes,
+#            post images can be uploaded directly with presigned URLs
+MEDIA_STORAGE = config('MEDIA_STORAGE', default='local')
+MEDIA_STORAGE_BACKENDS = {
+    'local': 'forum.storage.ContentAddressedFileSystemStorage',
+    's3': 'forum.storage.ContentAddressedS3Storage',
+}
+
+MEDIA_S3_BUCKET = config('MEDIA_S3_BUCKET', default='')
+MEDIA_S3_ENDPOINT_URL = config('MEDIA_S3_ENDPOINT_URL', default='')  # e.g. http://localhost:9000 for MinIO
+MEDIA_S3_REGION = config('MEDIA_S3_REGION', default='us-east-1')
+MEDIA_S3_ACCESS_KEY = config('MEDIA_S3_ACCESS_KEY', default='')
+MEDIA_S3_SECRET_KEY = config('MEDIA_S3_SECRET_KEY', default='')
+MEDIA_S3_ADDRESSING_STYLE = config('MEDIA_S3_ADDRESSING_STYLE', default='auto')  # 'path' for MinIO
+MEDIA_S3_PUBLIC_URL = config('MEDIA_S3_PUBLIC_URL', default='')  # public bucket / CDN base, else presigned GET
+MEDIA_S3_URL_EXPIRY = 3600  # presigned GET lifetime (private buckets)
+MEDIA_PRESIGN_EXPIRY = 900  # presigned PUT lifetime for direct uploads
+
+# ✅ Content-addressed media: blobs/ab/cd/<sha256>.<ext>, dedup + ref counting
+STORAGES = {
+    'default': {
+        'BACKEND': MEDIA_STORAGE_BACKENDS[MEDIA_STORAGE],
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# ✅ Streaming uploads: post / profile image endpoints attach
+# forum.uploads.StreamingImageUploadHandler per view (chunks go straight to a
+# temp file, magic bytes checked on the first chunk, oversize / non-image
+# bodies aborted early). Not global: admin and other forms keep Django's handlers
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024  # never buffer more than this per file
+DATA_UPLOAD_MAX_MEMORY_SIZE = 5 * 512 * 1024  # 2.5MB, non-file fields / JSON body
 FILE_UPLOAD_PERMISSIONS = 0o644
 
+# ✅ Media serving (forum/views_media.py)
+# 'accel'    -> X-Accel-Redirect, nginx serves MEDIA_ROOT from an internal location
+# 'sendfile' -> X-Sendfile (Apache mod_xsendfile / lighttpd)
+# 'python'   -> FileResponse with Range support (wsgi.file_wrapper / sendfile)
+MEDIA_SERVE_MODE = config('MEDIA_SERVE_MODE', default='python')
+MEDIA_ACCEL_PREFIX = '/protected-media/'  # nginx: location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+MEDIA_SERVE_DIRS = ('blobs', 'variants', 'posts', 'profiles', 'attachments')
+MEDIA_CACHE_MAX_AGE = 3600  # non content-hashed files
+
+# ✅ Orphaned media GC (python manage.py gc_media)
+MEDIA_GC_GRACE_HOURS = 24  # unreferenced files younger than this are kept
+MEDIA_GC_BATCH_SIZE = 1000  # file names checked against the DB per query
+
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024  # 10MB (post image)
+IMAGE_UPLOAD_FIELD_MAX_SIZES = {
+    'profile_picture': 5 * 1024 * 1024,  # 5MB
+}
+IMAGE_MAX_PIXELS = 40_000_000  # ~40MP, rejected from the header before decoding
+
+# ✅ Resumable uploads (forum/resumable.py): PATCH byte ranges, then finalize
+# Sessions write to local disk: use a shared volume or sticky routing for multiple nodes
+UPLOAD_SESSION_DIR = config('UPLOAD_SESSION_DIR', default=str(BASE_DIR / 'upload_sessions'))
+UPLOAD_SESSION_TTL_HOURS = 24
+UPLOAD_SESSION_MAX_ACTIVE = 10  # unfinished sessions per user
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # suggested PATCH size (1MB)
+UPLOAD_CHUNK_MAX_SIZE = 8 * 1024 * 1024
+POST_MAX_ATTACHMENTS = 10
+
 ALLOWED_IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'webp']
 
 def create_media_folders():
@@ -274,18 +381,19 @@ CORS_EXPOSE_HEADERS = [
 # ============================================
 
 REST_FRAMEWORK = {
-    # ✅ JWT-ONLY Authentication
+    # ✅ JWT-ONLY Authentication (user built from token claims, no DB lookup)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'forum.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     
     # ✅ Rate Limiting (Security Layer)
+    # Sliding window counters in a shared store (see THROTTLE_STORE below)
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'forum.throttling.AnonRateThrottle',
+        'forum.throttling.UserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
@@ -293,6 +401,13 @@ REST_FRAMEWORK = {
         'login': '5/minute',
         'register': '3/hour',
         'verify_email': '10/hour',
+        'logout': '30/hour',
+        'availability': '60/minute',
+        'availability_email': '10/hour',  # email taken = account exists
+        'post_write': '30/hour',
+        'comment_write': '10/minute',
+        'upload': '60/hour',
+        'upload_chunk': '600/hour',  # resumable PATCH, ~10 chunks per upload
     },
     
     # ✅ Pagination
@@ -309,6 +424,14 @@ REST_FRAMEWORK = {
 }
 
 
+# ✅ Throttle Store (shared by all workers)
+# 'cache'    -> CACHES[THROTTLE_CACHE_ALIAS], use Redis for atomic counters (reads stay off the DB)
+# 'database' -> ThrottleCounter table, every throttled request (GETs too) writes a row
+THROTTLE_STORE = config('THROTTLE_STORE', default='cache')
+THROTTLE_CACHE_ALIAS = 'default'  # must be shared (not LocMem) when THROTTLE_STORE = 'cache'
+THROTTLE_DB_PURGE_PROBABILITY = 0.001  # chance per new window to delete expired rows
+
+
 # ============================================
 # JWT CONFIGURATION - SECURE SETTINGS
 # ============================================
@@ -320,7 +443,7 @@ SIMPLE_JWT = {
     
     # ✅ Security Features
     'ROTATE_REFRESH_TOKENS': True,  # New refresh token on refresh
-    'BLACKLIST_AFTER_ROTATION': True,  # Blacklist old tokens
+    'BLACKLIST_AFTER_ROTATION': True,  # Revoke old tokens (forum.revocation, not token_blacklist)
     'UPDATE_LAST_LOGIN': True,
     
     # ✅ Algorithm & Key
@@ -339,8 +462,24 @@ SIMPLE_JWT = {
     
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    
+    # ✅ Tokens carry role / email_verified / token version claims
+    'TOKEN_OBTAIN_SERIALIZER': 'forum.serializers.ForkaTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'forum.serializers.ForkaTokenRefreshSerializer',
 }
 
+TOKEN_VERSION_CACHE_ALIAS = 'default'  # current token_version per user (TTL = access token lifetime), must be shared
+
+# ✅ Refresh token revocation (Bloom filter per process, see forum/revocation.py)
+REVOCATION_FILTER_REFRESH = 300  # seconds between rebuilds from the RevokedToken table
+REVOCATION_FILTER_ERROR_RATE = 0.001
+REVOCATION_FILTER_MIN_CAPACITY = 10000
+
+# ✅ Username/email availability Bloom filter (forum/availability.py)
+AVAILABILITY_FILTER_REFRESH = 60  # seconds between rebuilds from the user table
+AVAILABILITY_FILTER_ERROR_RATE = 0.01
+AVAILABILITY_FILTER_MIN_CAPACITY = 10000
+
 
 # ============================================
 # LOGGING (Security & Debug)
@@ -388,10 +527,67 @@ LOGGING = {
 
 ACCOUNT_LOCKOUT_THRESHOLD = 5
 ACCOUNT_LOCKOUT_DURATION = 15  # minutes
+LOCKOUT_CACHE_ALIAS = 'default'  # failed-login counters & lock windows, must be shared (not LocMem)
 
 EMAIL_VERIFICATION_REQUIRED = config('EMAIL_VERIFICATION_REQUIRED', default=True, cast=bool)
 EMAIL_VERIFICATION_CODE_EXPIRY = 10  # minutes
+PASSWORD_RESET_CODE_EXPIRY = 15  # minutes
+
+# ✅ OTP store (forum/otp.py): 'database' or 'cache' (use Redis in production)
+OTP_STORE = config('OTP_STORE', default='database')
+OTP_CACHE_ALIAS = 'default'
+OTP_MAX_ATTEMPTS = 5  # wrong guesses before the code is discarded
+OTP_SWEEP_PROBABILITY = 0.01  # chance an issue also purges expired codes
+OTP_AUDIT_TRAIL = config('OTP_AUDIT_TRAIL', default=False, cast=bool)  # also write EmailVerification/PasswordReset rows
+OTP_AUDIT_RETENTION_DAYS = 30
 
 PASSWORD_RESET_TIMEOUT = 3600  # 1 hour in seconds
 
+# ✅ Image pipeline (forum/images.py, worker: python manage.py process_images)
+IMAGE_VARIANT_WIDTHS = (160, 480, 1080)
+IMAGE_WEBP_QUALITY = 80
+IMAGE_ORIGINAL_QUALITY = 90  # re-encode original tanpa EXIF
+IMAGE_PROCESS_BATCH_SIZE = 20
+
+# ✅ Password hashing pool (forum/hashing.py)
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=os.cpu_count() or 2, cast=int)
+PASSWORD_HASH_QUEUE_DEPTH = config('PASSWORD_HASH_QUEUE_DEPTH', default=16, cast=int)  # waiting jobs before 503
+PASSWORD_HASH_TIMEOUT = 10  # seconds
+
+# ✅ Request timing (forum/timing.py): Server-Timing header + log line (logger forum.timing)
+REQUEST_TIMING_ENABLED = config('REQUEST_TIMING_ENABLED', default=True, cast=bool)
+REQUEST_TIMING_SAMPLE_RATE = config('REQUEST_TIMING_SAMPLE_RATE', default=1.0 if DEBUG else 0.05, cast=float)  # 0.0 - 1.0
+REQUEST_TIMING_HEADER = config('REQUEST_TIMING_HEADER', default=True, cast=bool)  # set False to only log
+
+# ✅ Prometheus metrics (forum/metrics.py, GET /metrics): pip install prometheus_client
+# Multiple workers: export PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py)
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)  # no-op without prometheus_client
+# Loopback sengaja tidak termasuk: nginx di host yang sama proxy dari 127.0.0.1.
+# Request lewat proxy (X-Forwarded-For / X-Real-IP) tetap ditolak.
+METRICS_ALLOWED_NETWORKS = config(
+    'METRICS_ALLOWED_NETWORKS',
+    default='10.0.0.0/8,172.16.0.0/12,192.168.0.0/16',
+    cast=Csv(),
+)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # kalau di-set: Authorization: Bearer <token>
+
+# ✅ Slow-query log (forum/querylog.py): per-fingerprint stats, report via manage.py slow_queries
+QUERY_LOG_ENABLED = config('QUERY_LOG_ENABLED', default=not TESTING, cast=bool)  # off under manage.py test
+QUERY_LOG_SLOW_MS = config('QUERY_LOG_SLOW_MS', default=200, cast=int)  # sample + warn at/above this
+QUERY_LOG_DIR = config('QUERY_LOG_DIR', default=str(BASE_DIR / 'logs' / 'queries'))  # one JSON per process
+QUERY_LOG_FLUSH_SECONDS = 30
+QUERY_LOG_MAX_FINGERPRINTS = 500  # per process, new statements beyond this are counted as dropped
+QUERY_LOG_RESERVOIR_SIZE = 200  # recent durations kept per fingerprint for p95
+QUERY_LOG_SLOW_SAMPLES = 100
+QUERY_LOG_STACK_DEPTH = 8
+
+# ✅ On-demand request profiler (forum/profiler.py): admin sends X-Forka-Profile: 1 (CPU only)
+PROFILER_ENABLED = config('PROFILER_ENABLED', default=True, cast=bool)
+PROFILER_MAX_PER_HOUR = config('PROFILER_MAX_PER_HOUR', default=10, cast=int)  # per admin
+PROFILER_SAMPLE_INTERVAL = 0.005  # seconds between CPU stack samples
+# Memory profiles (X-Forka-Profile: memory / all) turn on tracemalloc for the whole
+# process: every request in that worker runs several times slower meanwhile
+PROFILER_TRACEMALLOC_FRAMES = 25
+PROFILER_MAX_STORED = 200  # older RequestProfile rows are deleted
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
@@ -22,13 +22,25 @@ from forum.views import (
     PostViewSet,
     CommentViewSet,
     NotificationViewSet,
+    EmailBroadcastViewSet,
 )
 from forum.views_auth import (
     register_user,
     verify_email,
     resend_verification_code,
     login_user,
+    logout_user,
+    check_availability,
 )
+from forum.views_auth_async import login_user_async, change_password_async
+from forum.views_uploads import (
+    presign_upload,
+    create_upload_session,
+    upload_session_detail,
+    finalize_upload_session,
+)
+from forum.views_media import serve_media
+from forum.views_metrics import metrics_view, slow_queries, RequestProfileViewSet
 
 # Router untuk automatic URL routing
 router = DefaultRouter()
@@ -37,6 +49,8 @@ router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'posts', PostViewSet, basename='post')
 router.register(r'comments', CommentViewSet, basename='comment')
 router.register(r'notifications', NotificationViewSet, basename='notification')
+router.register(r'broadcasts', EmailBroadcastViewSet, basename='broadcast')
+router.register(r'admin/profiles', RequestProfileViewSet, basename='request-profile')
 
 urlpatterns = [
     # Django Admin
@@ -51,27 +65,37 @@ urlpatterns = [
     path('api/auth/verify-email/', verify_email, name='verify_email'),
     path('api/auth/resend-code/', resend_verification_code, name='resend_code'),
     path('api/auth/login/', login_user, name='login'),
+    path('api/auth/logout/', logout_user, name='logout'),
+    path('api/auth/availability/', check_availability, name='check_availability'),
+    path('api/auth/async/login/', login_user_async, name='login_async'),
+    path('api/auth/async/change-password/', change_password_async, name='change_password_async'),
+    
+    # Uploads (resumable sessions, presigned direct upload for MEDIA_STORAGE=s3)
+    path('api/uploads/presign/', presign_upload, name='presign_upload'),
+    path('api/uploads/sessions/', create_upload_session, name='upload_sessions'),
+    path('api/uploads/sessions/<uuid:session_id>/', upload_session_detail, name='upload_session_detail'),
+    path('api/uploads/sessions/<uuid:session_id>/finalize/', finalize_upload_session, name='finalize_upload_session'),
+    
+    # Monitoring (admin)
+    path('api/admin/slow-queries/', slow_queries, name='slow_queries'),
     
     # Forum API
     path('api/', include(router.urls)),
+    
+    # Prometheus scrape (internal addresses only)
+    path('metrics', metrics_view, name='metrics'),
+]
+
+# ✅ Media files (MUST be before catch-all route)
+# Access check di Django, transfer file oleh nginx/Apache (MEDIA_SERVE_MODE)
+urlpatterns += [
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$', serve_media, name='media'),
 ]
 
-# ✅ CRITICAL: Media & Static files serving (Development only)
+# ✅ CRITICAL: Static files serving (Development only)
 if settings.DEBUG:
-    # ✅ Serve media files (MUST be before catch-all route)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    
     # ✅ Serve static files
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    
-    # ✅ Debug info
-    print("=" * 60)
-    print("✅ MEDIA FILES CONFIGURATION")
-    print("=" * 60)
-    print(f"Media URL: {settings.MEDIA_URL}")
-    print(f"Media Root: {settings.MEDIA_ROOT}")
-    print(f"Media files will be served at: http://localhost:8000{settings.MEDIA_URL}")
-    print("=" * 60)
 
 # ✅ React App - catch all other routes (MUST be last!)
 urlpatterns += [
@@ -91,6 +115,10 @@ AUTHENTICATION (Rate Limited):
   POST   /api/auth/verify-email/    - Verify email code (10/hour)
   POST   /api/auth/resend-code/     - Resend verification (10/hour)
   POST   /api/auth/login/           - Login (5/minute)
+  POST   /api/auth/logout/          - Revoke refresh token
+  GET    /api/auth/availability/    - Live username/email check (60/minute)
+  POST   /api/auth/async/login/     - Login, async (ASGI, hashing on worker pool)
+  POST   /api/auth/async/change-password/ - Change password, async
 
 USERS:
   GET    /api/users/                - List users (paginated)
@@ -98,6 +126,8 @@ USERS:
   GET    /api/users/me/             - Current user info
   PUT    /api/users/update_profile/ - Update profile (with image)
   POST   /api/users/change_password/- Change password
+  PUT    /api/users/{id}/           - Update user (admin only)
+  DELETE /api/users/{id}/           - Delete user (admin only)
 
 CATEGORIES:
   GET    /api/categories/           - List categories
@@ -107,7 +137,7 @@ CATEGORIES:
 
 POSTS:
   GET    /api/posts/                - List posts (paginated)
-  POST   /api/posts/                - Create post (with image)
+  POST   /api/posts/                - Create post (image upload or image_key)
   GET    /api/posts/{id}/           - Post detail
   PUT    /api/posts/{id}/           - Update post
   DELETE /api/posts/{id}/           - Delete post
@@ -115,6 +145,14 @@ POSTS:
   POST   /api/posts/{id}/pin/       - Pin (mod/admin)
   POST   /api/posts/{id}/close/     - Close (mod/admin)
 
+UPLOADS:
+  POST   /api/uploads/presign/      - Presigned PUT URL for a post image (S3 storage)
+  POST   /api/uploads/sessions/     - Start resumable upload (image / attachment)
+  GET    /api/uploads/sessions/{id}/ - Received byte ranges (resume)
+  PATCH  /api/uploads/sessions/{id}/ - Upload byte range (Content-Range)
+  DELETE /api/uploads/sessions/{id}/ - Cancel upload
+  POST   /api/uploads/sessions/{id}/finalize/ - Store completed upload
+
 COMMENTS:
   GET    /api/comments/             - List comments
   POST   /api/comments/             - Create comment
@@ -129,9 +167,25 @@ NOTIFICATIONS:
   POST   /api/notifications/{id}/mark_read/ - Mark as read
   POST   /api/notifications/mark_all_read/  - Mark all read
 
-MEDIA FILES (Development):
-  GET    /media/profiles/{filename}  - Profile pictures
-  GET    /media/posts/{filename}     - Post images
+EMAIL BROADCAST (Admin only):
+  GET    /api/broadcasts/                   - List broadcasts + progress
+  POST   /api/broadcasts/                   - Queue broadcast to verified users
+  POST   /api/broadcasts/{id}/pause/        - Pause delivery
+  POST   /api/broadcasts/{id}/resume/       - Resume from last recipient
+  POST   /api/broadcasts/{id}/cancel/       - Cancel delivery
+
+MEDIA FILES (X-Accel-Redirect / X-Sendfile / FileResponse):
+  GET    /media/blobs/{ab}/{cd}/{sha256}.{ext} - Images & variants (immutable)
+  GET    /media/profiles/{filename}  - Profile pictures (legacy)
+  GET    /media/posts/{filename}     - Post images (legacy)
+
+MONITORING:
+  GET    /metrics                    - Prometheus metrics (internal addresses, no proxy)
+  GET    /api/admin/slow-queries/    - Slow-query report by SQL fingerprint (admin)
+  DELETE /api/admin/slow-queries/    - Reset slow-query stats (admin)
+  GET    /api/admin/profiles/        - Request profiles (admin, header X-Forka-Profile: 1)
+  GET    /api/admin/profiles/{id}/cpu/    - CPU folded stacks (flamegraph)
+  GET    /api/admin/profiles/{id}/memory/ - Memory allocation folded stacks
 
 ADMIN:
   /admin/                            - Django admin panel
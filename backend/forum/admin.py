@@ -5,7 +5,12 @@ File: forum/admin.py
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Category, Post, Comment, Notification
+from django.utils import timezone
+from .models import (
+    User, Category, Post, PostAttachment, Comment, Notification, EmailOutbox, EmailBroadcast, MediaBlob,
+    RequestProfile,
+)
+from .email_utils import queue_broadcast
 
 
 # ============================================
@@ -50,9 +55,18 @@ class CategoryAdmin(admin.ModelAdmin):
 # POST ADMIN
 # ============================================
 
+class PostAttachmentInline(admin.TabularInline):
+    """Attachment image (resumable upload)"""
+    model = PostAttachment
+    extra = 0
+    fields = ['file', 'filename', 'size', 'content_type', 'position']
+    readonly_fields = ['file', 'filename', 'size', 'content_type']
+
+
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     """Post Admin"""
+    inlines = [PostAttachmentInline]
     list_display = ['title', 'author', 'category', 'is_pinned', 'is_closed', 'created_at']
     list_filter = ['category', 'is_pinned', 'is_closed', 'created_at']
     search_fields = ['title', 'content', 'author__username']
@@ -116,7 +130,113 @@ class NotificationAdmin(admin.ModelAdmin):
     mark_as_unread.short_description = "Mark selected as unread"
 
 
+# ============================================
+# EMAIL OUTBOX ADMIN
+# ============================================
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """Email Outbox Admin"""
+    list_display = ['subject', 'to_email', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'locked_at', 'last_error']
+    
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        """Bulk action: kirim ulang secepatnya"""
+        queryset.exclude(status='sent').update(
+            status='pending',
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            locked_at=None,
+        )
+    retry_now.short_description = "Retry selected emails now"
+
+
+# ============================================
+# EMAIL BROADCAST ADMIN
+# ============================================
+
+@admin.register(EmailBroadcast)
+class EmailBroadcastAdmin(admin.ModelAdmin):
+    """Email Broadcast Admin"""
+    list_display = ['subject', 'status', 'progress_display', 'sent_count', 'failed_count', 'created_by', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'message']
+    readonly_fields = [
+        'status', 'total_recipients', 'sent_count', 'failed_count', 'last_user_id',
+        'last_error', 'created_by', 'created_at', 'started_at', 'heartbeat_at', 'finished_at',
+    ]
+    
+    actions = ['queue_broadcasts', 'pause_broadcasts', 'cancel_broadcasts']
+    
+    def save_model(self, request, obj, form, change):
+        if not obj.created_by_id:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+    
+    def progress_display(self, obj):
+        """Progress pengiriman dalam persen"""
+        return f"{obj.progress}%"
+    progress_display.short_description = 'Progress'
+    
+    def queue_broadcasts(self, request, queryset):
+        """Bulk action: antrikan (atau lanjutkan) broadcast"""
+        for broadcast in queryset.filter(status__in=['draft', 'paused']):
+            queue_broadcast(broadcast)
+    queue_broadcasts.short_description = "Queue / resume selected broadcasts"
+    
+    def pause_broadcasts(self, request, queryset):
+        """Bulk action: pause broadcast"""
+        queryset.filter(status__in=['queued', 'sending']).update(status='paused')
+    pause_broadcasts.short_description = "Pause selected broadcasts"
+    
+    def cancel_broadcasts(self, request, queryset):
+        """Bulk action: batalkan broadcast"""
+        queryset.exclude(status__in=['completed', 'cancelled']).update(
+            status='cancelled',
+            finished_at=timezone.now(),
+        )
+    cancel_broadcasts.short_description = "Cancel selected broadcasts"
+
+
 # Customize Admin Site
 admin.site.site_header = "ForKa Admin"
 admin.site.site_title = "ForKa Admin Portal"
-admin.site.index_title = "Welcome to ForKa Administration"
\ No newline at end of file
+admin.site.index_title = "Welcome to ForKa Administration"
+
+# ============================================
+# MEDIA BLOB ADMIN
+# ============================================
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    """Content-addressed media files (read-only)"""
+    list_display = ['name', 'size', 'ref_count', 'created_at']
+    search_fields = ['digest', 'name', 'source_digest']
+    readonly_fields = ['digest', 'name', 'size', 'ref_count', 'source_digest', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False
+
+
+# ============================================
+# REQUEST PROFILE ADMIN
+# ============================================
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profil request admin (download folded stacks lewat /api/admin/profiles/{id}/cpu/)"""
+    list_display = ['method', 'path', 'status_code', 'duration_ms', 'cpu_samples', 'memory_peak', 'user', 'created_at']
+    list_filter = ['method', 'status_code']
+    search_fields = ['path', 'route']
+    exclude = ['cpu_folded', 'memory_folded']
+    readonly_fields = [
+        'user', 'method', 'path', 'route', 'status_code', 'duration_ms',
+        'cpu_samples', 'sample_interval_ms', 'memory_peak', 'created_at',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ForumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'forum'
+
+    def ready(self):
+        from . import checks  # noqa: F401 (daftar system check deploy)
+        from . import signals  # noqa: F401
+        from . import metrics, querylog, timing
+        timing.connect()
+        metrics.connect()
+        querylog.connect()
@@ -0,0 +1,182 @@
+# backend/forum/authentication.py
+"""
+Stateless JWT Authentication
+
+JWTAuthentication bawaan simplejwt load row User dari DB di setiap request,
+padahal permission (PostPermission, CommentPermission, IsAdminOnly, ...)
+cuma butuh `id` dan `role`. Token di sini membawa claim tambahan:
+
+    role, email_verified, ver (token_version)
+
+sehingga user bisa dibangun tanpa query. Field lain tetap bisa diakses
+(deferred, di-load dari DB saat dipakai), dan view yang butuh row lengkap
+cukup mendaftarkan action-nya di `full_user_actions`.
+
+`token_version` naik saat password, role, atau status aktif berubah
+(lihat User.save / UserQuerySet.update), jadi token lama otomatis ditolak.
+Versi terbaru dipublish ke cache setelah commit; alias
+TOKEN_VERSION_CACHE_ALIAS wajib shared (forum/checks.py) supaya semua
+worker langsung melihatnya, dan TTL-nya maksimal umur access token.
+User yang dinonaktifkan dihapus dari cache: lookup berikutnya ke DB
+(is_active dicek di sana) dan token ditolak.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import DEFERRED
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import metrics
+from .timing import timed
+
+
+ROLE_CLAIM = 'role'
+EMAIL_VERIFIED_CLAIM = 'email_verified'
+VERSION_CLAIM = 'ver'
+
+
+# ============================================
+# TOKEN VERSION (shared cache, DB fallback)
+# ============================================
+
+def _version_key(user_id):
+    return f'token_version:{user_id}'
+
+
+def _version_timeout():
+    # Entry yang tertimpa nilai lama (race dengan lookup DB) paling lama
+    # hidup selama umur access token
+    return int(settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds())
+
+
+def publish_token_version(user_id, version):
+    """Simpan token_version terbaru di cache"""
+    caches[settings.TOKEN_VERSION_CACHE_ALIAS].set(_version_key(user_id), version, timeout=_version_timeout())
+
+
+def forget_token_versions(user_ids):
+    """Hapus token_version dari cache: lookup berikutnya ke DB (cek is_active)"""
+    caches[settings.TOKEN_VERSION_CACHE_ALIAS].delete_many([_version_key(user_id) for user_id in user_ids])
+
+
+def token_state_changed(user_id, version, is_active=True):
+    """
+    Dipanggil setelah User.save yang bump token_version. Cache diubah
+    setelah commit, jadi rollback tidak meninggalkan versi yang tidak ada di DB
+    """
+    if is_active:
+        transaction.on_commit(lambda: publish_token_version(user_id, version))
+    else:
+        transaction.on_commit(lambda: forget_token_versions([user_id]))
+
+
+def get_token_version(user_id):
+    """
+    token_version terbaru untuk user
+    
+    Returns:
+        int | None: None kalau user tidak ada / tidak aktif
+    """
+    cache = caches[settings.TOKEN_VERSION_CACHE_ALIAS]
+    version = cache.get(_version_key(user_id))
+    if version is not None:
+        metrics.cache_requests.labels('token_version', 'hit').inc()
+        return version
+    
+    metrics.cache_requests.labels('token_version', 'miss').inc()
+    # Cache miss: satu query kecil, lalu disimpan lagi di cache
+    row = (
+        get_user_model().objects
+        .filter(pk=user_id)
+        .values_list('token_version', 'is_active')
+        .first()
+    )
+    if row is None or not row[1]:
+        return None
+    publish_token_version(user_id, row[0])
+    return row[0]
+
+
+def check_token_version(token):
+    """Raise InvalidToken kalau token dibuat sebelum password/role berubah"""
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None or token[VERSION_CLAIM] != get_token_version(user_id):
+        raise InvalidToken('Token has been revoked', code='token_revoked')
+
+
+# ============================================
+# TOKENS
+# ============================================
+
+class ForkaRefreshToken(RefreshToken):
+    """Refresh token dengan claim role, email_verified dan token version"""
+    
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[EMAIL_VERIFIED_CLAIM] = user.email_verified
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+def build_token_user(validated_token):
+    """
+    Bangun instance User dari claim tanpa query
+    
+    Field yang tidak ada di token di-mark deferred, jadi kalau diakses
+    Django akan load field itu dari DB (fallback).
+    """
+    User = get_user_model()
+    known = {
+        'id': int(validated_token[api_settings.USER_ID_CLAIM]),
+        'role': validated_token[ROLE_CLAIM],
+        'email_verified': validated_token[EMAIL_VERIFIED_CLAIM],
+        'token_version': validated_token[VERSION_CLAIM],
+        'is_active': True,
+    }
+    fields = User._meta.concrete_fields
+    values = [known.get(field.attname, DEFERRED) for field in fields]
+    return User.from_db(DEFAULT_DB_ALIAS, [field.attname for field in fields], values)
+
+
+# ============================================
+# AUTHENTICATION CLASS
+# ============================================
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT auth tanpa lookup User per request
+    
+    - Token dengan claim lengkap -> user dibangun dari claim (0 query)
+    - Action di `view.full_user_actions` -> load row lengkap dari DB
+    - Token lama (tanpa claim version) -> perilaku JWTAuthentication biasa
+    """
+    
+    def authenticate(self, request):
+        parser_context = getattr(request, 'parser_context', None) or {}
+        self.view = parser_context.get('view')
+        with timed('auth'):
+            return super().authenticate(request)
+    
+    def needs_full_user(self):
+        action = getattr(self.view, 'action', None)
+        return action in getattr(self.view, 'full_user_actions', ())
+    
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        
+        if self.needs_full_user():
+            user = super().get_user(validated_token)
+            if validated_token[VERSION_CLAIM] != user.token_version:
+                raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+            return user
+        
+        check_token_version(validated_token)
+        return build_token_user(validated_token)
@@ -0,0 +1,85 @@
+# backend/forum/availability.py
+"""
+Cek ketersediaan username / email (live, saat user mengetik di form register)
+
+- Tiap proses punya Bloom filter username & email yang sudah dipakai
+  (dinormalisasi lowercase), di-rebuild setiap AVAILABILITY_FILTER_REFRESH detik
+- Filter bilang "tidak ada" -> available, tanpa query
+- Hasil positif (mungkin false positive) dicek ke DB lewat lookup
+  __lower, yang cocok dengan functional index Lower(username/email)
+
+Filter cuma untuk UX. Register tetap cek ke DB (user yang baru daftar
+di proses lain belum masuk filter sampai rebuild berikutnya).
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from .bloom import BloomFilter
+from .models import User, normalize_username, normalize_email
+
+
+class AvailabilityFilter:
+    """Bloom filter per proses berisi username & email yang sudah dipakai"""
+    
+    def __init__(self):
+        self._filter = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+    
+    def rebuild(self):
+        users = User.objects.values_list('username', 'email')
+        # 2 item per user, kapasitas 2x untuk user baru sampai rebuild berikutnya
+        capacity = max(users.count() * 4, settings.AVAILABILITY_FILTER_MIN_CAPACITY)
+        bloom = BloomFilter(capacity, settings.AVAILABILITY_FILTER_ERROR_RATE)
+        for username, email in users.iterator(chunk_size=5000):
+            bloom.add(f'u:{normalize_username(username)}')
+            if email:
+                bloom.add(f'e:{normalize_email(email)}')
+        
+        self._filter = bloom
+        self._built_at = time.monotonic()
+    
+    def _ensure_fresh(self):
+        age = time.monotonic() - self._built_at
+        if self._filter is None or age > settings.AVAILABILITY_FILTER_REFRESH:
+            with self._lock:
+                age = time.monotonic() - self._built_at
+                if self._filter is None or age > settings.AVAILABILITY_FILTER_REFRESH:
+                    self.rebuild()
+    
+    def might_contain(self, key):
+        self._ensure_fresh()
+        return key in self._filter
+    
+    def add(self, key):
+        if self._filter is not None:
+            self._filter.add(key)
+
+
+availability_filter = AvailabilityFilter()
+
+
+def username_taken(username):
+    """Query DB cuma kalau filter positif"""
+    username = normalize_username(username)
+    if not availability_filter.might_contain(f'u:{username}'):
+        return False
+    return User.objects.filter(username__lower=username).exists()
+
+
+def email_taken(email):
+    """Query DB cuma kalau filter positif"""
+    email = normalize_email(email)
+    if not availability_filter.might_contain(f'e:{email}'):
+        return False
+    return User.objects.with_email(email).exists()
+
+
+def remember_user(user):
+    """Masukkan user baru ke filter proses ini (dipanggil setelah register)"""
+    availability_filter.add(f'u:{normalize_username(user.username)}')
+    if user.email:
+        availability_filter.add(f'e:{normalize_email(user.email)}')
@@ -0,0 +1,207 @@
+# backend/forum/benchmarks.py
+"""
+Benchmark endpoint API utama di atas data hasil seeding (forum.seeding)
+
+Tiap endpoint dipanggil lewat DRF APIClient (stack middleware + auth JWT
+lengkap, tanpa network) sebanyak `repeat` kali:
+- queries: jumlah query SQL per request (CaptureQueriesContext)
+- p50 / p95: latency dalam ms
+
+Hasil dibandingkan dengan baseline JSON (per scale). Regresi:
+- queries naik dari baseline (deterministik, selalu dicek)
+- p50 naik lebih dari `tolerance` (relatif) DAN lebih dari `min_delta_ms`
+  (absolut), supaya noise endpoint yang sangat cepat tidak bikin gagal.
+  p95 cuma dilaporkan: dengan puluhan sampel nilainya ~ maksimum (GC, dll)
+
+Latency bergantung mesin: baseline sebaiknya dibuat di mesin yang sama
+dengan yang menjalankan perbandingan (mis. runner CI yang sama).
+
+Dipakai `manage.py benchmark_api`.
+"""
+
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from .authentication import ForkaRefreshToken
+from .models import Comment, Notification, Post, ThrottleCounter, User
+from .querylog import percentile
+from .seeding import SEED_PASSWORD
+
+
+# (nama, method, path, body). Placeholder diisi dari benchmark_fixtures()
+ENDPOINTS = [
+    ('feed_new', 'get', '/api/posts/?filter=new', None),
+    ('feed_top', 'get', '/api/posts/?filter=top', None),
+    ('feed_hot', 'get', '/api/posts/?filter=hot', None),
+    ('feed_category', 'get', '/api/posts/?category={category_id}', None),
+    ('post_detail', 'get', '/api/posts/{post_id}/', None),
+    ('comments_top_level', 'get', '/api/comments/?post={post_id}&top_level=true', None),
+    ('comment_replies', 'get', '/api/comments/{comment_id}/replies/', None),
+    ('categories', 'get', '/api/categories/', None),
+    ('category_posts', 'get', '/api/categories/{category_slug}/posts/', None),
+    ('notifications', 'get', '/api/notifications/', None),
+    ('login', 'post', '/api/auth/login/', {'username': '{username}', 'password': SEED_PASSWORD}),
+]
+
+
+def benchmark_fixtures():
+    """
+    Objek "terpanas" di data seeding: kasus paling berat per endpoint
+    
+    Returns:
+        dict: nilai placeholder ENDPOINTS + 'user' untuk request terautentikasi
+    """
+    post = Post.objects.annotate(total=Count('comments')).order_by('-total', 'pk').first()
+    comment = (
+        Comment.objects.filter(post=post)
+        .annotate(total=Count('replies'))
+        .order_by('-total', 'pk')
+        .first()
+    )
+    recipient_id = (
+        Notification.objects.values('recipient')
+        .annotate(total=Count('id'))
+        .order_by('-total', 'recipient')
+        .values_list('recipient', flat=True)
+        .first()
+    )
+    user = User.objects.get(pk=recipient_id)
+    return {
+        'user': user,
+        'username': user.username,
+        'post_id': post.pk,
+        'comment_id': comment.pk,
+        'category_id': post.category_id,
+        'category_slug': post.category.slug,
+    }
+
+
+def _reset_throttles():
+    """Ratusan request beruntun: counter throttle (DB & cache) dikosongkan tiap request"""
+    ThrottleCounter.objects.all().delete()
+    caches[settings.THROTTLE_CACHE_ALIAS].clear()
+
+
+def _fill(value, fixtures):
+    if isinstance(value, dict):
+        return {key: _fill(item, fixtures) for key, item in value.items()}
+    return value.format(**fixtures) if isinstance(value, str) else value
+
+
+def measure(client, method, path, body, repeat):
+    """
+    Returns:
+        dict: {'status', 'queries', 'p50_ms', 'p95_ms'}
+    """
+    durations = []
+    queries = 0
+    status_code = None
+    # Request pemanasan (import lazy, cache dingin) tidak dihitung latency-nya
+    for attempt in range(repeat + 1):
+        _reset_throttles()
+        # queries_log = deque(maxlen=9000): setelah seeding besar sudah penuh dan
+        # CaptureQueriesContext (selisih panjang) selalu menghitung 0
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = getattr(client, method)(path, body, format='json')
+            elapsed = time.perf_counter() - start
+        if attempt:
+            durations.append(elapsed)
+        # Ambil maksimum: request pertama bisa lebih banyak (cache dingin)
+        queries = max(queries, len(captured))
+        status_code = response.status_code
+    return {
+        'status': status_code,
+        'queries': queries,
+        'p50_ms': round(percentile(durations, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(durations, 0.95) * 1000, 2),
+    }
+
+
+# Jalur acak (purge throttle, sampling Server-Timing) dimatikan supaya
+# jumlah query per request deterministik
+BENCHMARK_SETTINGS = {
+    'THROTTLE_DB_PURGE_PROBABILITY': 0,
+    'REQUEST_TIMING_SAMPLE_RATE': 0,
+}
+
+
+@override_settings(**BENCHMARK_SETTINGS)
+def run_benchmarks(repeat=20, only=None, log=None):
+    """
+    Returns:
+        dict: {nama endpoint: hasil measure()}
+    """
+    log = log or (lambda name, result: None)
+    fixtures = benchmark_fixtures()
+    client = APIClient()
+    access = ForkaRefreshToken.for_user(fixtures['user']).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    
+    results = {}
+    for name, method, path, body in ENDPOINTS:
+        if only and name not in only:
+            continue
+        results[name] = measure(client, method, _fill(path, fixtures), _fill(body, fixtures), repeat)
+        log(name, results[name])
+    return results
+
+
+# ============================================
+# BASELINE
+# ============================================
+
+def scale_key(scale):
+    return f'{scale:g}'
+
+
+def load_baseline(path, scale):
+    try:
+        with open(path) as fh:
+            return json.load(fh).get(scale_key(scale), {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, scale, results):
+    try:
+        with open(path) as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        data = {}
+    data[scale_key(scale)] = results
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def find_regressions(results, baseline, tolerance=0.5, min_delta_ms=10.0):
+    """
+    Returns:
+        list: pesan regresi (kosong = lolos)
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result['status'] != expected['status']:
+            regressions.append(f"{name}: status {result['status']} (baseline {expected['status']})")
+        if result['queries'] > expected['queries']:
+            regressions.append(f"{name}: {result['queries']} queries (baseline {expected['queries']})")
+        limit = expected['p50_ms'] * (1 + tolerance)
+        if result['p50_ms'] > limit and result['p50_ms'] - expected['p50_ms'] > min_delta_ms:
+            regressions.append(
+                f"{name}: p50 {result['p50_ms']:.1f}ms (baseline {expected['p50_ms']:.1f}ms, limit {limit:.1f}ms)"
+            )
+    return regressions
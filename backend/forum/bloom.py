@@ -0,0 +1,46 @@
+# backend/forum/bloom.py
+"""
+Bloom filter sederhana (bytearray + double hashing)
+
+Dipakai untuk cek cepat "pasti tidak ada" tanpa query DB.
+Hasil positif bisa false positive, jadi harus dicek ulang ke DB.
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Args:
+        capacity: perkiraan jumlah item
+        error_rate: target false positive rate (mis. 0.001 = 0.1%)
+    """
+    
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+    
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+    
+    def __len__(self):
+        return self.count
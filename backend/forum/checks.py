@@ -0,0 +1,110 @@
+# backend/forum/checks.py
+"""
+Deploy check: state lintas worker harus di shared cache dengan incr atomic
+
+Lockout login, counter throttle dan token_version JWT (plus state lain
+yang terdaftar di `shared_cache_aliases`) disimpan di cache. LocMemCache /
+DummyCache hidup per proses: dengan N worker gunicorn, tiap worker punya
+counter & lock sendiri (threshold 5 jadi 5 x N tebakan), dan token lama
+tetap diterima worker yang tidak melihat bump token_version.
+
+Alias yang menyimpan counter (lockout, throttle, percobaan OTP) juga butuh
+incr() atomic: DatabaseCache / FileBasedCache mengimplementasikannya
+sebagai get + set, jadi request paralel saling menimpa hitungan. Pakai
+Redis atau Memcached.
+
+Terdaftar sebagai system check deploy (forum.E001 / forum.E002):
+
+    python manage.py check --deploy
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# incr() = get + set, tidak atomic antar proses
+NON_ATOMIC_INCR_CACHE_BACKENDS = (
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+)
+
+
+def shared_cache_aliases():
+    """
+    Returns:
+        dict: {nama setting: alias cache} yang wajib dibagi semua worker
+    """
+    aliases = {
+        'LOCKOUT_CACHE_ALIAS': settings.LOCKOUT_CACHE_ALIAS,
+        'TOKEN_VERSION_CACHE_ALIAS': settings.TOKEN_VERSION_CACHE_ALIAS,
+    }
+    aliases.update(counter_cache_aliases())
+    return aliases
+
+
+def counter_cache_aliases():
+    """
+    Returns:
+        dict: {nama setting: alias cache} yang menyimpan counter (cache.incr)
+    """
+    aliases = {'LOCKOUT_CACHE_ALIAS': settings.LOCKOUT_CACHE_ALIAS}
+    if settings.THROTTLE_STORE != 'database':
+        aliases['THROTTLE_CACHE_ALIAS'] = settings.THROTTLE_CACHE_ALIAS
+    if settings.OTP_STORE == 'cache':
+        aliases['OTP_CACHE_ALIAS'] = settings.OTP_CACHE_ALIAS
+    return aliases
+
+
+def _backend(alias):
+    return settings.CACHES.get(alias, {}).get('BACKEND', '')
+
+
+def process_local_caches():
+    """
+    Returns:
+        list: pesan untuk tiap alias wajib-shared yang ternyata per proses
+    """
+    return [
+        f"{setting_name}='{alias}' uses {_backend(alias).rsplit('.', 1)[-1]}"
+        for setting_name, alias in shared_cache_aliases().items()
+        if _backend(alias) in PROCESS_LOCAL_CACHE_BACKENDS
+    ]
+
+
+def non_atomic_counter_caches():
+    """
+    Returns:
+        list: pesan untuk tiap alias counter yang incr()-nya tidak atomic
+    """
+    return [
+        f"{setting_name}='{alias}' uses {_backend(alias).rsplit('.', 1)[-1]}"
+        for setting_name, alias in counter_cache_aliases().items()
+        if _backend(alias) in NON_ATOMIC_INCR_CACHE_BACKENDS
+    ]
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """Error kalau state lintas worker ada di cache per proses / counter tanpa incr atomic"""
+    errors = [
+        Error(
+            f"{problem}, which is not shared between workers.",
+            hint='Set CACHE_BACKEND / CACHE_LOCATION to RedisCache or a Memcached backend.',
+            id='forum.E001',
+        )
+        for problem in process_local_caches()
+    ]
+    errors += [
+        Error(
+            f"{problem}, whose incr() is not atomic: concurrent requests lose counts.",
+            hint='Use RedisCache or a Memcached backend for counter caches.',
+            id='forum.E002',
+        )
+        for problem in non_atomic_counter_caches()
+    ]
+    return errors
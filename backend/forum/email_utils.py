@@ -1,14 +1,354 @@
 # backend/forum/email_utils.py
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
+from itertools import islice
 import logging
+import time
+
+from .models import User, EmailOutbox, EmailBroadcast
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
 
+# ============================================
+# OUTBOX (queue + background delivery)
+# ============================================
+
+def queue_email(to_email, subject, body, html_body=''):
+    """
+    Simpan email ke outbox, dikirim nanti oleh worker.
+    
+    Kalau dipanggil di dalam transaction.atomic(), email ikut
+    rollback bersama data lainnya (tidak ada email "nyasar").
+    INSERT-nya punya savepoint sendiri: kalau gagal dan error-nya
+    ditangkap caller, transaksi luar tetap bisa dipakai.
+    """
+    with transaction.atomic():
+        return EmailOutbox.objects.create(
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            html_body=html_body,
+        )
+
+
+def _retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ... (max EMAIL_OUTBOX_RETRY_MAX)"""
+    delay = settings.EMAIL_OUTBOX_RETRY_BASE * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_RETRY_MAX))
+
+
+def claim_pending_emails(batch_size=None):
+    """
+    Ambil batch email yang sudah jatuh tempo dan tandai 'sending'.
+    
+    SKIP LOCKED membuat beberapa worker bisa jalan paralel tanpa
+    mengirim email yang sama dua kali. Email yang macet di 'sending'
+    (worker mati) diambil lagi setelah EMAIL_OUTBOX_LOCK_TIMEOUT;
+    deliver_outbox memperpanjang lease sebelum tiap email, jadi batch
+    yang lambat tidak ikut diambil worker lain.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.EMAIL_OUTBOX_LOCK_TIMEOUT)
+    
+    with transaction.atomic():
+        ids = list(
+            EmailOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status='pending', next_attempt_at__lte=now) |
+                Q(status='sending', locked_at__lt=stale_before)
+            )
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            EmailOutbox.objects.filter(id__in=ids).update(status='sending', locked_at=now)
+    
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by('next_attempt_at'))
+
+
+def _build_message(item, connection):
+    message = EmailMultiAlternatives(
+        subject=item.subject,
+        body=item.body,
+        from_email=settings.EMAIL_HOST_USER,
+        to=[item.to_email],
+        connection=connection,
+    )
+    if item.html_body:
+        message.attach_alternative(item.html_body, 'text/html')
+    return message
+
+
+def _send(connection, message, kind):
+    """send_messages untuk satu email, latency dicatat di metrics"""
+    started = time.monotonic()
+    result = 'error'
+    try:
+        sent = connection.send_messages([message])
+        result = 'sent' if sent else 'rejected'
+        return sent
+    finally:
+        metrics.email_send_duration.labels(kind, result).observe(time.monotonic() - started)
+
+
+def _renew_lease(ids):
+    """locked_at = sekarang untuk email batch ini yang belum diproses"""
+    EmailOutbox.objects.filter(id__in=ids, status='sending').update(locked_at=timezone.now())
+
+
+def _mark_sent(item):
+    item.status = 'sent'
+    item.attempts += 1
+    item.sent_at = timezone.now()
+    item.locked_at = None
+    item.last_error = ''
+    # Isi email berisi kode OTP / reset plaintext, tidak perlu disimpan setelah terkirim
+    item.body = item.html_body = ''
+    item.save(update_fields=['status', 'attempts', 'sent_at', 'locked_at', 'last_error', 'body', 'html_body'])
+
+
+def _mark_failed(item, error):
+    item.attempts += 1
+    item.locked_at = None
+    item.last_error = str(error)[:1000]
+    if item.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        item.status = 'failed'
+    else:
+        item.status = 'pending'
+        item.next_attempt_at = timezone.now() + _retry_delay(item.attempts)
+    item.save(update_fields=['status', 'attempts', 'locked_at', 'last_error', 'next_attempt_at'])
+
+
+def deliver_outbox(connection=None, batch_size=None):
+    """
+    Kirim satu batch email dari outbox lewat satu koneksi SMTP.
+    
+    Kalau `connection` diberikan (worker), koneksi dipakai ulang
+    antar batch dan tidak ditutup di sini.
+    
+    Returns:
+        tuple: (sent, failed)
+    """
+    items = claim_pending_emails(batch_size)
+    if not items:
+        return 0, 0
+    
+    own_connection = connection is None
+    if own_connection:
+        connection = get_connection(fail_silently=False)
+    
+    sent = failed = 0
+    try:
+        for index, item in enumerate(items):
+            if index:
+                _renew_lease([item.id for item in items[index:]])
+            try:
+                connection.open()
+                if not _send(connection, _build_message(item, connection), 'outbox'):
+                    raise RuntimeError('Email backend did not accept the message')
+            except Exception as e:
+                logger.warning(f"Outbox email {item.id} to {item.to_email} failed: {str(e)}")
+                _mark_failed(item, e)
+                failed += 1
+                # Koneksi mungkin sudah rusak, buka ulang di item berikutnya
+                connection.close()
+            else:
+                _mark_sent(item)
+                sent += 1
+    finally:
+        if own_connection:
+            connection.close()
+    
+    logger.info(f"Outbox batch delivered: {sent} sent, {failed} failed")
+    return sent, failed
+
+
+# ============================================
+# BROADCAST (admin announcements)
+# ============================================
+
+def broadcast_recipients(after_user_id=0):
+    """
+    Penerima broadcast: user aktif dengan email terverifikasi,
+    urut berdasarkan id supaya bisa dilanjutkan dari cursor.
+    """
+    return (
+        User.objects
+        .filter(is_active=True, email_verified=True, id__gt=after_user_id)
+        .exclude(email='')
+        .order_by('id')
+        .values_list('id', 'email')
+    )
+
+
+def queue_broadcast(broadcast):
+    """Tandai broadcast siap dikirim worker dan hitung jumlah penerima"""
+    broadcast.status = 'queued'
+    broadcast.total_recipients = (
+        broadcast.sent_count + broadcast.failed_count
+        + broadcast_recipients(broadcast.last_user_id).count()
+    )
+    broadcast.last_error = ''
+    broadcast.save(update_fields=['status', 'total_recipients', 'last_error'])
+    return broadcast
+
+
+def claim_broadcast():
+    """
+    Ambil satu broadcast yang antri (atau yang worker-nya mati di tengah jalan)
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.EMAIL_BROADCAST_LOCK_TIMEOUT)
+    
+    with transaction.atomic():
+        broadcast = (
+            EmailBroadcast.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status='queued') |
+                Q(status='sending', heartbeat_at__lt=stale_before)
+            )
+            .order_by('created_at')
+            .first()
+        )
+        if broadcast is None:
+            return None
+        
+        broadcast.status = 'sending'
+        broadcast.started_at = broadcast.started_at or now
+        broadcast.heartbeat_at = now
+        broadcast.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+    
+    return broadcast
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _build_broadcast_message(broadcast, email, connection):
+    # Satu email per penerima (bukan BCC) supaya alamat tidak bocor
+    message = EmailMultiAlternatives(
+        subject=broadcast.subject,
+        body=broadcast.message,
+        from_email=settings.EMAIL_HOST_USER,
+        to=[email],
+        connection=connection,
+    )
+    if broadcast.html_message:
+        message.attach_alternative(broadcast.html_message, 'text/html')
+    return message
+
+
+def _finish_broadcast(broadcast, status, **fields):
+    """
+    Ubah status broadcast dari 'sending' ke `status` secara kondisional.
+    Pause/cancel dari admin di tengah batch terakhir tidak tertimpa.
+    
+    Returns:
+        str: status broadcast setelahnya
+    """
+    updated = (
+        EmailBroadcast.objects
+        .filter(pk=broadcast.pk, status='sending')
+        .update(status=status, **fields)
+    )
+    if updated:
+        broadcast.status = status
+        for name, value in fields.items():
+            setattr(broadcast, name, value)
+    else:
+        broadcast.refresh_from_db(fields=['status', 'finished_at'])
+    return broadcast.status
+
+
+def deliver_broadcast(broadcast, batch_size=None, rate=None):
+    """
+    Kirim broadcast secara bertahap.
+    
+    - Penerima di-stream dengan .iterator() (tidak ada list besar di memory)
+    - Satu koneksi SMTP dipakai ulang untuk semua batch
+    - Kecepatan dibatasi `rate` email per detik
+    - Progress disimpan per batch, jadi bisa dilanjutkan dari `last_user_id`
+    - Berhenti kalau admin pause/cancel di tengah jalan
+    
+    Returns:
+        str: status akhir broadcast
+    """
+    batch_size = batch_size or settings.EMAIL_BROADCAST_BATCH_SIZE
+    rate = rate or settings.EMAIL_BROADCAST_RATE
+    
+    connection = get_connection(fail_silently=False)
+    recipients = broadcast_recipients(broadcast.last_user_id).iterator(chunk_size=batch_size)
+    
+    try:
+        for batch in _batched(recipients, batch_size):
+            current_status = (
+                EmailBroadcast.objects
+                .filter(pk=broadcast.pk)
+                .values_list('status', flat=True)
+                .first()
+            )
+            if current_status != 'sending':
+                logger.info(f"Broadcast {broadcast.pk} stopped: {current_status}")
+                return current_status
+            
+            started = time.monotonic()
+            
+            try:
+                connection.open()
+            except Exception as e:
+                # Server SMTP tidak bisa dihubungi: pause, lanjutkan nanti dari cursor
+                logger.error(f"Broadcast {broadcast.pk} paused, SMTP unavailable: {str(e)}")
+                return _finish_broadcast(broadcast, 'paused', last_error=str(e)[:1000])
+            
+            for _, email in batch:
+                try:
+                    connection.open()
+                    _send(connection, _build_broadcast_message(broadcast, email, connection), 'broadcast')
+                    broadcast.sent_count += 1
+                except Exception as e:
+                    logger.warning(f"Broadcast {broadcast.pk} to {email} failed: {str(e)}")
+                    broadcast.failed_count += 1
+                    broadcast.last_error = str(e)[:1000]
+                    # Koneksi mungkin sudah rusak, buka ulang di penerima berikutnya
+                    connection.close()
+            
+            broadcast.last_user_id = batch[-1][0]
+            broadcast.heartbeat_at = timezone.now()
+            broadcast.save(update_fields=[
+                'sent_count', 'failed_count', 'last_user_id', 'last_error', 'heartbeat_at'
+            ])
+            
+            # Rate limit: batch ini minimal butuh len(batch) / rate detik
+            elapsed = time.monotonic() - started
+            min_duration = len(batch) / rate
+            if elapsed < min_duration:
+                time.sleep(min_duration - elapsed)
+    finally:
+        connection.close()
+    
+    status = _finish_broadcast(broadcast, 'completed', finished_at=timezone.now())
+    logger.info(
+        f"Broadcast {broadcast.pk} {status}: "
+        f"{broadcast.sent_count} sent, {broadcast.failed_count} failed"
+    )
+    return status
+
+
 def send_verification_email(user, code):
     """
-    Send verification code to user's email
+    Queue verification code email (delivered by the outbox worker)
     
     Security measures:
     - Rate limited in views
@@ -73,25 +413,18 @@ def send_verification_email(user, code):
     """
     
     try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        logger.info(f"Verification email sent to {user.email}")
+        queue_email(user.email, subject, plain_message, html_message)
+        logger.info(f"Verification email queued for {user.email}")
         return True
     except Exception as e:
-        logger.error(f"Failed to send verification email to {user.email}: {str(e)}")
+        logger.error(f"Failed to queue verification email for {user.email}: {str(e)}")
         return False
 
 
 # ✨ NEW: Password Reset Email
 def send_password_reset_email(user, code):
     """
-    Send password reset code to user's email
+    Queue password reset code email (delivered by the outbox worker)
     
     Security: Code expires in 15 minutes
     """
@@ -154,16 +487,9 @@ def send_password_reset_email(user, code):
     """
     
     try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        logger.info(f"Password reset email sent to {user.email}")
+        queue_email(user.email, subject, plain_message, html_message)
+        logger.info(f"Password reset email queued for {user.email}")
         return True
     except Exception as e:
-        logger.error(f"Failed to send password reset email to {user.email}: {str(e)}")
+        logger.error(f"Failed to queue password reset email for {user.email}: {str(e)}")
         return False
\ No newline at end of file
@@ -0,0 +1,148 @@
+# backend/forum/hashing.py
+"""
+Bounded worker pool untuk password hashing
+
+PBKDF2 (default Django) makan puluhan ms CPU per check_password.
+Di ASGI itu memblok event loop, di WSGI burst login menghabiskan semua worker.
+
+- Hashing jalan di ThreadPoolExecutor (hashlib/argon2/bcrypt melepas GIL)
+- Jumlah job (jalan + antri) dibatasi PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_DEPTH
+- Pool penuh -> PasswordHashingBusy langsung (503), bukan antri tanpa batas
+- Rehash transparan kalau parameter hasher berubah (iterations naik,
+  ganti PASSWORD_HASHERS), tanpa bump token_version user
+
+Usage:
+    is_valid = check_password(user, raw)           # view sync
+    is_valid = await acheck_password(user, raw)    # view async
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Server is busy. Please try again shortly.'
+    default_code = 'hashing_busy'
+
+
+class HashingPool:
+    """ThreadPoolExecutor dengan batas job + fast rejection"""
+    
+    def __init__(self, workers, queue_depth):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+    
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Password hashing pool full, rejecting request")
+            raise PasswordHashingBusy()
+        
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    settings.PASSWORD_HASH_WORKERS,
+                    settings.PASSWORD_HASH_QUEUE_DEPTH,
+                )
+    return _pool
+
+
+def _rehash(user, encoded):
+    """
+    Simpan hash baru tanpa lewat set_password, supaya tidak dianggap
+    ganti password (token_version tetap, session tidak di-revoke)
+    """
+    user.password = encoded
+    user.save(update_fields=['password'])
+    logger.info(f"Password hash upgraded for user: {user.username}")
+
+
+def check_password(user, raw_password):
+    """
+    Versi pool dari user.check_password() untuk view sync
+    
+    Raises:
+        PasswordHashingBusy: pool penuh
+    """
+    pool = get_hashing_pool()
+    is_correct, must_update = pool.submit(verify_password, raw_password, user.password).result(
+        timeout=settings.PASSWORD_HASH_TIMEOUT
+    )
+    
+    if is_correct and must_update:
+        try:
+            encoded = pool.submit(make_password, raw_password).result(timeout=settings.PASSWORD_HASH_TIMEOUT)
+        except PasswordHashingBusy:
+            # Login tetap sukses, rehash dicoba di login berikutnya
+            return is_correct
+        _rehash(user, encoded)
+    
+    return is_correct
+
+
+async def acheck_password(user, raw_password):
+    """
+    Versi async: event loop tidak pernah menjalankan hashing sendiri
+    
+    Raises:
+        PasswordHashingBusy: pool penuh
+    """
+    pool = get_hashing_pool()
+    is_correct, must_update = await asyncio.wait_for(
+        asyncio.wrap_future(pool.submit(verify_password, raw_password, user.password)),
+        timeout=settings.PASSWORD_HASH_TIMEOUT,
+    )
+    
+    if is_correct and must_update:
+        try:
+            encoded = await asyncio.wrap_future(pool.submit(make_password, raw_password))
+        except PasswordHashingBusy:
+            return is_correct
+        user.password = encoded
+        await user.asave(update_fields=['password'])
+        logger.info(f"Password hash upgraded for user: {user.username}")
+    
+    return is_correct
+
+
+def set_password(user, raw_password):
+    """
+    Sama dengan user.set_password(), tapi hashing lewat pool.
+    _password ikut diisi supaya save() tetap bump token_version
+    """
+    user.password = get_hashing_pool().submit(make_password, raw_password).result(
+        timeout=settings.PASSWORD_HASH_TIMEOUT
+    )
+    user._password = raw_password
+
+
+async def aset_password(user, raw_password):
+    user.password = await asyncio.wrap_future(get_hashing_pool().submit(make_password, raw_password))
+    user._password = raw_password
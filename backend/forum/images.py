@@ -0,0 +1,296 @@
+# backend/forum/images.py
+"""
+Image pipeline untuk upload (post image, profile picture & attachment)
+
+Upload cuma menyimpan original dan menandai status 'pending'.
+Worker `python manage.py process_images` lalu:
+- Menerapkan orientasi EXIF dan menyimpan ulang original tanpa metadata
+  (GPS, kamera, dll)
+- Menyimpan dimensi original
+- Membuat varian WebP per lebar IMAGE_VARIANT_WIDTHS (mis. 160/480/1080),
+  tidak pernah upscale
+
+Serializer mengembalikan map {lebar: url} untuk srcset, jadi feed
+mengunduh varian kecil, bukan original berukuran MB.
+"""
+
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .media_urls import media_url
+from .models import Post, PostAttachment, User, IMAGE_PENDING, IMAGE_READY, IMAGE_FAILED
+
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'variants'
+
+# Model -> prefix field (image -> image_status, image_variants, ...)
+IMAGE_FIELDS = (
+    (Post, 'image'),
+    (User, 'profile_picture'),
+    (PostAttachment, 'file'),
+)
+
+# Format yang bisa disimpan ulang tanpa EXIF dengan format aslinya
+RESAVE_FORMATS = {'JPEG': 'JPEG', 'MPO': 'JPEG', 'PNG': 'PNG', 'WEBP': 'WEBP'}
+
+
+def variant_name(source_name, width):
+    """
+    variants/posts/foto.jpg/480.webp
+    (ContentAddressedStorage menyimpannya sebagai blob .webp, dedup juga)
+    """
+    return f'{VARIANTS_DIR}/{source_name}/{width}.webp'
+
+
+def mark_pending(instance, field):
+    """Panggil setelah file baru di-assign (sebelum save)"""
+    setattr(instance, f'{field}_status', IMAGE_PENDING)
+    setattr(instance, f'{field}_variants', {})
+    setattr(instance, f'{field}_width', None)
+    setattr(instance, f'{field}_height', None)
+
+
+def clear_image_state(instance, field):
+    """Panggil saat image dihapus: varian lama ikut dihapus dari storage"""
+    delete_variants(getattr(instance, f'{field}_variants') or {}, getattr(instance, field).storage)
+    reset_image_state(instance, field)
+
+
+def reset_image_state(instance, field):
+    """Kosongkan status/varian/dimensi (referensi sudah dilepas release_image)"""
+    setattr(instance, f'{field}_status', '')
+    setattr(instance, f'{field}_variants', {})
+    setattr(instance, f'{field}_width', None)
+    setattr(instance, f'{field}_height', None)
+
+
+def delete_variants(variants, storage):
+    for name in variants.values():
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.warning(f"Failed to delete image variant {name}: {str(e)}")
+
+
+def release_image(instance, field):
+    """
+    Lepas referensi original + varian setelah transaksi commit
+    (image diganti / dihapus, atau row-nya dihapus).
+    
+    Storage content-addressed cuma menurunkan ref_count; file yang tidak
+    terpakai lagi dihapus `manage.py gc_media`, bukan di request path.
+    """
+    file = getattr(instance, field)
+    if not file:
+        return
+    
+    storage = file.storage
+    # Field tanpa varian (mis. PostAttachment.file) cuma melepas file-nya
+    names = [file.name, *(getattr(instance, f'{field}_variants', None) or {}).values()]
+    transaction.on_commit(lambda: _release_names(names, storage))
+
+
+def _release_names(names, storage):
+    release = getattr(storage, 'release', None)
+    for name in names:
+        try:
+            if release:
+                release(name)
+            else:
+                storage.delete(name)
+        except Exception as e:
+            logger.warning(f"Failed to release media {name}: {str(e)}")
+
+
+def srcset(instance, field, request=None):
+    """
+    Map {lebar: url} untuk field image yang sudah diproses, None kalau belum
+    """
+    variants = getattr(instance, f'{field}_variants', None)
+    if not variants or getattr(instance, f'{field}_status', '') != IMAGE_READY:
+        return None
+    
+    storage = getattr(instance, field).storage
+    return {
+        width: media_url(name, request, storage)
+        for width, name in sorted(variants.items(), key=lambda item: int(item[0]))
+    }
+
+
+def _strip_metadata(image, fmt):
+    """Encode ulang original tanpa EXIF/ICC/XMP"""
+    buffer = BytesIO()
+    options = {}
+    if fmt == 'JPEG':
+        options = {'quality': settings.IMAGE_ORIGINAL_QUALITY, 'optimize': True}
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+    elif fmt == 'WEBP':
+        options = {'quality': settings.IMAGE_ORIGINAL_QUALITY}
+    image.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def _webp_variant(image, width):
+    variant = image.copy()
+    height = max(round(image.height * width / image.width), 1)
+    variant = variant.resize((width, height), Image.Resampling.LANCZOS)
+    if variant.mode not in ('RGB', 'RGBA'):
+        variant = variant.convert('RGBA' if 'A' in variant.getbands() else 'RGB')
+    
+    buffer = BytesIO()
+    variant.save(buffer, format='WEBP', quality=settings.IMAGE_WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def process_image(instance, field):
+    """
+    Proses satu image: strip EXIF, simpan dimensi, buat varian WebP.
+    Hasil disimpan ke instance (belum di-save), original & varian lama
+    dilepas setelah commit. Jalankan di transaksi yang sama dengan update
+    row (process_pending memakai _render_image langsung).
+    """
+    storage = getattr(instance, field).storage
+    _, stale = _render_image(instance, field)
+    transaction.on_commit(lambda: _release_names(stale, storage))
+
+
+def _render_image(instance, field):
+    """
+    Pillow + upload untuk process_image, tanpa menyentuh row.
+    
+    File baru disimpan dulu dan referensinya langsung tercatat; gagal di
+    tengah jalan melepas lagi yang sudah tersimpan, jadi row tidak pernah
+    menunjuk file yang sudah dilepas.
+    
+    Returns:
+        tuple: (saved, stale) nama referensi baru & nama lama yang harus
+        dilepas kalau hasilnya dipakai
+    """
+    file = getattr(instance, field)
+    storage = file.storage
+    source_name = file.name
+    saved = []
+    
+    try:
+        with storage.open(source_name, 'rb') as fh:
+            image = Image.open(fh)
+            fmt = image.format
+            # Animated GIF dll: original dibiarkan, varian pakai frame pertama
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        
+        # Original tanpa metadata, disimpan sebagai file baru. Upload identik
+        # dengan yang pernah diproses sudah di-resolve storage ke hasilnya
+        is_processed = getattr(storage, 'is_processed', None)
+        resave = fmt in RESAVE_FORMATS and not (is_processed and is_processed(source_name))
+        stripped_name = source_name
+        if resave:
+            stripped_name = storage.save(source_name, ContentFile(_strip_metadata(image, RESAVE_FORMATS[fmt])))
+            saved.append(stripped_name)
+            record_processed = getattr(storage, 'record_processed', None)
+            if record_processed:
+                record_processed(source_name, stripped_name)
+        
+        variants = {}
+        for width in sorted(set(settings.IMAGE_VARIANT_WIDTHS)):
+            # Jangan upscale: lebar di atas original pakai ukuran original
+            target = min(width, image.width)
+            if str(target) in variants:
+                continue
+            variants[str(target)] = storage.save(
+                variant_name(stripped_name, target), ContentFile(_webp_variant(image, target))
+            )
+            saved.append(variants[str(target)])
+    except Exception:
+        _release_names(saved, storage)
+        raise
+    
+    # Tiap save() = 1 referensi baru, referensi lama dilepas pemanggil
+    # (blob yang isinya sama tetap hidup, ref_count-nya naik lalu turun lagi)
+    stale = list((getattr(instance, f'{field}_variants') or {}).values())
+    if resave:
+        stale.append(source_name)
+    
+    file.name = stripped_name
+    setattr(instance, f'{field}_width', image.width)
+    setattr(instance, f'{field}_height', image.height)
+    setattr(instance, f'{field}_variants', variants)
+    setattr(instance, f'{field}_status', IMAGE_READY)
+    return saved, stale
+
+
+def process_pending(model, field, batch_size=None):
+    """
+    Proses batch image 'pending' untuk satu model
+    
+    Row tidak di-lock selama Pillow & upload: hasil ditulis dengan update
+    bersyarat (masih pending, file masih sama). Kalau user mengganti image
+    atau worker lain sudah selesai duluan, hasil ini dibuang.
+    
+    Returns:
+        tuple: (processed, failed)
+    """
+    batch_size = batch_size or settings.IMAGE_PROCESS_BATCH_SIZE
+    status_field = f'{field}_status'
+    update_fields = [field, status_field, f'{field}_variants', f'{field}_width', f'{field}_height']
+    processed = failed = 0
+    
+    pending_ids = list(
+        model.objects.filter(**{status_field: IMAGE_PENDING})
+        .order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    
+    for pk in pending_ids:
+        instance = model.objects.filter(pk=pk, **{status_field: IMAGE_PENDING}).first()
+        if instance is None:
+            continue
+        
+        file = getattr(instance, field)
+        storage = file.storage
+        # Klaim: update cuma berlaku kalau row masih seperti yang dibaca di sini
+        claimed = model.objects.filter(pk=pk, **{status_field: IMAGE_PENDING, field: file.name})
+        
+        try:
+            if not file:
+                saved, stale = [], list((getattr(instance, f'{field}_variants') or {}).values())
+                reset_image_state(instance, field)
+            else:
+                saved, stale = _render_image(instance, field)
+        except Exception as e:
+            logger.error(f"Image processing failed for {model.__name__} {pk}: {str(e)}")
+            # Row tetap menunjuk original lama
+            claimed.update(**{status_field: IMAGE_FAILED})
+            failed += 1
+            continue
+        
+        with transaction.atomic():
+            # save() penuh akan bump updated_at / token state, cukup field image
+            updated = claimed.update(**{name: getattr(instance, name) for name in update_fields})
+            if updated:
+                transaction.on_commit(lambda stale=stale, storage=storage: _release_names(stale, storage))
+        
+        if not updated:
+            # Row berubah selama diproses: referensi hasil proses ini dilepas
+            _release_names(saved, storage)
+            continue
+        processed += 1
+    
+    return processed, failed
+
+
+def process_all_pending(batch_size=None):
+    processed = failed = 0
+    for model, field in IMAGE_FIELDS:
+        done, errors = process_pending(model, field, batch_size)
+        processed += done
+        failed += errors
+    return processed, failed
@@ -0,0 +1,104 @@
+# backend/forum/lockout.py
+"""
+Login lockout state di shared cache (bukan di row User)
+
+- Counter gagal login disimpan di cache dengan TTL (incr atomic di
+  Redis/Memcached)
+- Lock window juga di cache, jadi login yang gagal tidak menulis ke DB
+- Alias LOCKOUT_CACHE_ALIAS wajib shared dengan incr atomic (Redis /
+  Memcached): dengan LocMem tiap worker punya counter sendiri, dengan
+  DatabaseCache incr = get + set dan tebakan paralel hilang hitungannya.
+  Keduanya dilaporkan `manage.py check --deploy` (forum/checks.py)
+- DB cuma ditulis saat state berubah penting:
+    * akun baru terkunci (supaya lock tetap berlaku walau cache di-flush)
+    * login sukses setelah sebelumnya ada lock/counter di DB
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+
+def _cache():
+    return caches[settings.LOCKOUT_CACHE_ALIAS]
+
+
+def _attempts_key(user_id):
+    return f'lockout:attempts:{user_id}'
+
+
+def _locked_key(user_id):
+    return f'lockout:until:{user_id}'
+
+
+def _lockout_seconds():
+    return settings.ACCOUNT_LOCKOUT_DURATION * 60
+
+
+def get_locked_until(user):
+    """
+    Cek sampai kapan akun dikunci
+    
+    Returns:
+        datetime | None: waktu lock berakhir, None kalau tidak dikunci
+    """
+    timestamp = _cache().get(_locked_key(user.pk))
+    if timestamp:
+        return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+    
+    # Fallback ke kolom DB (sudah ter-load bersama user, tanpa query tambahan)
+    if user.account_locked_until and timezone.now() < user.account_locked_until:
+        return user.account_locked_until
+    
+    return None
+
+
+def register_failed_login(user):
+    """
+    Tambah counter gagal login (atomic di Redis/Memcached, lihat forum/checks.py)
+    
+    Returns:
+        tuple: (attempts, locked_until) - locked_until None kalau belum dikunci
+    """
+    cache = _cache()
+    key = _attempts_key(user.pk)
+    
+    # add() cuma set kalau key belum ada, TTL = lockout window
+    cache.add(key, 0, timeout=_lockout_seconds())
+    try:
+        attempts = cache.incr(key)
+    except ValueError:
+        # Key expired di antara add() dan incr()
+        cache.set(key, 1, timeout=_lockout_seconds())
+        attempts = 1
+    
+    if attempts < settings.ACCOUNT_LOCKOUT_THRESHOLD:
+        return attempts, None
+    
+    locked_until = timezone.now() + timedelta(seconds=_lockout_seconds())
+    
+    # Hanya request pertama yang melewati threshold yang menulis lock
+    if cache.add(_locked_key(user.pk), locked_until.timestamp(), timeout=_lockout_seconds()):
+        cache.delete(key)
+        user.failed_login_attempts = attempts
+        user.account_locked_until = locked_until
+        user.save(update_fields=['failed_login_attempts', 'account_locked_until'])
+    else:
+        locked_until = get_locked_until(user) or locked_until
+    
+    return attempts, locked_until
+
+
+def clear_failed_logins(user):
+    """
+    Reset counter setelah login sukses / reset password
+    DB cuma ditulis kalau memang ada state lama di row user
+    """
+    _cache().delete_many([_attempts_key(user.pk), _locked_key(user.pk)])
+    
+    if user.failed_login_attempts or user.account_locked_until:
+        user.failed_login_attempts = 0
+        user.account_locked_until = None
+        user.save(update_fields=['failed_login_attempts', 'account_locked_until'])
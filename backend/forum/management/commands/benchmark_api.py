@@ -0,0 +1,105 @@
+"""
+Benchmark endpoint API utama di database test yang di-seed
+(forum.seeding), dibandingkan dengan baseline tersimpan.
+
+Usage:
+    python manage.py benchmark_api                        # scale 0.01, bandingkan baseline
+    python manage.py benchmark_api --update-baseline      # simpan hasil sebagai baseline
+    python manage.py benchmark_api --scale 1 --keepdb     # volume penuh, DB test dipakai ulang
+    python manage.py benchmark_api --only feed_new login
+    python manage.py benchmark_api --now 2025-06-01T12:00:00   # timestamp seeding tetap (feed_hot cuma 7 hari terakhir)
+
+scale 1.0 = 10k user, 100k post, 1M komentar, 1M like post/komentar.
+Exit code != 0 kalau ada regresi (jumlah query naik / p50 lewat toleransi)
+atau baseline untuk --scale tsb belum ada (kecuali --update-baseline).
+baseline.json menyimpan scale 0.01 dan 1; scale lain direkam dulu dengan
+--update-baseline di mesin yang sama.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from forum import benchmarks
+from forum.models import User
+from forum.seeding import parse_now, scaled_volumes, seed_forum
+
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark hot API endpoints on a seeded test database and fail on regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.01, help='Fraction of the full dataset volume')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--now', type=parse_now,
+                            help='Anchor seeded timestamps to this date/time (default: current time)')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per endpoint')
+        parser.add_argument('--only', nargs='+', choices=[name for name, *_ in benchmarks.ENDPOINTS])
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--update-baseline', action='store_true', help='Store results as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed relative p50 increase')
+        parser.add_argument('--min-delta-ms', type=float, default=10.0, help='Ignore p50 increases below this')
+        parser.add_argument('--keepdb', action='store_true', help='Keep (and reuse) the seeded test database')
+
+    def handle(self, *args, **options):
+        baseline = benchmarks.load_baseline(options['baseline'], options['scale'])
+        # Cek sebelum seeding: scale besar makan waktu beberapa menit
+        if not baseline and not options['update_baseline']:
+            raise CommandError(
+                f"No baseline for scale {options['scale']:g} in {options['baseline']}, "
+                "run with --update-baseline first"
+            )
+
+        verbosity = options['verbosity']
+        old_config = setup_databases(verbosity=verbosity, interactive=False, keepdb=options['keepdb'])
+        try:
+            self._seed(options)
+            self.stdout.write(f"{'endpoint':<22}{'status':>7}{'queries':>9}{'p50 ms':>9}{'p95 ms':>9}")
+            results = benchmarks.run_benchmarks(
+                repeat=options['repeat'], only=options['only'], log=self._print_result,
+            )
+        finally:
+            teardown_databases(old_config, verbosity=verbosity, keepdb=options['keepdb'])
+
+        if options['update_baseline']:
+            benchmarks.save_baseline(options['baseline'], options['scale'], {**baseline, **results})
+            self.stdout.write(f"Baseline saved to {options['baseline']}")
+            return
+
+        regressions = benchmarks.find_regressions(
+            results, baseline, tolerance=options['tolerance'], min_delta_ms=options['min_delta_ms'],
+        )
+        if regressions:
+            raise CommandError('Regressions against baseline:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
+
+    def _seed(self, options):
+        expected = scaled_volumes(options['scale'])['users']
+        seeded = User.objects.filter(username__startswith='seed').count()
+        if seeded == expected:
+            self.stdout.write(f"Reusing seeded database ({seeded} users)")
+            return
+        if seeded:
+            raise CommandError(
+                f"Test database holds {seeded} seeded users, scale {options['scale']:g} needs {expected}; "
+                "run once without --keepdb to recreate it"
+            )
+
+        start = time.perf_counter()
+        seed_forum(
+            scale=options['scale'],
+            seed=options['seed'],
+            now=options['now'],
+            log=lambda message: self.stdout.write(f"  {message}"),
+        )
+        self.stdout.write(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+    def _print_result(self, name, result):
+        self.stdout.write(
+            f"{name:<22}{result['status']:>7}{result['queries']:>9}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+        )
@@ -0,0 +1,87 @@
+"""
+Benchmark login throughput per core untuk setiap PASSWORD_HASHERS.
+
+Usage:
+    python manage.py benchmark_hashers
+    python manage.py benchmark_hashers --rounds 50 --workers 4
+
+Kolom:
+    ms/check      waktu satu verify_password (1 thread)
+    logins/s/core throughput 1 thread (= 1000 / ms)
+    pool logins/s throughput lewat HashingPool dengan --workers thread
+    rehash        apakah hash lama (parameter berbeda) di-upgrade saat login
+"""
+
+import os
+import time
+from concurrent.futures import wait
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers, get_hasher, verify_password
+from django.core.management.base import BaseCommand
+
+from forum.hashing import HashingPool
+
+
+PASSWORD = 'benchmark-Password-123'
+
+
+class Command(BaseCommand):
+    help = 'Measure login (password check) throughput per core for each configured hasher'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20, help='Password checks per measurement')
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASH_WORKERS)
+
+    def handle(self, *args, **options):
+        rounds = options['rounds']
+        workers = options['workers']
+        preferred = get_hasher('default')
+
+        self.stdout.write(f"CPU cores: {os.cpu_count()}, pool workers: {workers}, rounds: {rounds}")
+        self.stdout.write(f"{'hasher':<28}{'ms/check':>10}{'logins/s/core':>15}{'pool logins/s':>15}  rehash")
+
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except (ValueError, TypeError) as e:
+                # Library belum terpasang (argon2-cffi, bcrypt, ...)
+                self.stdout.write(f"{hasher.algorithm:<28}skipped: {e}")
+                continue
+
+            single = self._measure_single(encoded, rounds)
+            pooled = self._measure_pool(encoded, rounds, workers)
+            rehash = self._rehash_on_login(hasher, preferred)
+
+            self.stdout.write(
+                f"{hasher.algorithm:<28}{single * 1000:>10.1f}{1 / single:>15.1f}{pooled:>15.1f}  {rehash}"
+            )
+
+    def _measure_single(self, encoded, rounds):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            verify_password(PASSWORD, encoded)
+        return (time.perf_counter() - start) / rounds
+
+    def _measure_pool(self, encoded, rounds, workers):
+        pool = HashingPool(workers, rounds * workers)
+        total = rounds * workers
+        start = time.perf_counter()
+        futures = [pool.submit(verify_password, PASSWORD, encoded) for _ in range(total)]
+        wait(futures)
+        elapsed = time.perf_counter() - start
+        pool.executor.shutdown()
+        return total / elapsed
+
+    def _rehash_on_login(self, hasher, preferred):
+        """Hash dengan parameter lain harus ditandai must_update oleh verify_password"""
+        if hasher.algorithm != preferred.algorithm:
+            return 'yes (upgrades to default hasher)'
+
+        iterations = getattr(hasher, 'iterations', None)
+        if not iterations:
+            return 'n/a'
+
+        old = hasher.encode(PASSWORD, hasher.salt(), iterations=max(iterations // 2, 1))
+        is_correct, must_update = verify_password(PASSWORD, old)
+        return 'yes' if is_correct and must_update else 'NO'
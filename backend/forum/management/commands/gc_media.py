@@ -0,0 +1,65 @@
+"""
+Hapus file media yang tidak direferensikan lagi (post dihapus, profile
+picture diganti, upload gagal) setelah grace period.
+
+Usage:
+    python manage.py gc_media                   # satu kali (cron, mis. tiap jam)
+    python manage.py gc_media --dry-run
+    python manage.py gc_media --recount         # perbaiki ref_count blob yang bocor dulu
+    python manage.py gc_media --loop --interval 3600
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from forum.media_gc import collect_orphans, recount_blobs
+
+
+class Command(BaseCommand):
+    help = 'Delete media files that are no longer referenced by any post or user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report orphaned files')
+        parser.add_argument('--grace-hours', type=float, default=settings.MEDIA_GC_GRACE_HOURS,
+                            help='Keep unreferenced files younger than this')
+        parser.add_argument('--batch-size', type=int, default=settings.MEDIA_GC_BATCH_SIZE)
+        parser.add_argument('--recount', action='store_true',
+                            help='Recompute blob reference counts before collecting')
+        parser.add_argument('--loop', action='store_true', help='Keep running every --interval seconds')
+        parser.add_argument('--interval', type=float, default=3600.0)
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.run(options)
+            return
+
+        self.stdout.write('Media GC worker started')
+        try:
+            while True:
+                self.run(options)
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Media GC worker stopped')
+
+    def run(self, options):
+        dry_run = options['dry_run']
+
+        if options['recount']:
+            checked, fixed = recount_blobs(dry_run=dry_run)
+            verb = 'Would fix' if dry_run else 'Fixed'
+            self.stdout.write(f"Checked {checked} blobs, {verb.lower()} {fixed} reference counts")
+
+        scanned, deleted, freed = collect_orphans(
+            default_storage,
+            grace=timedelta(hours=options['grace_hours']),
+            batch_size=options['batch_size'],
+            dry_run=dry_run,
+        )
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(
+            f"Scanned {scanned} files. {verb} {deleted} orphans ({freed / (1024 * 1024):.1f}MB)"
+        )
@@ -0,0 +1,62 @@
+"""
+Pindahkan media lama (posts/, profiles/) ke content-addressed blobs.
+
+File identik digabung jadi satu blob, file lama dihapus, dan image
+diantrikan ulang supaya varian dibuat dari blob.
+
+Usage:
+    python manage.py migrate_media_to_blobs
+    python manage.py migrate_media_to_blobs --dry-run
+"""
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from forum.images import IMAGE_FIELDS, delete_variants
+from forum.models import IMAGE_PENDING
+from forum.storage import is_blob
+
+
+class Command(BaseCommand):
+    help = 'Move existing post images and profile pictures into deduplicated blob storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be moved')
+
+    def handle(self, *args, **options):
+        moved = missing = 0
+
+        for model, field in IMAGE_FIELDS:
+            rows = (
+                model.objects.exclude(**{f'{field}__isnull': True})
+                .exclude(**{field: ''})
+                .exclude(**{f'{field}__startswith': 'blobs/'})
+                .only('pk', field, f'{field}_variants')
+            )
+
+            for instance in rows.iterator(chunk_size=500):
+                old_name = getattr(instance, field).name
+                if is_blob(old_name):
+                    continue
+                if not default_storage.exists(old_name):
+                    self.stdout.write(f"Missing file for {model.__name__} {instance.pk}: {old_name}")
+                    missing += 1
+                    continue
+                if options['dry_run']:
+                    moved += 1
+                    continue
+
+                with default_storage.open(old_name, 'rb') as fh:
+                    new_name = default_storage.save(old_name, fh)
+
+                delete_variants(getattr(instance, f'{field}_variants') or {}, default_storage)
+                model.objects.filter(pk=instance.pk).update(**{
+                    field: new_name,
+                    f'{field}_status': IMAGE_PENDING,
+                    f'{field}_variants': {},
+                })
+                default_storage.delete(old_name)
+                moved += 1
+
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(f"{verb} {moved} files into blobs, {missing} missing")
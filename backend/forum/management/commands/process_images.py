@@ -0,0 +1,52 @@
+"""
+Worker untuk image pipeline (varian WebP, strip EXIF, dimensi).
+
+Usage:
+    python manage.py process_images             # loop terus (worker)
+    python manage.py process_images --once      # satu batch lalu keluar (cron)
+    python manage.py process_images --requeue-failed
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from forum.images import IMAGE_FIELDS, process_all_pending
+from forum.models import IMAGE_FAILED, IMAGE_PENDING
+
+
+class Command(BaseCommand):
+    help = 'Create resized WebP variants for uploaded post images and profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process one batch and exit')
+        parser.add_argument('--batch-size', type=int, default=settings.IMAGE_PROCESS_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when nothing is pending')
+        parser.add_argument('--requeue-failed', action='store_true', help='Mark failed images as pending again')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['requeue_failed']:
+            for model, field in IMAGE_FIELDS:
+                count = model.objects.filter(**{f'{field}_status': IMAGE_FAILED}).update(
+                    **{f'{field}_status': IMAGE_PENDING}
+                )
+                self.stdout.write(f"Requeued {count} {model.__name__} images")
+
+        if options['once']:
+            processed, failed = process_all_pending(batch_size)
+            self.stdout.write(f"Processed: {processed}, failed: {failed}")
+            return
+
+        self.stdout.write('Image worker started')
+        try:
+            while True:
+                processed, failed = process_all_pending(batch_size)
+                if processed or failed:
+                    self.stdout.write(f"Processed: {processed}, failed: {failed}")
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Image worker stopped')
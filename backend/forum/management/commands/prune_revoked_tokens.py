@@ -0,0 +1,18 @@
+"""
+Hapus jti revoked yang token-nya sudah expired.
+
+Usage (cron, mis. tiap jam):
+    python manage.py prune_revoked_tokens
+"""
+
+from django.core.management.base import BaseCommand
+
+from forum.revocation import prune_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked refresh-token jtis whose tokens have expired'
+
+    def handle(self, *args, **options):
+        deleted = prune_expired()
+        self.stdout.write(f"Pruned {deleted} expired revoked tokens")
@@ -0,0 +1,39 @@
+"""
+Hapus baris EmailOutbox lama (terkirim / gagal permanen).
+
+Isi email terkirim sudah dikosongkan saat dikirim; baris gagal masih
+menyimpan isi (kode OTP / reset) untuk retry manual dari admin, jadi
+tetap harus dibersihkan.
+
+Usage (cron, mis. harian):
+    python manage.py purge_email_outbox
+    python manage.py purge_email_outbox --days 7
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from forum.models import EmailOutbox
+
+
+class Command(BaseCommand):
+    help = 'Delete sent and permanently failed outbox emails older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.EMAIL_OUTBOX_RETENTION_DAYS,
+            help='Keep sent/failed outbox rows for this many days',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = EmailOutbox.objects.filter(
+            Q(status='sent', sent_at__lt=cutoff) | Q(status='failed', created_at__lt=cutoff)
+        ).delete()
+        self.stdout.write(f"Purged {deleted} outbox emails older than {options['days']} days")
@@ -0,0 +1,36 @@
+"""
+Sweeper untuk kode OTP expired dan audit trail lama.
+
+Usage (cron, mis. tiap 15 menit):
+    python manage.py purge_expired_otps
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from forum.models import EmailVerification, PasswordReset
+from forum.otp import purge_expired_codes
+
+
+class Command(BaseCommand):
+    help = 'Delete expired one-time codes and old OTP audit rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--audit-days',
+            type=int,
+            default=settings.OTP_AUDIT_RETENTION_DAYS,
+            help='Keep EmailVerification/PasswordReset audit rows for this many days',
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_codes()
+        self.stdout.write(f"Purged {deleted} expired one-time codes")
+
+        cutoff = timezone.now() - timedelta(days=options['audit_days'])
+        for model in (EmailVerification, PasswordReset):
+            deleted, _ = model.objects.filter(created_at__lt=cutoff).delete()
+            self.stdout.write(f"Purged {deleted} {model._meta.verbose_name_plural} older than {options['audit_days']} days")
@@ -0,0 +1,19 @@
+"""
+Hapus resumable upload session yang kadaluarsa (file sementara di
+UPLOAD_SESSION_DIR + blob yang tidak jadi dipakai post).
+
+Usage:
+    python manage.py purge_upload_sessions      # cron, mis. tiap jam
+"""
+
+from django.core.management.base import BaseCommand
+
+from forum.resumable import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete expired resumable upload sessions and their temporary files'
+
+    def handle(self, *args, **options):
+        purged = purge_expired_sessions()
+        self.stdout.write(f"Purged {purged} expired upload sessions")
@@ -0,0 +1,49 @@
+"""
+Worker untuk mengirim email broadcast dari admin.
+
+Usage:
+    python manage.py send_broadcasts               # loop terus (worker)
+    python manage.py send_broadcasts --once        # kirim broadcast yang antri lalu keluar
+    python manage.py send_broadcasts --rate 5      # override kecepatan (email/detik)
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from forum.email_utils import claim_broadcast, deliver_broadcast
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued admin broadcasts in rate-limited batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Deliver queued broadcasts and exit')
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_BROADCAST_BATCH_SIZE)
+        parser.add_argument('--rate', type=float, default=settings.EMAIL_BROADCAST_RATE, help='Emails per second')
+        parser.add_argument('--interval', type=float, default=10.0, help='Seconds to sleep when nothing is queued')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Broadcast worker started')
+        try:
+            while True:
+                broadcast = claim_broadcast()
+                if broadcast is None:
+                    if options['once']:
+                        return
+                    time.sleep(options['interval'])
+                    continue
+
+                self.stdout.write(f"Sending broadcast #{broadcast.pk}: {broadcast.subject}")
+                status = deliver_broadcast(
+                    broadcast,
+                    batch_size=options['batch_size'],
+                    rate=options['rate'],
+                )
+                self.stdout.write(
+                    f"Broadcast #{broadcast.pk} {status}: "
+                    f"{broadcast.sent_count} sent, {broadcast.failed_count} failed"
+                )
+        except KeyboardInterrupt:
+            self.stdout.write('Broadcast worker stopped')
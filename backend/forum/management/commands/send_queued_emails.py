@@ -0,0 +1,49 @@
+"""
+Worker untuk mengirim email dari outbox.
+
+Usage:
+    python manage.py send_queued_emails           # loop terus (worker)
+    python manage.py send_queued_emails --once    # satu batch lalu keluar (cron)
+"""
+
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from forum.email_utils import deliver_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox over a reused SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Deliver one batch and exit')
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['once']:
+            sent, failed = deliver_outbox(batch_size=batch_size)
+            self.stdout.write(f"Sent: {sent}, failed: {failed}")
+            return
+
+        # Satu koneksi SMTP dipakai ulang selama ada antrian,
+        # ditutup saat outbox kosong supaya server tidak memutus koneksi idle.
+        connection = get_connection(fail_silently=False)
+        self.stdout.write('Outbox worker started')
+        try:
+            while True:
+                sent, failed = deliver_outbox(connection=connection, batch_size=batch_size)
+                if sent or failed:
+                    self.stdout.write(f"Sent: {sent}, failed: {failed}")
+                    continue
+                connection.close()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Outbox worker stopped')
+        finally:
+            connection.close()
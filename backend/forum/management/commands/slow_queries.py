@@ -0,0 +1,62 @@
+"""
+Top SQL fingerprint dari slow-query log, digabung dari semua proses
+(QUERY_LOG_DIR/<pid>.json).
+
+Usage:
+    python manage.py slow_queries                   # top 20 by total time
+    python manage.py slow_queries --sort p95 --top 10
+    python manage.py slow_queries --samples         # + slow sample (route, stack)
+    python manage.py slow_queries --json            # report mentah
+    python manage.py slow_queries --reset
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from forum import querylog
+
+
+class Command(BaseCommand):
+    help = 'Show the most expensive SQL statements by fingerprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sort', choices=querylog.SORT_KEYS, default='total')
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--samples', action='store_true', help='Also print slow statement samples')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+        parser.add_argument('--reset', action='store_true', help='Delete collected stats of all processes')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            querylog.reset_all()
+            self.stdout.write("Slow-query stats reset")
+            return
+
+        report = querylog.build_report(sort=options['sort'], limit=options['top'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{report['processes']} processes, {report['dropped']} queries over the fingerprint limit"
+        )
+        self.stdout.write(
+            f"{'count':>8} {'total ms':>11} {'avg ms':>9} {'p95 ms':>9} {'max ms':>9}  fingerprint / sql"
+        )
+        for query in report['queries']:
+            self.stdout.write(
+                f"{query['count']:>8} {query['total_ms']:>11.1f} {query['avg_ms']:>9.2f} "
+                f"{query['p95_ms']:>9.2f} {query['max_ms']:>9.2f}  {query['fingerprint']}"
+            )
+            self.stdout.write(f"    {query['sql'][:300]}")
+
+        if options['samples']:
+            self.stdout.write("\nSlow samples:")
+            for sample in report['slow']:
+                self.stdout.write(
+                    f"  {sample['duration_ms']:.1f}ms {sample['route']} at {sample['at']} [{sample['fingerprint']}]"
+                )
+                self.stdout.write(f"    {sample['sql'][:300]}")
+                for frame in sample['stack']:
+                    self.stdout.write(f"      {frame}")
@@ -0,0 +1,223 @@
+# backend/forum/media_gc.py
+"""
+Garbage collector untuk file media yang tidak direferensikan lagi
+
+Dijalankan lewat `python manage.py gc_media` (cron / worker), bukan di
+request path. Memori tetap kecil berapa pun jumlah file:
+- Folder media di-walk per direktori (generator), nama file diproses
+  per batch
+- Tiap batch dicek ke DB dengan satu query __in per sumber referensi
+  (MediaBlob untuk blob, field di IMAGE_FIELDS untuk file lama)
+- Yang tidak direferensikan dan lebih tua dari grace period dihapus
+  (grace: timedelta, default MEDIA_GC_GRACE_HOURS)
+
+Grace period melindungi upload yang filenya sudah tertulis tapi row-nya
+belum commit.
+
+recount_blobs() memperbaiki ref_count MediaBlob yang bocor (post yang
+dihapus sebelum signal release ada), dipartisi per karakter pertama
+digest supaya counter di memori cuma 1/16 dari semua blob.
+"""
+
+import logging
+import posixpath
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .images import IMAGE_FIELDS, VARIANTS_DIR
+from .models import MediaBlob, UploadSession
+from .storage import BLOB_PREFIX, blob_digest, is_blob
+
+
+logger = logging.getLogger(__name__)
+
+DIGEST_PARTITIONS = '0123456789abcdef'
+
+
+def walk_storage(storage, path=''):
+    """Yield semua nama file di storage, satu direktori di memori sekaligus"""
+    directories, files = storage.listdir(path)
+    for name in sorted(files):
+        yield posixpath.join(path, name) if path else name
+    for directory in sorted(directories):
+        yield from walk_storage(storage, posixpath.join(path, directory) if path else directory)
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def legacy_source(name):
+    """variants/posts/foto.jpg/480.webp -> posts/foto.jpg (varian lama sebelum blob)"""
+    if name.startswith(f'{VARIANTS_DIR}/'):
+        return posixpath.dirname(name[len(VARIANTS_DIR) + 1:])
+    return name
+
+
+def referenced_names(names):
+    """Subset dari names yang masih dipakai"""
+    blobs = [name for name in names if is_blob(name)]
+    live = set(
+        MediaBlob.objects.filter(name__in=blobs, ref_count__gt=0).values_list('name', flat=True)
+    )
+    
+    sources = {name: legacy_source(name) for name in names if not is_blob(name)}
+    if sources:
+        wanted = set(sources.values())
+        for model, field in IMAGE_FIELDS:
+            live.update(
+                model.objects.filter(**{f'{field}__in': wanted}).values_list(field, flat=True)
+            )
+    
+    return {name for name in names if name in live or sources.get(name) in live}
+
+
+def _is_old(storage, name, cutoff):
+    try:
+        return storage.get_modified_time(name) < cutoff
+    except (OSError, NotImplementedError):
+        return False
+
+
+def _delete_orphan(storage, name, cutoff):
+    """
+    Cek ulang tepat sebelum hapus (upload ulang bisa terjadi selama walk)
+    
+    Blob: row MediaBlob di-lock (dibuat sementara kalau belum ada) sampai
+    file terhapus, jadi save() dengan isi yang sama menunggu lalu menulis
+    ulang filenya. delete() storage cuma menurunkan ref_count, file fisik
+    dihapus lewat delete_file().
+    """
+    if not _is_old(storage, name, cutoff):
+        return False
+    delete_file = getattr(storage, 'delete_file', storage.delete)
+    
+    if not is_blob(name):
+        if referenced_names([name]):
+            return False
+        delete_file(name)
+        return True
+    
+    with transaction.atomic():
+        blob, _ = MediaBlob.objects.select_for_update().get_or_create(
+            digest=blob_digest(name), defaults={'name': name},
+        )
+        if blob.name == name and blob.ref_count > 0:
+            return False
+        delete_file(name)
+        if blob.name == name:
+            # Termasuk row ref_count=0 yang tertinggal
+            blob.delete()
+    return True
+
+
+def collect_orphans(storage, grace, batch_size=1000, dry_run=False):
+    """
+    Hapus file yang tidak direferensikan dan lebih tua dari grace (timedelta)
+    
+    Returns:
+        tuple: (scanned, deleted, bytes_freed)
+    """
+    cutoff = timezone.now() - grace
+    scanned = deleted = freed = 0
+    
+    for batch in batched(walk_storage(storage), batch_size):
+        scanned += len(batch)
+        live = referenced_names(batch)
+        
+        for name in batch:
+            if name in live or not _is_old(storage, name, cutoff):
+                continue
+            
+            size = storage.size(name)
+            if dry_run:
+                logger.info(f"Orphaned media (dry run): {name}")
+            else:
+                try:
+                    if not _delete_orphan(storage, name, cutoff):
+                        continue
+                except Exception as e:
+                    logger.warning(f"Failed to delete orphaned media {name}: {str(e)}")
+                    continue
+                logger.info(f"Deleted orphaned media: {name}")
+            deleted += 1
+            freed += size
+    
+    return scanned, deleted, freed
+
+
+def _count_references(prefix):
+    """Jumlah referensi nyata per nama blob untuk satu partisi digest"""
+    counts = Counter()
+    blob_prefix = f'{BLOB_PREFIX}{prefix}'
+    for model, field in IMAGE_FIELDS:
+        rows = (
+            model.objects.exclude(**{f'{field}__isnull': True})
+            .exclude(**{field: ''})
+            .values_list(field, f'{field}_variants')
+        )
+        for name, variants in rows.iterator(chunk_size=2000):
+            for ref in [name, *(variants or {}).values()]:
+                if ref.startswith(blob_prefix):
+                    counts[ref] += 1
+    
+    # Upload session yang sudah finalize tapi belum dipakai post
+    sessions = UploadSession.objects.filter(file_name__startswith=blob_prefix).values_list('file_name', flat=True)
+    for name in sessions.iterator(chunk_size=2000):
+        counts[name] += 1
+    return counts
+
+
+def recount_blobs(dry_run=False):
+    """
+    Samakan MediaBlob.ref_count dengan referensi yang benar-benar ada.
+    Blob yang ref_count-nya berubah selama penghitungan dilewati
+    (dicoba lagi di run berikutnya).
+    
+    Returns:
+        tuple: (checked, fixed)
+    """
+    checked = fixed = 0
+    
+    for prefix in DIGEST_PARTITIONS:
+        snapshot = dict(
+            MediaBlob.objects.filter(digest__startswith=prefix).values_list('digest', 'ref_count')
+        )
+        if not snapshot:
+            continue
+        counts = _count_references(prefix)
+        
+        blobs = MediaBlob.objects.filter(digest__startswith=prefix).only('digest', 'name', 'ref_count')
+        for blob in blobs.iterator():
+            checked += 1
+            actual = counts.get(blob.name, 0)
+            if blob.ref_count == actual or snapshot.get(blob.digest) != blob.ref_count:
+                continue
+            
+            if dry_run:
+                logger.info(f"Blob {blob.name}: ref_count {blob.ref_count} -> {actual} (dry run)")
+                fixed += 1
+                continue
+            
+            with transaction.atomic():
+                current = MediaBlob.objects.select_for_update().filter(pk=blob.digest).first()
+                if current is None or current.ref_count != snapshot[blob.digest]:
+                    continue
+                if actual == 0:
+                    # File dibersihkan collect_orphans setelah grace period
+                    current.delete()
+                else:
+                    MediaBlob.objects.filter(pk=blob.digest).update(ref_count=actual)
+            logger.info(f"Blob {blob.name}: ref_count {blob.ref_count} -> {actual}")
+            fixed += 1
+    
+    return checked, fixed
@@ -0,0 +1,64 @@
+# backend/forum/media_urls.py
+"""
+URL media (post image, profile picture, varian, attachment)
+
+Satu tempat untuk semua serializer:
+- MEDIA_CDN_URL diisi  -> https://cdn.example.com/media/<name>, tanpa request
+- Tanpa CDN            -> base absolut dari request (scheme + host + MEDIA_URL)
+                          dihitung sekali per request, lalu cuma concat string
+- Tanpa request        -> MEDIA_PUBLIC_URL kalau ada, kalau tidak path relatif
+- Storage remote (S3)  -> storage.url() (public bucket / presigned)
+
+Nama blob (blobs/..../<sha256>.ext) sudah immutable; file lama
+(posts/, profiles/) diberi ?v=MEDIA_URL_VERSION supaya cache CDN/browser
+bisa di-bust dengan ganti versi.
+"""
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
+
+from .storage import is_blob
+
+
+REQUEST_CACHE_ATTR = '_forka_media_base'
+
+
+def media_base(request=None):
+    """Prefix URL media (selalu diakhiri '/')"""
+    if settings.MEDIA_CDN_URL:
+        return settings.MEDIA_CDN_URL.rstrip('/') + '/'
+    
+    if request is not None:
+        base = getattr(request, REQUEST_CACHE_ATTR, None)
+        if base is None:
+            base = request.build_absolute_uri(settings.MEDIA_URL)
+            setattr(request, REQUEST_CACHE_ATTR, base)
+        return base
+    
+    if settings.MEDIA_PUBLIC_URL:
+        return settings.MEDIA_PUBLIC_URL.rstrip('/') + '/'
+    return settings.MEDIA_URL
+
+
+def media_url(name, request=None, storage=None):
+    """URL absolut (atau relatif kalau tanpa request/CDN) untuk nama file di storage"""
+    if not name:
+        return None
+    
+    storage = storage or default_storage
+    if not isinstance(storage, FileSystemStorage):
+        # S3 dll: URL bucket / presigned dari storage sendiri
+        return storage.url(name)
+    
+    url = media_base(request) + filepath_to_uri(name)
+    if settings.MEDIA_URL_VERSION and not is_blob(name):
+        url += f'?v={settings.MEDIA_URL_VERSION}'
+    return url
+
+
+def file_url(file, request=None):
+    """media_url untuk FieldFile (None kalau kosong)"""
+    if not file:
+        return None
+    return media_url(file.name, request, file.storage)
@@ -0,0 +1,229 @@
+# backend/forum/metrics.py
+"""
+Metrics format Prometheus untuk hot path aplikasi
+
+    forka_http_request_duration_seconds{route, method, status}   histogram
+    forka_http_request_db_queries{route}                         histogram
+    forka_cache_requests_total{cache, result}                    counter (hit/miss)
+    forka_email_send_duration_seconds{kind, result}              histogram
+    forka_upload_size_bytes{source}                              histogram
+    forka_throttle_rejections_total{scope}                       counter
+
+route = 'PostViewSet.list', 'PostViewSet.like', 'login_user', ...
+
+prometheus_client opsional (pip install prometheus_client). Tanpa package
+itu, atau METRICS_ENABLED=False, semua metric jadi no-op.
+
+Multiprocess (gunicorn / uvicorn --workers N): set env
+PROMETHEUS_MULTIPROC_DIR sebelum worker start. Tiap worker menulis nilai
+ke file mmap di folder itu dan /metrics menjumlahkan semuanya
+(lihat backend/gunicorn.conf.py). Tanpa env tsb metric per proses.
+
+/metrics cuma bisa diakses dari METRICS_ALLOWED_NETWORKS (REMOTE_ADDR),
+bukan lewat reverse proxy, plus bearer token kalau METRICS_TOKEN di-set.
+"""
+
+import hmac
+import ipaddress
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+UPLOAD_SIZE_BUCKETS = tuple(kb * 1024 for kb in (16, 64, 256, 1024, 2048, 5120, 10240, 51200))
+
+# [jumlah query] request yang sedang berjalan (None di luar request)
+_current_queries = ContextVar('forka_metrics_queries', default=None)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+    
+    def inc(self, amount=1):
+        pass
+    
+    def observe(self, amount):
+        pass
+
+
+def enabled():
+    return prometheus_client is not None and settings.METRICS_ENABLED
+
+
+def _metric(metric_class, name, documentation, labelnames, **kwargs):
+    if not enabled():
+        return _NoopMetric()
+    return getattr(prometheus_client, metric_class)(name, documentation, labelnames, **kwargs)
+
+
+# ============================================
+# METRICS
+# ============================================
+
+request_duration = _metric(
+    'Histogram', 'forka_http_request_duration_seconds', 'Request latency per route',
+    ('route', 'method', 'status'), buckets=LATENCY_BUCKETS,
+)
+request_db_queries = _metric(
+    'Histogram', 'forka_http_request_db_queries', 'DB queries per request',
+    ('route',), buckets=QUERY_COUNT_BUCKETS,
+)
+cache_requests = _metric(
+    'Counter', 'forka_cache_requests', 'Cache lookups by result (hit / miss)',
+    ('cache', 'result'),
+)
+email_send_duration = _metric(
+    'Histogram', 'forka_email_send_duration_seconds', 'SMTP send latency per message',
+    ('kind', 'result'), buckets=LATENCY_BUCKETS,
+)
+upload_size = _metric(
+    'Histogram', 'forka_upload_size_bytes', 'Accepted upload sizes',
+    ('source',), buckets=UPLOAD_SIZE_BUCKETS,
+)
+throttle_rejections = _metric(
+    'Counter', 'forka_throttle_rejections', 'Requests rejected by rate limiting',
+    ('scope',),
+)
+
+
+# ============================================
+# HELPERS
+# ============================================
+
+def route_name(request):
+    """
+    Label route dari URL resolver (bukan path, supaya cardinality kecil):
+    ViewSet -> 'PostViewSet.like', function view -> 'login_user'
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    
+    func = match.func
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if view_class is None:
+        return getattr(func, '__name__', match.view_name)
+    
+    actions = getattr(func, 'actions', None)
+    action = actions.get(request.method.lower()) if actions else None
+    return f'{view_class.__name__}.{action}' if action else view_class.__name__
+
+
+def is_internal_address(address):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        ip in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+# Header yang dipasang nginx / load balancer: request ini datang lewat proxy,
+# REMOTE_ADDR-nya alamat proxy (sering loopback), bukan alamat scraper
+PROXY_HEADERS = ('HTTP_X_FORWARDED_FOR', 'HTTP_X_REAL_IP', 'HTTP_FORWARDED')
+
+
+def scrape_allowed(request):
+    """Boleh scrape /metrics: langsung (tanpa proxy), dari jaringan internal, token cocok"""
+    if any(header in request.META for header in PROXY_HEADERS):
+        return False
+    if not is_internal_address(request.META.get('REMOTE_ADDR', '')):
+        return False
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        return hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), expected.encode())
+    return True
+
+
+def render_latest():
+    """(body, content_type) untuk /metrics, digabung antar proses kalau multiprocess"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+def count_query(execute, sql, params, many, context):
+    queries = _current_queries.get()
+    if queries is not None:
+        queries[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install(sender, connection, **kwargs):
+    """connection_created: pasang wrapper sekali per koneksi"""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+def connect():
+    """Dipanggil dari ForumConfig.ready()"""
+    if enabled():
+        connection_created.connect(install, dispatch_uid='forka_metrics')
+
+
+class MetricsMiddleware:
+    """
+    Latency + jumlah query per route untuk setiap request (sync & async).
+    Counter dibawa ContextVar: di ASGI query jalan di thread sync_to_async
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        queries = [0]
+        token = _current_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        return self._observe(request, response, time.perf_counter() - start, queries[0])
+    
+    async def __acall__(self, request):
+        queries = [0]
+        token = _current_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        return self._observe(request, response, time.perf_counter() - start, queries[0])
+    
+    def _observe(self, request, response, duration, queries):
+        route = route_name(request)
+        request_duration.labels(route, request.method, response.status_code).observe(duration)
+        request_db_queries.labels(route).observe(queries)
+        return response
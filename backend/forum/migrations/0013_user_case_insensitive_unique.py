@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:54
+
+import django.db.models.functions.text
+import forum.models
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+
+
+def report_case_collisions(apps, schema_editor):
+    """
+    Stop sebelum bikin unique index kalau ada username/email yang cuma
+    beda huruf besar/kecil. Selesaikan dulu manual (rename / merge akun),
+    lalu jalankan migrate lagi.
+    """
+    User = apps.get_model('forum', 'User')
+    report = []
+
+    for field, exclude in (('username', Q()), ('email', Q(email=''))):
+        duplicates = (
+            User.objects.exclude(exclude)
+            .annotate(key=Lower(field))
+            .values('key')
+            .annotate(total=Count('id'))
+            .filter(total__gt=1)
+            .order_by('key')
+        )
+        for row in duplicates:
+            users = (
+                User.objects.exclude(exclude)
+                .annotate(key=Lower(field))
+                .filter(key=row['key'])
+                .order_by('id')
+                .values_list('id', field)
+            )
+            listed = ', '.join(f'#{user_id} {value!r}' for user_id, value in users)
+            report.append(f'  {field} {row["key"]!r}: {listed}')
+
+    if report:
+        raise RuntimeError(
+            'Case-insensitive duplicates found, resolve them before migrating:\n'
+            + '\n'.join(report)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('forum', '0012_onetimecode'),
+    ]
+
+    operations = [
+        migrations.RunPython(report_case_collisions, migrations.RunPython.noop),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', forum.models.UserManager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='forum_user_username_ci_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email', ''), _negated=True), name='forum_user_email_ci_uniq'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:56
+
+from django.db import migrations, models
+
+
+def queue_existing_images(apps, schema_editor):
+    """Image yang sudah ada ikut diproses worker process_images"""
+    Post = apps.get_model('forum', 'Post')
+    User = apps.get_model('forum', 'User')
+    Post.objects.exclude(image__isnull=True).exclude(image='').update(image_status='pending')
+    User.objects.exclude(profile_picture__isnull=True).exclude(profile_picture='').update(
+        profile_picture_status='pending'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0013_user_case_insensitive_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(queue_existing_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0017_requestprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='source_digest',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:20
+
+from django.db import migrations, models
+
+
+def queue_existing_attachments(apps, schema_editor):
+    """Attachment yang sudah ada ikut di-strip EXIF oleh worker process_images"""
+    PostAttachment = apps.get_model('forum', 'PostAttachment')
+    PostAttachment.objects.exclude(file='').update(file_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0018_mediablob_source_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postattachment',
+            name='file_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postattachment',
+            name='file_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='postattachment',
+            name='file_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='postattachment',
+            name='file_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('uploading', 'Uploading'), ('finalizing', 'Finalizing'), ('complete', 'Complete')], default='uploading', max_length=20),
+        ),
+        migrations.RunPython(queue_existing_attachments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:05
+
+from django.db import migrations
+
+
+def clear_sent_bodies(apps, schema_editor):
+    """Email yang sudah terkirim tidak perlu menyimpan kode OTP / reset plaintext"""
+    EmailOutbox = apps.get_model('forum', 'EmailOutbox')
+    EmailOutbox.objects.filter(status='sent').update(body='', html_body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0019_attachment_image_pipeline'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_sent_bodies, migrations.RunPython.noop),
+    ]
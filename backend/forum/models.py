@@ -1,11 +1,36 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db import models, transaction
+from django.db.models.functions import Lower
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.conf import settings
 import random
 import string
+import uuid
 from django.utils import timezone
 from datetime import timedelta
 
+from . import lockout
+
+
+# Status image pipeline (lihat forum/images.py)
+IMAGE_PENDING = 'pending'
+IMAGE_READY = 'ready'
+IMAGE_FAILED = 'failed'
+IMAGE_STATUS_CHOICES = [
+    ('', 'No image'),
+    (IMAGE_PENDING, 'Pending'),
+    (IMAGE_READY, 'Ready'),
+    (IMAGE_FAILED, 'Failed'),
+]
+
+
+def normalize_username(username):
+    """Bentuk username untuk lookup case-insensitive ("Budi" == "budi")"""
+    return (username or '').strip().lower()
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
 
 class EmailVerification(models.Model):
     """
@@ -66,7 +91,55 @@ class PasswordReset(models.Model):
         return f"Reset code for {self.user.username} - {self.code}"
 
 
+class UserQuerySet(models.QuerySet):
+    
+    def with_email(self, email):
+        """
+        Lookup email case-insensitive. email='' dikecualikan: predikat ini
+        sama dengan kondisi partial index forum_user_email_ci_uniq (tanpa
+        itu planner tidak memakai index), dan banyak user tanpa email
+        tidak pernah cocok / MultipleObjectsReturned
+        """
+        return self.filter(email__lower=normalize_email(email)).exclude(email='')
+    
+    def update(self, **kwargs):
+        """
+        update(role=/is_active=/password=) lewat queryset (admin action,
+        shell, ...) bump token_version seperti User.save(), lalu versi di
+        cache dihapus setelah commit
+        """
+        if not {*User.TOKEN_STATE_FIELDS, 'password'} & kwargs.keys():
+            return super().update(**kwargs)
+        
+        from .authentication import forget_token_versions
+        user_ids = list(self.values_list('pk', flat=True))
+        kwargs.setdefault('token_version', models.F('token_version') + 1)
+        updated = super().update(**kwargs)
+        transaction.on_commit(lambda: forget_token_versions(user_ids), using=self.db)
+        return updated
+
+
 # ✨ UPDATE User Model
+class UserManager(DjangoUserManager.from_queryset(UserQuerySet)):
+    """
+    Lookup user case-insensitive lewat functional unique index
+    Lower(username) / Lower(email)
+    """
+    
+    def get_by_natural_key(self, username):
+        # Dipakai ModelBackend (admin login, /api/token/)
+        return self.get(username__lower=normalize_username(username))
+    
+    def get_by_username(self, username):
+        return self.get(username__lower=normalize_username(username))
+    
+    def get_by_email(self, email):
+        return self.with_email(email).get()
+    
+    async def aget_by_username(self, username):
+        return await self.aget(username__lower=normalize_username(username))
+
+
 class User(AbstractUser):
     ROLE_CHOICES = [
         ('user', 'User'),
@@ -77,39 +150,100 @@ class User(AbstractUser):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='user')
     bio = models.TextField(blank=True)
     profile_picture = models.ImageField(upload_to='profiles/', null=True, blank=True)
+    # Diisi worker process_images: varian WebP {lebar: path} + dimensi original
+    profile_picture_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default='', blank=True, db_index=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True)
+    profile_picture_width = models.PositiveIntegerField(null=True, blank=True)
+    profile_picture_height = models.PositiveIntegerField(null=True, blank=True)
     phone_number = models.CharField(max_length=15, blank=True)
     
     email_verified = models.BooleanField(default=False)
     failed_login_attempts = models.IntegerField(default=0)
     account_locked_until = models.DateTimeField(null=True, blank=True)
     
+    # Naik saat password/role/status aktif berubah -> JWT lama ditolak
+    token_version = models.PositiveIntegerField(default=0)
+    
+    TOKEN_STATE_FIELDS = ('role', 'is_active')
+    
+    objects = UserManager()
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Simpan nilai awal (cuma field yang ter-load, tanpa trigger query)
+        self._token_state = {
+            field: self.__dict__[field]
+            for field in self.TOKEN_STATE_FIELDS
+            if field in self.__dict__
+        }
+    
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
     
+    def _token_state_changed(self):
+        if self._state.adding:
+            return False
+        # set_password() mengisi _password; rehash saat login tidak
+        if self._password is not None:
+            return True
+        return any(
+            field in self.__dict__ and self.__dict__[field] != old_value
+            for field, old_value in self._token_state.items()
+        )
+    
+    def save(self, *args, **kwargs):
+        bump = self._token_state_changed()
+        if bump:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        
+        super().save(*args, **kwargs)
+        
+        self._token_state = {
+            field: self.__dict__[field]
+            for field in self.TOKEN_STATE_FIELDS
+            if field in self.__dict__
+        }
+        if bump:
+            from .authentication import token_state_changed
+            token_state_changed(self.pk, self.token_version, self.__dict__.get('is_active', True))
+    
+    # Lockout state ada di cache (lihat forum/lockout.py), row user
+    # cuma ditulis saat akun terkunci atau lock lama di-reset
+    def get_locked_until(self):
+        return lockout.get_locked_until(self)
+    
     def is_account_locked(self):
-        if self.account_locked_until:
-            if timezone.now() < self.account_locked_until:
-                return True
-            else:
-                self.account_locked_until = None
-                self.failed_login_attempts = 0
-                self.save()
-        return False
+        return self.get_locked_until() is not None
     
     def increment_failed_login(self):
-        self.failed_login_attempts += 1
-        if self.failed_login_attempts >= 5:
-            self.account_locked_until = timezone.now() + timedelta(minutes=15)
-        self.save()
+        """Returns (attempts, locked_until)"""
+        return lockout.register_failed_login(self)
     
     def reset_failed_login(self):
-        self.failed_login_attempts = 0
-        self.account_locked_until = None
-        self.save()
+        lockout.clear_failed_logins(self)
     
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        constraints = [
+            # Case-insensitive unique + index untuk semua lookup auth
+            models.UniqueConstraint(Lower('username'), name='forum_user_username_ci_uniq'),
+            models.UniqueConstraint(
+                Lower('email'),
+                condition=~models.Q(email=''),
+                name='forum_user_email_ci_uniq',
+            ),
+        ]
+
+
+# Lookup `username__lower=...` / `email__lower=...` -> WHERE LOWER(field) = ...,
+# cocok dengan functional index di atas. Didaftarkan per field, bukan ke
+# models.CharField, supaya tidak berlaku untuk model lain / app pihak ketiga
+for _field_name in ('username', 'email'):
+    User._meta.get_field(_field_name).register_lookup(Lower)
 
 
 class Category(models.Model):
@@ -138,6 +272,11 @@ class Post(models.Model):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='posts')
     
     image = models.ImageField(upload_to='posts/', null=True, blank=True)
+    # Diisi worker process_images: varian WebP {lebar: path} + dimensi original
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default='', blank=True, db_index=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
     
     likes = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='liked_posts', blank=True)
     views_count = models.IntegerField(default=0)
@@ -174,10 +313,6 @@ class Comment(models.Model):
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
     
-    @property
-    def likes_count(self):
-        return self.likes.count()
-    
     @property
     def is_reply(self):
         return self.parent is not None
@@ -207,4 +342,269 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f"Notification for {self.recipient.username}: {self.message}"
\ No newline at end of file
+        return f"Notification for {self.recipient.username}: {self.message}"
+
+class EmailOutbox(models.Model):
+    """
+    Outbox untuk email transaksional (verifikasi, reset password).
+    Ditulis di transaksi yang sama dengan request, lalu dikirim oleh worker
+    (`manage.py send_queued_emails`) supaya endpoint auth tidak menunggu SMTP.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Email Outbox'
+        verbose_name_plural = 'Email Outbox'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='forum_outbox_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+
+class EmailBroadcast(models.Model):
+    """
+    Pengumuman email dari admin ke semua user terverifikasi.
+    Dikirim bertahap oleh worker (`manage.py send_broadcasts`);
+    `last_user_id` adalah cursor supaya pengiriman bisa dilanjutkan.
+    """
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('paused', 'Paused'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    html_message = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='email_broadcasts'
+    )
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_user_id = models.BigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Email Broadcast'
+        verbose_name_plural = 'Email Broadcasts'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+    
+    @property
+    def progress(self):
+        if not self.total_recipients:
+            return 0
+        done = self.sent_count + self.failed_count
+        return min(round(done * 100 / self.total_recipients, 1), 100)
+
+
+class ThrottleCounter(models.Model):
+    """
+    Counter rate limit (sliding window) untuk THROTTLE_STORE = 'database'.
+    Satu row per key per window, lihat forum/throttling.py
+    """
+    key = models.CharField(max_length=255, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        verbose_name = 'Throttle Counter'
+        verbose_name_plural = 'Throttle Counters'
+    
+    def __str__(self):
+        return f"{self.key}: {self.count}"
+
+
+class RevokedToken(models.Model):
+    """
+    jti refresh token yang sudah di-revoke (rotation/logout).
+    Row dihapus setelah token expired, lihat forum/revocation.py
+    """
+    jti = models.CharField(max_length=64, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        verbose_name = 'Revoked Token'
+        verbose_name_plural = 'Revoked Tokens'
+    
+    def __str__(self):
+        return self.jti
+
+
+class OneTimeCode(models.Model):
+    """
+    Kode OTP aktif (verifikasi email / reset password) untuk OTP_STORE = 'database'.
+    Satu row per (user, purpose), kode disimpan sebagai hash.
+    Lihat forum/otp.py
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='one_time_codes')
+    purpose = models.CharField(max_length=20)
+    code_hash = models.CharField(max_length=64)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        verbose_name = 'One Time Code'
+        verbose_name_plural = 'One Time Codes'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'purpose'], name='forum_otp_user_purpose_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.purpose} code for user {self.user_id}"
+
+
+class MediaBlob(models.Model):
+    """
+    Satu file media unik (berdasarkan SHA-256), dipakai bersama oleh
+    Post.image / User.profile_picture / varian. Lihat forum/storage.py
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    # Blob hasil image pipeline: digest upload asli (sebelum strip EXIF).
+    # Upload identik berikutnya langsung memakai blob ini
+    source_digest = models.CharField(max_length=64, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Media Blob'
+        verbose_name_plural = 'Media Blobs'
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class PostAttachment(models.Model):
+    """
+    Image tambahan di post (lebih dari satu per post), di-upload lewat
+    resumable upload session. File disimpan sebagai blob (forum/storage.py)
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='attachments')
+    file = models.FileField(upload_to='attachments/', max_length=255)
+    # Diisi worker process_images (strip EXIF + varian WebP), sama dengan Post.image
+    file_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default='', blank=True, db_index=True)
+    file_variants = models.JSONField(default=dict, blank=True)
+    file_width = models.PositiveIntegerField(null=True, blank=True)
+    file_height = models.PositiveIntegerField(null=True, blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    content_type = models.CharField(max_length=50)
+    position = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Post Attachment'
+        verbose_name_plural = 'Post Attachments'
+        ordering = ['position', 'id']
+    
+    def __str__(self):
+        return f"{self.filename} on post {self.post_id}"
+
+
+class UploadSession(models.Model):
+    """
+    Resumable upload: client kirim byte range (PATCH) ke file sementara
+    di UPLOAD_SESSION_DIR, lalu finalize -> blob di media storage.
+    Lihat forum/resumable.py
+    """
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('finalizing', 'Finalizing'),
+        ('complete', 'Complete'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    # Range [start, end) yang sudah diterima, digabung: [[0, 1048576], ...]
+    received = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    content_type = models.CharField(max_length=50, blank=True)
+    # Nama blob setelah finalize (referensi dipegang session sampai dipakai post)
+    file_name = models.CharField(max_length=255, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+    
+    @property
+    def received_bytes(self):
+        return sum(end - start for start, end in self.received)
+
+
+class RequestProfile(models.Model):
+    """
+    Profil CPU (sampling) + alokasi memori (tracemalloc) satu request,
+    diminta admin lewat header X-Forka-Profile. Lihat forum/profiler.py
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='request_profiles')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    route = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    duration_ms = models.FloatField(default=0)
+    # Folded stacks ("a;b;c 42" per baris), langsung bisa dibuka flamegraph.pl / speedscope
+    cpu_folded = models.TextField(blank=True)
+    cpu_samples = models.PositiveIntegerField(default=0)
+    sample_interval_ms = models.FloatField(default=0)
+    # Byte yang masih teralokasi di akhir request per traceback (folded, bobot = byte)
+    memory_folded = models.TextField(blank=True)
+    memory_peak = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Request Profile'
+        verbose_name_plural = 'Request Profiles'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f}ms)"
@@ -0,0 +1,214 @@
+# backend/forum/otp.py
+"""
+OTP Store untuk kode verifikasi email & reset password
+
+- Satu kode aktif per (user, purpose): issue kode baru otomatis
+  menggantikan yang lama (tidak perlu UPDATE is_used massal)
+- TTL native: kode expired otomatis hilang (cache) / di-sweep (database)
+- Attempt counting: setelah OTP_MAX_ATTEMPTS percobaan salah kode dibuang.
+  Counter dinaikkan atomic (UPDATE kondisional / incr) sebelum dicek,
+  jadi tebakan paralel tetap dibatasi
+- Lookup O(1) by key / unique index (user, purpose)
+- Kode disimpan sebagai HMAC, bukan plaintext
+
+Store (settings.OTP_STORE):
+- 'database': tabel OneTimeCode (default, shared antar worker)
+- 'cache': Django cache alias OTP_CACHE_ALIAS (pakai Redis di production,
+  alias wajib shared, lihat forum/checks.py)
+
+EmailVerification / PasswordReset tetap bisa diisi sebagai audit trail
+dengan OTP_AUDIT_TRAIL = True.
+"""
+
+import hashlib
+import hmac
+import random
+import secrets
+import string
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OneTimeCode, EmailVerification, PasswordReset
+
+
+PURPOSE_VERIFY_EMAIL = 'verify_email'
+PURPOSE_PASSWORD_RESET = 'password_reset'
+
+# Hasil verifikasi
+VALID = 'valid'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+LOCKED = 'locked'
+
+AUDIT_MODELS = {
+    PURPOSE_VERIFY_EMAIL: EmailVerification,
+    PURPOSE_PASSWORD_RESET: PasswordReset,
+}
+
+
+def code_ttl(purpose):
+    """Umur kode dalam detik"""
+    if purpose == PURPOSE_PASSWORD_RESET:
+        return settings.PASSWORD_RESET_CODE_EXPIRY * 60
+    return settings.EMAIL_VERIFICATION_CODE_EXPIRY * 60
+
+
+def generate_code():
+    return ''.join(secrets.choice(string.digits) for _ in range(6))
+
+
+def hash_code(purpose, user_id, code):
+    message = f'{purpose}:{user_id}:{code}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+# ============================================
+# STORES
+# ============================================
+
+class CacheOTPStore:
+    """OTP di Django cache, TTL dari cache itu sendiri"""
+    
+    def __init__(self, alias):
+        self.cache = caches[alias]
+    
+    def _keys(self, purpose, user_id):
+        return f'otp:{purpose}:{user_id}', f'otp:{purpose}:{user_id}:attempts'
+    
+    def save(self, purpose, user_id, code_hash, ttl):
+        code_key, attempts_key = self._keys(purpose, user_id)
+        self.cache.set(code_key, code_hash, timeout=ttl)
+        self.cache.set(attempts_key, 0, timeout=ttl)
+    
+    def check(self, purpose, user_id, code_hash, consume):
+        code_key, attempts_key = self._keys(purpose, user_id)
+        stored_hash = self.cache.get(code_key)
+        if stored_hash is None:
+            return EXPIRED
+        
+        try:
+            attempts = self.cache.incr(attempts_key)
+        except ValueError:
+            return EXPIRED
+        if attempts > settings.OTP_MAX_ATTEMPTS:
+            self.delete(purpose, user_id)
+            return LOCKED
+        
+        if not hmac.compare_digest(stored_hash, code_hash):
+            return INVALID
+        
+        if consume:
+            # Submit paralel dengan kode benar: cuma satu yang berhasil menghapus
+            if not self.cache.delete(code_key):
+                return EXPIRED
+            self.cache.delete(attempts_key)
+        return VALID
+    
+    def delete(self, purpose, user_id):
+        self.cache.delete_many(self._keys(purpose, user_id))
+
+
+class DatabaseOTPStore:
+    """OTP di tabel OneTimeCode (unique index user+purpose)"""
+    
+    def save(self, purpose, user_id, code_hash, ttl):
+        OneTimeCode.objects.update_or_create(
+            user_id=user_id,
+            purpose=purpose,
+            defaults={
+                'code_hash': code_hash,
+                'attempts': 0,
+                'expires_at': timezone.now() + timedelta(seconds=ttl),
+            },
+        )
+        if random.random() < settings.OTP_SWEEP_PROBABILITY:
+            purge_expired_codes()
+    
+    def check(self, purpose, user_id, code_hash, consume):
+        codes = OneTimeCode.objects.filter(user_id=user_id, purpose=purpose)
+        
+        # Increment kondisional (satu UPDATE atomic): tebakan paralel tidak
+        # bisa lolos bersama-sama melewati OTP_MAX_ATTEMPTS
+        counted = codes.filter(
+            expires_at__gt=timezone.now(),
+            attempts__lt=settings.OTP_MAX_ATTEMPTS,
+        ).update(attempts=F('attempts') + 1)
+        
+        otp = codes.first()
+        if otp is None:
+            return EXPIRED
+        if not counted:
+            otp.delete()
+            return EXPIRED if otp.expires_at <= timezone.now() else LOCKED
+        
+        if not hmac.compare_digest(otp.code_hash, code_hash):
+            return INVALID
+        
+        if consume:
+            # Submit paralel dengan kode benar: cuma satu DELETE yang kena row
+            deleted, _ = codes.filter(code_hash=otp.code_hash).delete()
+            if not deleted:
+                return EXPIRED
+        return VALID
+    
+    def delete(self, purpose, user_id):
+        OneTimeCode.objects.filter(user_id=user_id, purpose=purpose).delete()
+
+
+def get_otp_store():
+    if settings.OTP_STORE == 'cache':
+        return CacheOTPStore(settings.OTP_CACHE_ALIAS)
+    return DatabaseOTPStore()
+
+
+def purge_expired_codes():
+    """Sweeper: hapus kode expired (store database)"""
+    deleted, _ = OneTimeCode.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+# ============================================
+# PUBLIC API (dipakai di views_auth)
+# ============================================
+
+def issue_code(purpose, user):
+    """
+    Buat kode baru (menggantikan kode lama untuk purpose yang sama)
+    
+    Returns:
+        str: kode 6 digit untuk dikirim via email
+    """
+    code = generate_code()
+    ttl = code_ttl(purpose)
+    get_otp_store().save(purpose, user.pk, hash_code(purpose, user.pk, code), ttl)
+    
+    if settings.OTP_AUDIT_TRAIL:
+        AUDIT_MODELS[purpose].objects.create(
+            user=user,
+            code=code,
+            expires_at=timezone.now() + timedelta(seconds=ttl),
+        )
+    
+    return code
+
+
+def verify_code(purpose, user, code, consume=True):
+    """
+    Cek kode OTP
+    
+    Args:
+        consume: True -> kode langsung tidak berlaku setelah valid
+    
+    Returns:
+        str: VALID, INVALID, EXPIRED, atau LOCKED
+    """
+    result = get_otp_store().check(purpose, user.pk, hash_code(purpose, user.pk, code), consume)
+    
+    if result == VALID and consume and settings.OTP_AUDIT_TRAIL:
+        AUDIT_MODELS[purpose].objects.filter(user=user, code=code, is_used=False).update(is_used=True)
+    
+    return result
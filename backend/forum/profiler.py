@@ -0,0 +1,288 @@
+# backend/forum/profiler.py
+"""
+Profiler on-demand per request, khusus admin
+
+Tambahkan ke request API mana pun:
+
+    X-Forka-Profile: 1          (atau ?_profile=1) = cpu
+    X-Forka-Profile: cpu        hanya CPU
+    X-Forka-Profile: memory     hanya memori
+    X-Forka-Profile: all        CPU + memori
+
+- CPU: thread sampler membaca stack thread request tiap
+  PROFILER_SAMPLE_INTERVAL detik (sys._current_frames), hasilnya folded
+  stacks -> flamegraph.pl / speedscope / inferno
+- Memori: tracemalloc selama request; byte yang masih teralokasi di akhir
+  request per traceback (folded, bobot = byte) + peak
+
+Aman dibiarkan aktif di production:
+- Token JWT diverifikasi di sini (sebelum view), role harus admin;
+  request lain dengan header yang sama diproses normal tanpa profil
+- Dibatasi PROFILER_MAX_PER_HOUR profil per admin (SlidingWindowLimiter)
+- Cuma PROFILER_MAX_STORED profil terbaru yang disimpan
+
+Response membawa X-Forka-Profile-Id; unduh hasilnya di
+/api/admin/profiles/{id}/cpu/ dan /api/admin/profiles/{id}/memory/.
+
+Catatan: tracemalloc berlaku untuk seluruh proses dan memperlambat
+eksekusi (beberapa kali lipat) semua request lain yang sedang jalan di
+worker yang sama selama profil memori berlangsung. Karena itu default-nya
+cpu saja; memori harus diminta eksplisit ('memory' / 'all').
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .authentication import StatelessJWTAuthentication
+from .metrics import route_name
+from .models import RequestProfile
+from .throttling import SlidingWindowLimiter
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_FORKA_PROFILE'
+PROFILE_QUERY_PARAM = '_profile'
+PROFILE_MODES = {'1': ('cpu',), 'cpu': ('cpu',), 'memory': ('memory',), 'all': ('cpu', 'memory')}
+
+# Satu proses cuma boleh satu tracemalloc session
+_tracemalloc_lock = threading.Lock()
+
+
+def requested_modes(request):
+    value = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_QUERY_PARAM)
+    if not value:
+        return ()
+    return PROFILE_MODES.get(value.strip().lower(), PROFILE_MODES['1'])
+
+
+@lru_cache(maxsize=4096)
+def short_path(filename):
+    """Path dipendekkan supaya flamegraph terbaca: forum/views.py, rest_framework/views.py"""
+    if 'site-packages' in filename:
+        return filename.split('site-packages', 1)[1].lstrip(os.sep)
+    if filename.startswith(str(settings.BASE_DIR)):
+        return os.path.relpath(filename, settings.BASE_DIR)
+    return os.path.basename(filename)
+
+
+@lru_cache(maxsize=4096)
+def frame_label(code):
+    """'func (forum/views.py:42)'"""
+    return f'{code.co_name} ({short_path(code.co_filename)}:{code.co_firstlineno})'
+
+
+def fold(counter):
+    """Counter {(frame, ...): weight} -> teks folded, berat terbesar di atas"""
+    return '\n'.join(
+        f"{';'.join(stack)} {weight}"
+        for stack, weight in counter.most_common()
+    )
+
+
+class StackSampler:
+    """Sampling profiler untuk satu thread (pure Python, tanpa signal)"""
+    
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='forka-profiler', daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                # Root di kiri (format folded)
+                self.samples[tuple(reversed(stack))] += 1
+
+
+def memory_folded(snapshot):
+    """Snapshot tracemalloc -> folded stacks dengan bobot byte"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    counter = Counter()
+    for stat in snapshot.statistics('traceback'):
+        stack = tuple(
+            f'{short_path(frame.filename)}:{frame.lineno}'
+            for frame in stat.traceback
+        )
+        counter[stack] += stat.size
+    return fold(counter)
+
+
+# ============================================
+# AUTHORIZATION
+# ============================================
+
+def profiling_user(request):
+    """Admin dari token JWT request, None kalau bukan admin / token invalid"""
+    try:
+        result = StatelessJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    if result is None:
+        return None
+    user = result[0]
+    return user if getattr(user, 'role', None) == 'admin' else None
+
+
+def allow_profile(user):
+    allowed, _ = SlidingWindowLimiter().hit(f'profile:{user.pk}', settings.PROFILER_MAX_PER_HOUR, 3600)
+    return allowed
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+class RequestRecording:
+    """CPU sampler + tracemalloc selama satu request (context manager)"""
+    
+    def __init__(self, thread_id, modes):
+        self.sampler = None
+        if 'cpu' in modes:
+            self.sampler = StackSampler(thread_id, settings.PROFILER_SAMPLE_INTERVAL)
+        self.tracing = 'memory' in modes and _tracemalloc_lock.acquire(blocking=False)
+        if self.tracing and tracemalloc.is_tracing():
+            # Sudah dipakai (mis. -X tracemalloc), jangan diganggu
+            _tracemalloc_lock.release()
+            self.tracing = False
+        self.snapshot = None
+        self.peak = 0
+        self.duration = 0.0
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        if self.tracing:
+            tracemalloc.start(settings.PROFILER_TRACEMALLOC_FRAMES)
+        if self.sampler:
+            self.sampler.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.duration = time.perf_counter() - self.started
+        if self.sampler:
+            self.sampler.stop()
+        if self.tracing:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            _tracemalloc_lock.release()
+
+
+class ProfilerMiddleware:
+    """
+    Aktif cuma untuk request admin yang minta profil (header / query).
+    Sync & async: di chain async yang di-sample thread sync_to_async
+    request ini (tempat view sync & query jalan), bukan event loop
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not requested_modes(request):
+            return self.get_response(request)
+        
+        user, modes, limited = self._authorize(request)
+        if user is None:
+            return self._unprofiled(self.get_response(request), limited)
+        
+        with RequestRecording(threading.get_ident(), modes) as recording:
+            response = self.get_response(request)
+        return self._store(request, user, response, recording)
+    
+    async def __acall__(self, request):
+        if not requested_modes(request):
+            return await self.get_response(request)
+        
+        user, modes, limited = await sync_to_async(self._authorize)(request)
+        if user is None:
+            return self._unprofiled(await self.get_response(request), limited)
+        
+        # Thread-sensitive: thread yang sama menjalankan view sync request ini
+        thread_id = await sync_to_async(threading.get_ident)()
+        with RequestRecording(thread_id, modes) as recording:
+            response = await self.get_response(request)
+        return await sync_to_async(self._store)(request, user, response, recording)
+    
+    def _authorize(self, request):
+        """
+        Returns:
+            tuple: (admin atau None, modes, rate_limited)
+        """
+        user = profiling_user(request)
+        if user is None:
+            return None, (), False
+        if not allow_profile(user):
+            return None, (), True
+        return user, requested_modes(request), False
+    
+    def _unprofiled(self, response, limited):
+        if limited:
+            response['X-Forka-Profile-Error'] = 'rate limited'
+        return response
+    
+    def _store(self, request, user, response, recording):
+        sampler = recording.sampler
+        try:
+            profile = RequestProfile.objects.create(
+                user_id=user.pk,
+                method=request.method,
+                path=request.get_full_path()[:500],
+                route=route_name(request)[:200],
+                status_code=response.status_code,
+                duration_ms=recording.duration * 1000,
+                cpu_folded=fold(sampler.samples) if sampler else '',
+                cpu_samples=sum(sampler.samples.values()) if sampler else 0,
+                sample_interval_ms=settings.PROFILER_SAMPLE_INTERVAL * 1000 if sampler else 0,
+                memory_folded=memory_folded(recording.snapshot) if recording.snapshot else '',
+                memory_peak=recording.peak,
+            )
+            self._prune()
+        except Exception as e:
+            logger.warning(f"Failed to store request profile for {request.path}: {str(e)}")
+            return response
+        
+        response['X-Forka-Profile-Id'] = str(profile.pk)
+        return response
+    
+    def _prune(self):
+        stale = RequestProfile.objects.values_list('pk', flat=True)[settings.PROFILER_MAX_STORED:]
+        RequestProfile.objects.filter(pk__in=list(stale)).delete()
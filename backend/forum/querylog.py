@@ -0,0 +1,425 @@
+# backend/forum/querylog.py
+"""
+Slow-query log: statistik per fingerprint SQL
+
+Setiap koneksi DB dipasangi execute_wrapper (signal connection_created).
+Per query:
+- SQL dinormalisasi jadi fingerprint (literal -> ?, IN (...) dipadatkan),
+  jadi `WHERE id IN (1, 2, 3)` dan `WHERE id IN (4, 5)` satu baris statistik
+- Diakumulasi di memori proses: count, total, max, dan reservoir durasi
+  terakhir untuk p95
+- Query >= QUERY_LOG_SLOW_MS disimpan sebagai sample lengkap dengan route
+  asal (PostViewSet.list, ...) dan stack frame kode forum, plus log warning
+
+Tiap proses web menulis snapshot ke QUERY_LOG_DIR/<pid>.json dari thread
+background tiap QUERY_LOG_FLUSH_SECONDS (dan saat exit), bukan dari request.
+Thread itu baru dijalankan QueryLogMiddleware di request pertama, jadi
+migrate / worker / test tidak meninggalkan file. Default mati di
+`manage.py test`.
+Report menggabungkan semua file; file milik proses yang sudah mati dihapus.
+Reset menulis generasi baru ke QUERY_LOG_DIR/reset, proses lain membuang
+statistiknya sendiri saat flush berikutnya melihat generasi itu:
+
+    GET /api/admin/slow-queries/?sort=total&limit=20   (admin)
+    python manage.py slow_queries --sort p95 --top 20
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from . import metrics, timing
+from .metrics import route_name
+
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = ('total', 'p95', 'max', 'count')
+
+_current_request = ContextVar('forka_querylog_request', default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)', re.IGNORECASE)
+_VALUES_RE = re.compile(r'\bVALUES\s*\(.*\)', re.IGNORECASE | re.DOTALL)
+_SPACE_RE = re.compile(r'\s+')
+# Nama savepoint Django unik per transaksi: "s140269563796352_x3"
+_SAVEPOINT_RE = re.compile(r'"s\d+_x\d+"')
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """SQL tanpa literal: angka/string/nama savepoint -> ?, daftar IN & VALUES dipadatkan"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _SAVEPOINT_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _VALUES_RE.sub('VALUES (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Returns:
+        tuple: (fingerprint hex 16 char, SQL ternormalisasi)
+    """
+    normalized = normalize_sql(sql)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16], normalized
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+# Frame middleware instrumentasi tidak informatif di stack sample
+_INSTRUMENTATION_FILES = {__file__, metrics.__file__, timing.__file__}
+
+
+def _origin_stack():
+    """Frame dari kode project (bukan Django / site-packages), terdalam di akhir"""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        f'{os.path.relpath(frame.filename, base_dir)}:{frame.lineno} in {frame.name}'
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and frame.filename not in _INSTRUMENTATION_FILES
+    ]
+    return frames[-settings.QUERY_LOG_STACK_DEPTH:]
+
+
+RESET_MARKER = 'reset'
+
+
+def _read_generation():
+    """Generasi reset terakhir ('' kalau belum pernah reset)"""
+    try:
+        with open(os.path.join(settings.QUERY_LOG_DIR, RESET_MARKER)) as fh:
+            return fh.read().strip()
+    except OSError:
+        return ''
+
+
+def _write_atomic(path, data):
+    os.makedirs(settings.QUERY_LOG_DIR, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as fh:
+        fh.write(data)
+    os.replace(tmp_path, path)
+
+
+def _process_alive(pid):
+    if os.name != 'posix':
+        # os.kill(pid, 0) di Windows justru menghentikan proses
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _current_route():
+    request = _current_request.get()
+    if request is None:
+        return 'command'
+    return route_name(request)
+
+
+# ============================================
+# IN-PROCESS AGGREGATION
+# ============================================
+
+class QueryStats:
+    """Statistik query satu proses (thread-safe)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self.reset()
+    
+    def reset(self, generation=None):
+        with self._lock:
+            self.entries = {}
+            self.slow = deque(maxlen=settings.QUERY_LOG_SLOW_SAMPLES)
+            self.dropped = 0
+            self.started_at = timezone.now().isoformat()
+            self.generation = _read_generation() if generation is None else generation
+    
+    def sync_generation(self):
+        """Buang statistik kalau proses lain sudah reset_all() sejak reset terakhir"""
+        generation = _read_generation()
+        if generation != self.generation:
+            self.reset(generation)
+    
+    def record(self, sql, duration):
+        key, normalized = fingerprint(sql)
+        slow = duration * 1000 >= settings.QUERY_LOG_SLOW_MS
+        
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                if len(self.entries) >= settings.QUERY_LOG_MAX_FINGERPRINTS:
+                    self.dropped += 1
+                    return
+                entry = self.entries[key] = {
+                    'sql': normalized[:2000],
+                    'count': 0,
+                    'total': 0.0,
+                    'max': 0.0,
+                    'recent': deque(maxlen=settings.QUERY_LOG_RESERVOIR_SIZE),
+                }
+            entry['count'] += 1
+            entry['total'] += duration
+            entry['max'] = max(entry['max'], duration)
+            entry['recent'].append(duration)
+        
+        if slow:
+            route = _current_route()
+            self.slow.append({
+                'fingerprint': key,
+                'sql': sql[:2000],
+                'duration_ms': round(duration * 1000, 2),
+                'route': route,
+                'stack': _origin_stack(),
+                'at': timezone.now().isoformat(),
+            })
+            logger.warning(f"Slow query {duration * 1000:.1f}ms [{key}] in {route}: {normalized[:300]}")
+    
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'generation': self.generation,
+                'started_at': self.started_at,
+                'dropped': self.dropped,
+                'entries': {
+                    key: {**entry, 'recent': list(entry['recent'])}
+                    for key, entry in self.entries.items()
+                },
+                'slow': list(self.slow),
+            }
+    
+    def flush(self):
+        """Tulis snapshot ke QUERY_LOG_DIR/<pid>.json (atomic rename)"""
+        self.sync_generation()
+        path = os.path.join(settings.QUERY_LOG_DIR, f'{os.getpid()}.json')
+        try:
+            _write_atomic(path, json.dumps(self.snapshot()))
+        except OSError as e:
+            logger.warning(f"Failed to write query log {path}: {str(e)}")
+    
+    def start_flusher(self):
+        """Thread flush periodik + flush saat exit, satu per proses"""
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+        threading.Thread(target=self._flush_loop, name='forka-querylog', daemon=True).start()
+        atexit.register(self.flush)
+    
+    def _flush_loop(self):
+        while True:
+            time.sleep(settings.QUERY_LOG_FLUSH_SECONDS)
+            self.flush()
+    
+    def after_fork(self):
+        """
+        Worker hasil fork (gunicorn --preload): jangan warisi lock / statistik
+        master. Flusher-nya dijalankan lagi di request pertama worker
+        """
+        self._lock = threading.Lock()
+        self.reset()
+
+
+stats = QueryStats()
+
+
+def query_logger(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - start)
+
+
+def install(sender, connection, **kwargs):
+    """connection_created: pasang wrapper sekali per koneksi"""
+    if query_logger not in connection.execute_wrappers:
+        # Paling depan: koneksi bisa dibuka di dalam `with connection.execute_wrapper()`
+        # middleware lain, yang pop() wrapper terakhir saat keluar
+        connection.execute_wrappers.insert(0, query_logger)
+
+
+def connect():
+    """Dipanggil dari ForumConfig.ready()"""
+    if not settings.QUERY_LOG_ENABLED:
+        return
+    connection_created.connect(install, dispatch_uid='forka_querylog')
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=stats.after_fork)
+
+
+class QueryLogMiddleware:
+    """
+    Simpan request aktif supaya slow query tahu route asalnya, dan jalankan
+    flusher proses ini di request pertama. Sync & async: request dibawa
+    ContextVar, ikut ke thread sync_to_async tempat query jalan
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not settings.QUERY_LOG_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats.start_flusher()
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+    
+    async def __acall__(self, request):
+        stats.start_flusher()
+        token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+
+# ============================================
+# REPORT (gabungan semua proses)
+# ============================================
+
+def _snapshots():
+    """Snapshot generasi sekarang dari file semua proses + proses ini (paling baru)"""
+    stats.sync_generation()
+    snapshots = {}
+    try:
+        names = os.listdir(settings.QUERY_LOG_DIR)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        pid = name.removesuffix('.json')
+        if not name.endswith('.json') or not pid.isdigit():
+            continue
+        path = os.path.join(settings.QUERY_LOG_DIR, name)
+        if not _process_alive(int(pid)):
+            # Worker mati (restart / max_requests): file-nya tidak akan diperbarui lagi
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        try:
+            with open(path) as fh:
+                snapshot = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        # Ditulis sebelum reset_all() terakhir
+        if snapshot.get('generation', '') != stats.generation:
+            continue
+        snapshots[snapshot.get('pid')] = snapshot
+    snapshots[os.getpid()] = stats.snapshot()
+    return snapshots.values()
+
+
+def build_report(sort='total', limit=20):
+    """
+    Top fingerprint gabungan semua proses
+    
+    Returns:
+        dict: {'processes', 'dropped', 'queries': [...], 'slow': [...]}
+    """
+    merged = {}
+    slow = []
+    processes = dropped = 0
+    
+    for snapshot in _snapshots():
+        processes += 1
+        dropped += snapshot.get('dropped', 0)
+        slow.extend(snapshot.get('slow', []))
+        for key, entry in snapshot.get('entries', {}).items():
+            target = merged.setdefault(key, {
+                'fingerprint': key, 'sql': entry['sql'], 'count': 0, 'total': 0.0, 'max': 0.0, 'recent': [],
+            })
+            target['count'] += entry['count']
+            target['total'] += entry['total']
+            target['max'] = max(target['max'], entry['max'])
+            target['recent'].extend(entry['recent'])
+    
+    queries = []
+    for entry in merged.values():
+        queries.append({
+            'fingerprint': entry['fingerprint'],
+            'sql': entry['sql'],
+            'count': entry['count'],
+            'total_ms': round(entry['total'] * 1000, 2),
+            'avg_ms': round(entry['total'] * 1000 / entry['count'], 3),
+            'p95_ms': round(percentile(entry['recent'], 0.95) * 1000, 3),
+            'max_ms': round(entry['max'] * 1000, 3),
+        })
+    
+    sort_field = 'count' if sort == 'count' else f'{sort}_ms'
+    queries.sort(key=lambda item: item[sort_field], reverse=True)
+    slow.sort(key=lambda item: item['duration_ms'], reverse=True)
+    
+    return {
+        'processes': processes,
+        'dropped': dropped,
+        'queries': queries[:limit],
+        'slow': slow[:limit],
+    }
+
+
+def reset_all():
+    """
+    Tulis generasi reset baru, kosongkan statistik proses ini dan hapus file
+    semua proses. Proses lain ikut reset saat flush berikutnya.
+    """
+    generation = str(time.time_ns())
+    _write_atomic(os.path.join(settings.QUERY_LOG_DIR, RESET_MARKER), generation)
+    stats.reset(generation)
+    try:
+        names = os.listdir(settings.QUERY_LOG_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.endswith('.json'):
+            try:
+                os.remove(os.path.join(settings.QUERY_LOG_DIR, name))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,288 @@
+# backend/forum/resumable.py
+"""
+Resumable upload untuk post image & attachment
+
+Protocol:
+    POST   /api/uploads/sessions/                 {"filename", "size", "sha256"?}
+    PATCH  /api/uploads/sessions/{id}/            Content-Range: bytes 0-1048575/5242880
+                                                  body = byte mentah range tsb
+    GET    /api/uploads/sessions/{id}/            range yang sudah diterima (resume)
+    POST   /api/uploads/sessions/{id}/finalize/   gabung -> blob di media storage
+    DELETE /api/uploads/sessions/{id}/            batal
+
+- File sementara di UPLOAD_SESSION_DIR dialokasikan sebesar `size`,
+  tiap PATCH ditulis di offset-nya (os.pwrite), jadi range boleh dikirim
+  paralel dan tidak berurutan
+- Body PATCH dibaca per 64KB dari stream request, tidak pernah utuh di RAM
+- Range yang diterima dicatat (digabung) di UploadSession.received;
+  koneksi putus -> client GET session lalu kirim range yang belum ada
+- Range pertama (offset 0) dicek magic bytes-nya, bukan image -> ditolak.
+  Range lain bisa menimpa header, jadi finalize mengecek ulang head file
+  gabungan (dan kecocokannya dengan ekstensi nama file)
+
+Setelah finalize session memegang satu referensi blob sampai dipakai
+post (image_upload / attachment_uploads). Session kadaluarsa dibersihkan
+`manage.py purge_upload_sessions`.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import UploadSession
+from . import metrics
+from .uploads import (
+    ALLOWED_IMAGE_FORMATS, CONTENT_TYPES, DIRECT_UPLOAD_SNIFF_BYTES, UploadRejected, inspect_image_head,
+)
+
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+def part_path(session):
+    return os.path.join(settings.UPLOAD_SESSION_DIR, f'{session.pk}.part')
+
+
+def merge_ranges(ranges, start, end):
+    """Tambah [start, end) ke daftar range lalu gabungkan yang bersinggungan"""
+    merged = []
+    for current in sorted([*ranges, [start, end]]):
+        if merged and current[0] <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], current[1])
+        else:
+            merged.append(list(current))
+    return merged
+
+
+def parse_content_range(header, size):
+    """
+    'bytes 0-1023/4096' -> (0, 1024) (end eksklusif)
+    """
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise UploadRejected('Content-Range header is required (bytes start-end/total)')
+    
+    start, last, total = (int(value) for value in match.groups())
+    if total != size or start > last or last >= size:
+        raise UploadRejected('Content-Range does not match the upload size')
+    if last - start + 1 > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadRejected(
+            f'Chunk too large (max {settings.UPLOAD_CHUNK_MAX_SIZE // (1024 * 1024)}MB)'
+        )
+    return start, last + 1
+
+
+def create_session(user, filename, size, sha256=''):
+    session = UploadSession.objects.create(
+        user=user,
+        filename=filename,
+        size=size,
+        sha256=sha256,
+        expires_at=timezone.now() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+    )
+    
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    fd = os.open(part_path(session), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        # Sparse file, byte baru benar-benar dipakai saat ditulis
+        os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+    return session
+
+
+def write_chunk(session, start, end, stream):
+    """
+    Tulis body request ke [start, end) file sementara
+    
+    Returns:
+        UploadSession: session dengan received terbaru
+    """
+    content_type = None
+    offset = start
+    
+    fd = os.open(part_path(session), os.O_WRONLY)
+    try:
+        if start == 0:
+            head = stream.read(min(end, DIRECT_UPLOAD_SNIFF_BYTES))
+            fmt, _ = inspect_image_head(head)
+            content_type = CONTENT_TYPES[fmt]
+            os.pwrite(fd, head, offset)
+            offset += len(head)
+        
+        while offset < end:
+            data = stream.read(min(READ_SIZE, end - offset))
+            if not data:
+                break
+            os.pwrite(fd, data, offset)
+            offset += len(data)
+    finally:
+        os.close(fd)
+    
+    if offset < end:
+        # Koneksi putus di tengah chunk: range ini tidak dicatat, kirim ulang
+        raise UploadRejected(f'Incomplete chunk: received {offset - start} of {end - start} bytes')
+    
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status != 'uploading':
+            raise UploadRejected('Upload already finalized')
+        session.received = merge_ranges(session.received, start, end)
+        update_fields = ['received']
+        if content_type:
+            session.content_type = content_type
+            update_fields.append('content_type')
+        session.save(update_fields=update_fields)
+    return session
+
+
+def is_complete(session):
+    return session.received == [[0, session.size]]
+
+
+def finalize(session):
+    """
+    Gabung file sementara jadi blob di media storage (idempotent)
+    
+    Row session cuma di-lock sebentar untuk pindah status ke 'finalizing';
+    hashing & simpan ke storage (bisa detik-an untuk file besar) berjalan
+    tanpa lock, jadi GET / finalize ulang tidak ikut menunggu.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == 'complete':
+            return session
+        if session.status == 'finalizing':
+            raise UploadRejected('Upload is already being finalized')
+        if not is_complete(session):
+            raise UploadRejected(
+                f'Upload incomplete: {session.received_bytes} of {session.size} bytes received'
+            )
+        session.status = 'finalizing'
+        session.save(update_fields=['status'])
+    
+    try:
+        digest, file_name, content_type = _store_part(session)
+    except Exception:
+        UploadSession.objects.filter(pk=session.pk, status='finalizing').update(status='uploading')
+        raise
+    
+    updated = UploadSession.objects.filter(pk=session.pk, status='finalizing').update(
+        file_name=file_name, sha256=digest, content_type=content_type, status='complete'
+    )
+    if not updated:
+        # Session dibatalkan / kadaluarsa selama finalize: blob tidak dipakai
+        _release_name(file_name)
+        raise UploadRejected('Upload session was cancelled')
+    
+    session.file_name, session.sha256, session.status = file_name, digest, 'complete'
+    session.content_type = content_type
+    metrics.upload_size.labels('resumable').observe(session.size)
+    _remove_part(session)
+    return session
+
+
+def _store_part(session):
+    """
+    Cek ulang head file gabungan, hash, cocokkan dengan sha256 dari client,
+    lalu simpan
+    
+    Returns:
+        tuple: (digest, nama blob, content type)
+    """
+    try:
+        # Nama dari client: tanpa direktori / '..'
+        filename = get_valid_filename(os.path.basename(session.filename))
+    except SuspiciousFileOperation:
+        raise UploadRejected('Invalid filename')
+    
+    path = part_path(session)
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        fmt, _ = inspect_image_head(fh.read(DIRECT_UPLOAD_SNIFF_BYTES))
+        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        if ext not in ALLOWED_IMAGE_FORMATS[fmt]:
+            raise UploadRejected(f'File extension .{ext} does not match image content ({fmt.lower()})')
+        
+        fh.seek(0)
+        for chunk in iter(lambda: fh.read(READ_SIZE), b''):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+    
+    if session.sha256 and session.sha256 != digest:
+        raise UploadRejected('Uploaded content does not match sha256')
+    
+    with open(path, 'rb') as fh:
+        content = File(fh, name=filename)
+        # Digest sudah dihitung, storage tidak perlu membaca ulang
+        content.sha256 = digest
+        return digest, default_storage.save(f'attachments/{filename}', content), CONTENT_TYPES[fmt]
+
+
+def take(session):
+    """
+    Pindahkan referensi blob dari session ke pemakainya (Post.image /
+    PostAttachment). Session dihapus, nama blob dikembalikan.
+    """
+    # Delete bersyarat: session yang sama tidak bisa dipakai dua post
+    deleted, _ = UploadSession.objects.filter(pk=session.pk, status='complete').delete()
+    if not deleted:
+        raise UploadRejected(f'Upload {session.pk} was already used')
+    return session.file_name
+
+
+def abort(session):
+    _release(session)
+    _remove_part(session)
+    session.delete()
+
+
+def _release(session):
+    if session.status == 'complete' and session.file_name:
+        _release_name(session.file_name)
+
+
+def _release_name(name):
+    storage_release = getattr(default_storage, 'release', default_storage.delete)
+    storage_release(name)
+
+
+def _remove_part(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def purge_expired_sessions():
+    """
+    Hapus session kadaluarsa: file sementara + referensi blob yang tidak
+    jadi dipakai post
+    
+    Returns:
+        int: jumlah session yang dihapus
+    """
+    purged = 0
+    expired = UploadSession.objects.filter(expires_at__lt=timezone.now())
+    for session in expired.iterator():
+        try:
+            with transaction.atomic():
+                abort(session)
+            purged += 1
+        except Exception as e:
+            logger.warning(f"Failed to purge upload session {session.pk}: {str(e)}")
+    return purged
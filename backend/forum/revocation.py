@@ -0,0 +1,95 @@
+# backend/forum/revocation.py
+"""
+Revocation store untuk refresh token (rotation / logout)
+
+- Tabel RevokedToken: cuma jti + expires_at (compact, row expired di-prune)
+- Tiap proses punya Bloom filter jti yang di-revoke, di-rebuild dari tabel
+  setiap REVOCATION_FILTER_REFRESH detik
+- Kasus umum (token tidak di-revoke) -> Bloom filter bilang "tidak ada",
+  tanpa query. Hasil positif dicek ulang ke DB (false positive).
+
+Revoke = INSERT dengan jti unik. Saat rotation, INSERT yang gagal berarti
+refresh token sudah pernah dipakai (replay), walaupun filter di proses ini
+belum tahu.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .bloom import BloomFilter
+from .models import RevokedToken
+
+
+class RevocationFilter:
+    """Bloom filter per proses berisi jti yang di-revoke"""
+    
+    def __init__(self):
+        self._filter = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+    
+    def rebuild(self):
+        active = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+        # Kapasitas 2x supaya masih akurat untuk revoke baru sampai rebuild berikutnya
+        capacity = max(active.count() * 2, settings.REVOCATION_FILTER_MIN_CAPACITY)
+        bloom = BloomFilter(capacity, settings.REVOCATION_FILTER_ERROR_RATE)
+        for jti in active.values_list('jti', flat=True).iterator(chunk_size=5000):
+            bloom.add(jti)
+        
+        self._filter = bloom
+        self._built_at = time.monotonic()
+    
+    def _ensure_fresh(self):
+        age = time.monotonic() - self._built_at
+        if self._filter is None or age > settings.REVOCATION_FILTER_REFRESH:
+            with self._lock:
+                age = time.monotonic() - self._built_at
+                if self._filter is None or age > settings.REVOCATION_FILTER_REFRESH:
+                    self.rebuild()
+    
+    def might_contain(self, jti):
+        self._ensure_fresh()
+        return jti in self._filter
+    
+    def add(self, jti):
+        if self._filter is not None:
+            self._filter.add(jti)
+
+
+revocation_filter = RevocationFilter()
+
+
+def is_revoked(jti):
+    """Cek apakah jti sudah di-revoke (query DB cuma kalau filter positif)"""
+    if not revocation_filter.might_contain(jti):
+        return False
+    return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def revoke(jti, exp):
+    """
+    Revoke jti sampai waktu `exp` (unix timestamp dari claim token)
+    
+    Returns:
+        bool: False kalau jti sudah di-revoke sebelumnya
+    """
+    expires_at = datetime.fromtimestamp(exp, tz=dt_timezone.utc)
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    
+    revocation_filter.add(jti)
+    return True
+
+
+def prune_expired():
+    """Hapus jti yang token-nya sudah expired (tidak perlu di-track lagi)"""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,510 @@
+# backend/forum/seeding.py
+"""
+Data forum sintetis dalam volume besar (benchmark / reproduksi beban)
+
+Volume di scale=1.0:
+    10.000 user, 12 kategori, 100.000 post, 1.000.000 komentar,
+    1.000.000 like post, 1.000.000 like komentar, 100.000 notifikasi
+
+Distribusi dibuat mirip production:
+- Penulis power-law (Zipf): segelintir user menulis sebagian besar
+  post/komentar
+- Thread panas (Pareto): sedikit post menampung banyak komentar, like dan
+  views; notifikasi ikut menumpuk di penulis post tersebut
+- Komentar selalu setelah post-nya, sebagian jadi balasan komentar lain
+  di post yang sama
+- Sebagian post / user memakai image placeholder yang sudah diproses
+  pipeline image (varian WebP asli), dipakai bersama
+
+Deterministik: semua pilihan acak lewat random.Random(seed), ID diisi
+eksplisit, timestamp relatif terhadap `now` (default waktu sekarang; isi
+--now supaya dua run menghasilkan data yang persis sama). Insert per batch: COPY di PostgreSQL, bulk_create di database
+lain. Password semua user di-hash sekali (SEED_PASSWORD).
+
+Dipakai `manage.py generate_forum_data` dan `manage.py benchmark_api`.
+"""
+
+import argparse
+import bisect
+import csv
+import io
+import json
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from PIL import Image
+
+from . import images
+from .models import Category, Comment, MediaBlob, Notification, Post, User, IMAGE_READY
+
+
+SEED_PASSWORD = 'seed-Password-123'
+
+VOLUMES = {
+    'users': 10_000,
+    'posts': 100_000,
+    'comments': 1_000_000,
+    'post_likes': 1_000_000,
+    'comment_likes': 1_000_000,
+    'notifications': 100_000,
+}
+
+CATEGORIES = [
+    'Akademik', 'Beasiswa', 'Organisasi', 'Lomba', 'Magang', 'Karier',
+    'Teknologi', 'Olahraga', 'Kos & Kontrakan', 'Jual Beli', 'Event', 'Curhat',
+]
+
+SPREAD_DAYS = 365
+REPLY_RATIO = 0.3
+
+# Skew: eksponen Zipf aktivitas user, alpha Pareto "panas" post/komentar
+# (alpha 1.5 di 100k post -> thread terpanas ~0.5% dari semua komentar)
+AUTHOR_ZIPF_EXPONENT = 1.1
+THREAD_PARETO_ALPHA = 1.5
+
+PLACEHOLDER_IMAGES = 6
+# Cuma field ini yang diberi placeholder (attachment post tidak di-seed)
+PLACEHOLDER_SIZES = {(Post, 'image'): (1200, 800), (User, 'profile_picture'): (400, 400)}
+
+WORDS = (
+    'kampus kuliah tugas dosen jadwal ujian praktikum laporan skripsi seminar '
+    'beasiswa organisasi himpunan lomba magang kantin perpustakaan wifi parkir '
+    'kelas semester nilai revisi jurnal referensi proposal diskusi info tanya'
+).split()
+
+
+def scaled_volumes(scale, **overrides):
+    volumes = {name: max(int(count * scale), 1) for name, count in VOLUMES.items()}
+    volumes.update({name: count for name, count in overrides.items() if count is not None})
+    return volumes
+
+
+def parse_now(value):
+    """--now: '2025-06-01' atau '2025-06-01T12:00:00' (tanpa zona = UTC)"""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise argparse.ArgumentTypeError(f"invalid date/time: {value!r}")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def allocate(total, weights, cap=None):
+    """
+    Bagi `total` ke tiap bobot (largest remainder), deterministik
+    
+    Returns:
+        list: jumlah per bobot, masing-masing <= cap; sisa cap tidak dibagi ulang
+    """
+    weight_sum = sum(weights) or 1
+    shares = [total * weight / weight_sum for weight in weights]
+    counts = [int(share) for share in shares]
+    remainder = total - sum(counts)
+    by_fraction = sorted(range(len(shares)), key=lambda index: counts[index] - shares[index])
+    for index in by_fraction[:remainder]:
+        counts[index] += 1
+    if cap is not None:
+        counts = [min(count, cap) for count in counts]
+    return counts
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Matikan auto_now / auto_now_add supaya created_at hasil seeding dipakai"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def reset_sequences(*models):
+    """ID diisi eksplisit: sequence PostgreSQL harus disamakan lagi"""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+# ============================================
+# COPY (POSTGRESQL)
+# ============================================
+
+def _copy_value(field, value):
+    value = field.get_prep_value(value)
+    if value is None:
+        return r'\N'
+    if isinstance(field, models.JSONField):
+        return json.dumps(value, cls=field.encoder)
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return value
+
+
+def copy_rows(model, rows):
+    """
+    Insert instance model (belum disimpan) lewat COPY ... FROM STDIN.
+    Jauh lebih cepat dari INSERT multi-row untuk jutaan row.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not (field.primary_key and rows[0].pk is None)
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(field, getattr(row, field.attname)) for field in fields])
+    buffer.seek(0)
+    
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    sql = f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy'):
+            # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+        else:
+            raw.copy_expert(sql, buffer)
+
+
+# ============================================
+# SEEDER
+# ============================================
+
+class Seeder:
+    """
+    Generator data forum. Semua pilihan acak lewat self.rng, jadi seed
+    dan volume yang sama menghasilkan data yang sama.
+    """
+    
+    def __init__(self, volumes, seed=0, batch_size=5000, image_ratio=0.0, use_copy=None, log=None, now=None):
+        self.volumes = volumes
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.image_ratio = image_ratio
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.log = log or (lambda message: None)
+        self.now = now or timezone.now()
+        self.counts = {}
+        self.placeholders = {}
+    
+    # ----- distribusi -----
+    
+    def pick_user(self):
+        """User aktif (Zipf): user dengan offset kecil jauh lebih sering terpilih"""
+        offset = bisect.bisect(self.user_weights, self.rng.random() * self.user_weights[-1])
+        return self.first_user_id + min(offset, self.volumes['users'] - 1)
+    
+    def pick_post(self):
+        """Post berbobot "panas" (untuk notifikasi)"""
+        offset = bisect.bisect(self.post_weights, self.rng.random() * self.post_weights[-1])
+        return min(offset, self.volumes['posts'] - 1)
+    
+    def heat(self):
+        return self.rng.paretovariate(THREAD_PARETO_ALPHA)
+    
+    def timestamp(self, since=None):
+        """Waktu acak antara `since` (default SPREAD_DAYS lalu) dan sekarang"""
+        since = since or self.now - timedelta(days=SPREAD_DAYS)
+        span = max((self.now - since).total_seconds(), 1)
+        return since + timedelta(seconds=self.rng.random() * span)
+    
+    # ----- bulk insert -----
+    
+    def _flush(self, model, rows, name=None):
+        if rows:
+            if self.use_copy:
+                copy_rows(model, rows)
+            else:
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+            name = name or model._meta.model_name
+            self.counts[name] = self.counts.get(name, 0) + len(rows)
+        return []
+    
+    def _next_id(self, model):
+        last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+        return (last or 0) + 1
+    
+    def run(self):
+        models = (User, Category, Post, Comment, Notification)
+        with explicit_timestamps(*models), transaction.atomic():
+            self.seed_placeholders()
+            self.seed_users()
+            self.seed_categories()
+            self.seed_posts()
+            self.seed_comments()
+            self.seed_likes()
+            self.seed_notifications()
+            self.claim_placeholders()
+            reset_sequences(*models)
+        return self.counts
+    
+    # ----- image placeholder -----
+    
+    def seed_placeholders(self):
+        """
+        Beberapa image placeholder yang diproses pipeline image sungguhan
+        (original + varian WebP), lalu dipakai bersama oleh banyak row
+        """
+        if not self.image_ratio:
+            return
+        for (model, field), size in PLACEHOLDER_SIZES.items():
+            upload_to = model._meta.get_field(field).upload_to
+            variants = []
+            for index in range(PLACEHOLDER_IMAGES):
+                color = tuple(self.rng.randrange(256) for _ in range(3))
+                buffer = io.BytesIO()
+                Image.new('RGB', size, color).save(buffer, format='JPEG')
+                instance = model()
+                setattr(instance, field, default_storage.save(
+                    f'{upload_to}seed-placeholder-{index}.jpg', ContentFile(buffer.getvalue())
+                ))
+                images.process_image(instance, field)
+                variants.append({
+                    field: getattr(instance, field).name,
+                    f'{field}_status': IMAGE_READY,
+                    f'{field}_variants': getattr(instance, f'{field}_variants'),
+                    f'{field}_width': getattr(instance, f'{field}_width'),
+                    f'{field}_height': getattr(instance, f'{field}_height'),
+                    'uses': 0,
+                })
+            self.placeholders[field] = variants
+        self.log(f"image placeholders: {PLACEHOLDER_IMAGES * len(self.placeholders)}")
+    
+    def image_fields(self, field):
+        """Kolom image placeholder untuk satu row (kosong kalau tidak kebagian)"""
+        if not self.placeholders or self.rng.random() >= self.image_ratio:
+            return {}
+        placeholder = self.rng.choice(self.placeholders[field])
+        placeholder['uses'] += 1
+        return {key: value for key, value in placeholder.items() if key != 'uses'}
+    
+    def claim_placeholders(self):
+        """
+        Storage content-addressed: ref_count blob = jumlah row pemakainya.
+        Placeholder yang tidak terpakai dilepas (sisa file untuk gc_media).
+        """
+        for field, variants in self.placeholders.items():
+            for placeholder in variants:
+                names = [placeholder[field], *placeholder[f'{field}_variants'].values()]
+                if not placeholder['uses']:
+                    for name in names:
+                        default_storage.release(name)
+                    continue
+                if placeholder['uses'] == 1:
+                    continue
+                MediaBlob.objects.filter(name__in=names).update(
+                    ref_count=F('ref_count') + placeholder['uses'] - 1
+                )
+    
+    # ----- tabel -----
+    
+    def seed_users(self):
+        password = make_password(SEED_PASSWORD)
+        self.first_user_id = self._next_id(User)
+        self.user_weights = list(accumulate(
+            1 / (rank + 1) ** AUTHOR_ZIPF_EXPONENT for rank in range(self.volumes['users'])
+        ))
+        rows = []
+        for offset in range(self.volumes['users']):
+            user_id = self.first_user_id + offset
+            rows.append(User(
+                id=user_id,
+                username=f'seed{user_id}',
+                email=f'seed{user_id}@example.com',
+                password=password,
+                first_name=self.rng.choice(WORDS).capitalize(),
+                bio=sentence(self.rng, 8),
+                email_verified=True,
+                date_joined=self.timestamp(),
+                **self.image_fields('profile_picture'),
+            ))
+            if len(rows) >= self.batch_size:
+                rows = self._flush(User, rows)
+        self._flush(User, rows)
+        self.log(f"users: {self.volumes['users']}")
+    
+    def seed_categories(self):
+        existing = set(Category.objects.values_list('slug', flat=True))
+        rows = [
+            Category(
+                name=name,
+                slug=f'seed-{index}',
+                description=sentence(self.rng, 10),
+                order=index,
+                created_at=self.now,
+            )
+            for index, name in enumerate(CATEGORIES)
+            if f'seed-{index}' not in existing
+        ]
+        self._flush(Category, rows)
+        self.category_ids = list(
+            Category.objects.filter(slug__startswith='seed-').order_by('pk').values_list('pk', flat=True)
+        )
+        self.log(f"categories: {len(self.category_ids)}")
+    
+    def seed_posts(self):
+        """Post dengan bobot panas: dipakai untuk jumlah komentar, like, views & notifikasi"""
+        self.first_post_id = self._next_id(Post)
+        heat = [self.heat() for _ in range(self.volumes['posts'])]
+        self.post_weights = list(accumulate(heat))
+        self.post_heat = heat
+        self.post_authors = []
+        self.post_created = []
+        
+        rows = []
+        for offset in range(self.volumes['posts']):
+            post_id = self.first_post_id + offset
+            created_at = self.timestamp()
+            author_id = self.pick_user()
+            self.post_authors.append(author_id)
+            self.post_created.append(created_at)
+            rows.append(Post(
+                id=post_id,
+                title=sentence(self.rng, 6),
+                slug=f'seed-post-{post_id}',
+                content=sentence(self.rng, 60),
+                author_id=author_id,
+                category_id=self.rng.choice(self.category_ids),
+                views_count=int(heat[offset] * 100) + self.rng.randrange(100),
+                created_at=created_at,
+                updated_at=created_at,
+                **self.image_fields('image'),
+            ))
+            if len(rows) >= self.batch_size:
+                rows = self._flush(Post, rows)
+        self._flush(Post, rows)
+        self.log(f"posts: {self.volumes['posts']}")
+    
+    def seed_comments(self):
+        """Komentar per post sebanding panasnya; sebagian balasan komentar sebelumnya"""
+        comment_id = self.first_comment_id = self._next_id(Comment)
+        rows = []
+        for offset, count in enumerate(allocate(self.volumes['comments'], self.post_heat)):
+            post_id = self.first_post_id + offset
+            thread = []
+            for _ in range(count):
+                parent_id = None
+                if thread and self.rng.random() < REPLY_RATIO:
+                    parent_id = self.rng.choice(thread)
+                created_at = self.timestamp(since=self.post_created[offset])
+                rows.append(Comment(
+                    id=comment_id,
+                    post_id=post_id,
+                    author_id=self.pick_user(),
+                    parent_id=parent_id,
+                    content=sentence(self.rng, 20),
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+                thread.append(comment_id)
+                comment_id += 1
+                if len(rows) >= self.batch_size:
+                    rows = self._flush(Comment, rows)
+        self._flush(Comment, rows)
+        self.comment_count = comment_id - self.first_comment_id
+        self.log(f"comments: {self.comment_count}")
+    
+    def _seed_like_table(self, through, target_field, first_target_id, counts, name):
+        """Like unik (target, user): tiap target dapat sampel user tanpa duplikat"""
+        users = self.volumes['users']
+        rows = []
+        created = 0
+        for offset, count in enumerate(counts):
+            if not count:
+                continue
+            for user_offset in self.rng.sample(range(users), count):
+                rows.append(through(**{
+                    target_field: first_target_id + offset,
+                    'user_id': self.first_user_id + user_offset,
+                }))
+            created += count
+            if len(rows) >= self.batch_size:
+                rows = self._flush(through, rows, name)
+        self._flush(through, rows, name)
+        self.log(f"{name}: {created}")
+    
+    def seed_likes(self):
+        users = self.volumes['users']
+        self._seed_like_table(
+            Post.likes.through, 'post_id', self.first_post_id,
+            allocate(self.volumes['post_likes'], self.post_heat, cap=users), 'post_likes',
+        )
+        # Panas per komentar digenerate di sini, tidak disimpan selama seed_comments
+        comment_heat = [self.heat() for _ in range(self.comment_count)]
+        self._seed_like_table(
+            Comment.likes.through, 'comment_id', self.first_comment_id,
+            allocate(self.volumes['comment_likes'], comment_heat, cap=users), 'comment_likes',
+        )
+    
+    def seed_notifications(self):
+        """Notifikasi komentar / like untuk penulis post (post panas dapat lebih banyak)"""
+        rows = []
+        for _ in range(self.volumes['notifications']):
+            offset = self.pick_post()
+            notification_type = self.rng.choice(('comment', 'like_post'))
+            rows.append(Notification(
+                recipient_id=self.post_authors[offset],
+                sender_id=self.pick_user(),
+                notification_type=notification_type,
+                post_id=self.first_post_id + offset,
+                message=sentence(self.rng, 6),
+                is_read=self.rng.random() < 0.5,
+                created_at=self.timestamp(since=self.post_created[offset]),
+            ))
+            if len(rows) >= self.batch_size:
+                rows = self._flush(Notification, rows)
+        self._flush(Notification, rows)
+        self.log(f"notifications: {self.volumes['notifications']}")
+
+
+def seed_forum(scale=1.0, seed=0, batch_size=5000, image_ratio=0.0, use_copy=None, log=None, now=None,
+               **overrides):
+    """
+    Isi database dengan data forum sintetis
+    
+    Args:
+        now: patokan waktu (datetime aware), default timezone.now()
+        overrides: volume per tabel (users=..., posts=...), menimpa scale
+    
+    Returns:
+        dict: jumlah row per tabel
+    """
+    return Seeder(
+        scaled_volumes(scale, **overrides),
+        seed=seed,
+        batch_size=batch_size,
+        image_ratio=image_ratio,
+        use_copy=use_copy,
+        log=log,
+        now=now,
+    ).run()
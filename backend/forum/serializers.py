@@ -2,18 +2,68 @@
 # ✅ COMPLETE FILE - Copy paste ini semua
 
 from rest_framework import serializers
-from .models import User, Category, Post, Comment, Notification
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from .models import (
+    User, Category, Post, PostAttachment, Comment, Notification, EmailBroadcast, UploadSession,
+    RequestProfile, IMAGE_PENDING,
+)
 from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .authentication import ForkaRefreshToken, VERSION_CLAIM, check_token_version
+from .revocation import is_revoked, revoke
+from .availability import normalize_username
+from .uploads import ALLOWED_IMAGE_FORMATS, UploadRejected, sniff_upload, verify_direct_upload
+from .media_urls import file_url
+from .timing import TimedSerializerMixin
+from . import images, resumable
+
+
+# ============================================
+# IMAGE VALIDATION
+# ============================================
+
+def validate_image_content(value):
+    """
+    Cek isi file (magic bytes), bukan cuma ekstensi.
+    Ekstensi harus cocok dengan format asli supaya blob tersimpan dengan
+    ekstensi yang benar.
+    """
+    fmt = sniff_upload(value)
+    allowed = [ext for extensions in ALLOWED_IMAGE_FORMATS.values() for ext in extensions]
+    if fmt not in ALLOWED_IMAGE_FORMATS:
+        raise serializers.ValidationError(
+            f"Invalid image format. Allowed: {', '.join(allowed)}"
+        )
+    
+    ext = value.name.split('.')[-1].lower()
+    if ext not in ALLOWED_IMAGE_FORMATS[fmt]:
+        raise serializers.ValidationError(
+            f"File extension .{ext} does not match image content ({fmt.lower()})"
+        )
+
+
+def annotated_count(obj, name, related_name):
+    """
+    Jumlah dari annotation queryset view (tanpa query per row), fallback
+    COUNT(*) untuk instance yang tidak lewat queryset view (create, /me/)
+    """
+    count = getattr(obj, name, None)
+    return getattr(obj, related_name).count() if count is None else count
 
 
 # ============================================
 # USER SERIALIZERS
 # ============================================
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Basic User Serializer with Profile Picture"""
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = User
@@ -24,28 +74,26 @@ class UserSerializer(serializers.ModelSerializer):
             'role',
             'bio',
             'profile_picture',
+            'profile_picture_srcset',
             'date_joined',
         ]
         read_only_fields = ['id', 'date_joined']
     
     def get_profile_picture(self, obj):
         """✅ Return full URL untuk profile picture"""
-        if obj.profile_picture:
-            request = self.context.get('request')
-            if request:
-                url = request.build_absolute_uri(obj.profile_picture.url)
-                print(f"✅ Profile Picture URL: {url}")  # Debug log
-                return url
-            # Fallback jika no request context
-            return f"http://localhost:8000{obj.profile_picture.url}"
-        return None
-
-
-class UserDetailSerializer(serializers.ModelSerializer):
+        return file_url(obj.profile_picture, self.context.get('request'))
+    
+    def get_profile_picture_srcset(self, obj):
+        """{lebar: url} varian WebP, None sebelum diproses worker"""
+        return images.srcset(obj, 'profile_picture', self.context.get('request'))
+
+
+class UserDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Detailed User Serializer"""
     posts_count = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = User
@@ -56,6 +104,7 @@ class UserDetailSerializer(serializers.ModelSerializer):
             'role',
             'bio',
             'profile_picture',
+            'profile_picture_srcset',
             'phone_number',
             'date_joined',
             'posts_count',
@@ -64,19 +113,17 @@ class UserDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined']
     
     def get_posts_count(self, obj):
-        return obj.posts.count()
+        return annotated_count(obj, 'posts_count', 'posts')
     
     def get_comments_count(self, obj):
-        return obj.comments.count()
+        return annotated_count(obj, 'comments_count', 'comments')
     
     def get_profile_picture(self, obj):
         """✅ Return full URL untuk profile picture"""
-        if obj.profile_picture:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return f"http://localhost:8000{obj.profile_picture.url}"
-        return None
+        return file_url(obj.profile_picture, self.context.get('request'))
+    
+    def get_profile_picture_srcset(self, obj):
+        return images.srcset(obj, 'profile_picture', self.context.get('request'))
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
@@ -94,16 +141,11 @@ class UserUpdateSerializer(serializers.ModelSerializer):
             if value.size > 5 * 1024 * 1024:
                 raise serializers.ValidationError("Image size must be less than 5MB")
             
-            # Check file extension
-            ext = value.name.split('.')[-1].lower()
-            allowed = ['jpg', 'jpeg', 'png', 'gif', 'webp']
-            if ext not in allowed:
-                raise serializers.ValidationError(
-                    f"Invalid image format. Allowed: {', '.join(allowed)}"
-                )
+            validate_image_content(value)
         
         return value
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update user with image handling"""
         instance.bio = validated_data.get('bio', instance.bio)
@@ -113,27 +155,19 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         if 'profile_picture' in validated_data:
             profile_picture = validated_data.get('profile_picture')
 
-            if profile_picture:
-                # Delete old image if exists
-                if instance.profile_picture:
-                    try:
-                        instance.profile_picture.delete(save=False)
-                        print("✅ Old profile picture deleted")
-                    except Exception as e:
-                        print(f"⚠️ Error deleting old image: {e}")
+            # Image lama dilepas setelah commit, file dibersihkan gc_media
+            if instance.profile_picture:
+                images.release_image(instance, 'profile_picture')
 
+            if profile_picture:
                 instance.profile_picture = profile_picture
-                print(f"✅ New profile picture saved: {profile_picture.name}")
+                # Varian & EXIF strip dikerjakan worker process_images
+                images.mark_pending(instance, 'profile_picture')
                 
             elif profile_picture is None:
                 # Remove profile picture
-                if instance.profile_picture:
-                    try:
-                        instance.profile_picture.delete(save=False)
-                        print("✅ Profile picture removed")
-                    except Exception as e:
-                        print(f"⚠️ Error deleting image: {e}")
                 instance.profile_picture = None
+                images.reset_image_state(instance, 'profile_picture')
 
         instance.save()
         return instance
@@ -160,12 +194,12 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return attrs
     
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
+        if User.objects.with_email(value).exists():
             raise serializers.ValidationError("Email already exists.")
         return value
     
     def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
+        if User.objects.filter(username__lower=normalize_username(value)).exists():
             raise serializers.ValidationError("Username already exists.")
         return value
     
@@ -183,11 +217,56 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
+# ============================================
+# JWT TOKEN SERIALIZERS
+# ============================================
+
+class ForkaTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """/api/token/ - token dengan claim role & version"""
+    token_class = ForkaRefreshToken
+
+
+class ForkaTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    /api/token/refresh/ - cek token version dari cache dan revocation
+    Bloom filter, tanpa load row User / query blacklist setiap refresh
+    """
+    token_class = ForkaRefreshToken
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        jti = refresh[jwt_settings.JTI_CLAIM]
+        
+        if is_revoked(jti):
+            raise InvalidToken('Token has been revoked', code='token_revoked')
+        
+        # Rotation: revoke token lama dulu. INSERT gagal = token sudah dipakai
+        if jwt_settings.ROTATE_REFRESH_TOKENS and jwt_settings.BLACKLIST_AFTER_ROTATION:
+            if not revoke(jti, refresh['exp']):
+                raise InvalidToken('Token has been revoked', code='token_revoked')
+        
+        if VERSION_CLAIM not in refresh:
+            # Token lama tanpa claim version
+            return super().validate(attrs)
+        
+        check_token_version(refresh)
+        
+        data = {'access': str(refresh.access_token)}
+        
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        
+        return data
+
+
 # ============================================
 # CATEGORY SERIALIZER
 # ============================================
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer untuk Category"""
     posts_count = serializers.SerializerMethodField()
     
@@ -206,20 +285,39 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
     
     def get_posts_count(self, obj):
-        return obj.posts.count()
+        return annotated_count(obj, 'posts_count', 'posts')
 
 
 # ============================================
 # POST SERIALIZERS
 # ============================================
 
-class PostSerializer(serializers.ModelSerializer):
+class PostAttachmentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Attachment image di post (resumable upload)"""
+    url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = PostAttachment
+        fields = ['id', 'url', 'srcset', 'filename', 'size', 'content_type', 'position']
+    
+    def get_url(self, obj):
+        return file_url(obj.file, self.context.get('request'))
+    
+    def get_srcset(self, obj):
+        """{lebar: url} varian WebP, None sebelum diproses worker"""
+        return images.srcset(obj, 'file', self.context.get('request'))
+
+
+class PostSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer untuk Post dengan image support"""
     author = UserSerializer(read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     likes_count = serializers.IntegerField(read_only=True)
     comments_count = serializers.IntegerField(read_only=True)
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    attachments = PostAttachmentSerializer(many=True, read_only=True)
     
     class Meta:
         model = Post
@@ -232,6 +330,10 @@ class PostSerializer(serializers.ModelSerializer):
             'category',
             'category_name',
             'image',
+            'image_srcset',
+            'image_width',
+            'image_height',
+            'attachments',
             'likes_count',
             'comments_count',
             'views_count',
@@ -251,6 +353,8 @@ class PostSerializer(serializers.ModelSerializer):
             'likes_count',
             'comments_count',
             'views_count',
+            'image_width',
+            'image_height',
             # ✅ NEW: Mark as Solved fields (read-only)
             'is_solved',
             'solved_at',
@@ -261,25 +365,77 @@ class PostSerializer(serializers.ModelSerializer):
     
     def get_image(self, obj):
         """✅ Return full URL untuk post image"""
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                url = request.build_absolute_uri(obj.image.url)
-                print(f"✅ Post Image URL: {url}")  # Debug log
-                return url
-            return f"http://localhost:8000{obj.image.url}"
-        return None
+        return file_url(obj.image, self.context.get('request'))
+    
+    def get_image_srcset(self, obj):
+        """{lebar: url} varian WebP untuk feed card, None sebelum diproses worker"""
+        return images.srcset(obj, 'image', self.context.get('request'))
 
 
 class PostCreateSerializer(serializers.ModelSerializer):
     """Serializer khusus untuk create post dengan image upload"""
     image = serializers.ImageField(required=False, allow_null=True)
+    # Direct upload (MEDIA_STORAGE=s3): key dari /api/uploads/presign/
+    image_key = serializers.CharField(write_only=True, required=False)
+    # Resumable upload: id session yang sudah di-finalize
+    image_upload = serializers.UUIDField(write_only=True, required=False)
+    attachment_uploads = serializers.ListField(
+        child=serializers.UUIDField(),
+        write_only=True,
+        required=False,
+        max_length=settings.POST_MAX_ATTACHMENTS,
+    )
     
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'category', 'image']
+        fields = ['id', 'title', 'content', 'category', 'image', 'image_key', 'image_upload', 'attachment_uploads']
         read_only_fields = ['id']
     
+    def _finalized_sessions(self, session_ids):
+        sessions = {
+            session.pk: session
+            for session in UploadSession.objects.filter(
+                pk__in=session_ids,
+                user=self.context['request'].user,
+                status='complete',
+            )
+        }
+        missing = [str(session_id) for session_id in session_ids if session_id not in sessions]
+        if missing:
+            raise serializers.ValidationError(f"Upload not found or not finalized: {', '.join(missing)}")
+        return [sessions[session_id] for session_id in session_ids]
+    
+    def validate_image_upload(self, value):
+        return self._finalized_sessions([value])[0]
+    
+    def validate_attachment_uploads(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Duplicate upload ids")
+        return self._finalized_sessions(value)
+    
+    def validate_image_key(self, value):
+        """Object harus sudah di bucket, image valid, dan cocok dengan digest-nya"""
+        try:
+            fmt, size = verify_direct_upload(default_storage, value, 'image')
+        except UploadRejected as e:
+            raise serializers.ValidationError(str(e))
+        
+        ext = value.rsplit('.', 1)[-1].lower()
+        if ext not in ALLOWED_IMAGE_FORMATS[fmt]:
+            raise serializers.ValidationError(
+                f"File extension .{ext} does not match image content ({fmt.lower()})"
+            )
+        self._image_key_size = size
+        return value
+    
+    def validate(self, attrs):
+        sources = [name for name in ('image', 'image_key', 'image_upload') if attrs.get(name)]
+        if len(sources) > 1:
+            raise serializers.ValidationError({
+                sources[1]: 'Send only one of image, image_key or image_upload'
+            })
+        return attrs
+    
     def validate_image(self, value):
         """Validate image file"""
         if value:
@@ -287,33 +443,56 @@ class PostCreateSerializer(serializers.ModelSerializer):
             if value.size > 10 * 1024 * 1024:
                 raise serializers.ValidationError("Image size must be less than 10MB")
             
-            # Check file extension
-            ext = value.name.split('.')[-1].lower()
-            allowed = ['jpg', 'jpeg', 'png', 'gif', 'webp']
-            if ext not in allowed:
-                raise serializers.ValidationError(
-                    f"Invalid image format. Allowed: {', '.join(allowed)}"
-                )
-            
-            print(f"✅ Image validation passed: {value.name}")
+            validate_image_content(value)
         
         return value
     
+    @transaction.atomic
     def create(self, validated_data):
         """Handle image upload saat create post"""
-        if 'image' in validated_data and validated_data['image']:
-            print(f"✅ Creating post with image: {validated_data['image'].name}")
-        return super().create(validated_data)
+        image_key = validated_data.pop('image_key', None)
+        image_upload = validated_data.pop('image_upload', None)
+        attachment_uploads = validated_data.pop('attachment_uploads', [])
+        
+        try:
+            if image_key:
+                # File sudah di bucket: cukup catat referensinya
+                validated_data['image'] = default_storage.claim(image_key, self._image_key_size)
+            elif image_upload:
+                # Referensi blob pindah dari upload session ke post
+                validated_data['image'] = resumable.take(image_upload)
+            
+            if 'image' in validated_data and validated_data['image']:
+                # Varian & EXIF strip dikerjakan worker process_images
+                validated_data['image_status'] = IMAGE_PENDING
+            post = super().create(validated_data)
+            
+            PostAttachment.objects.bulk_create([
+                PostAttachment(
+                    post=post,
+                    file=resumable.take(session),
+                    # EXIF strip + varian oleh worker, sama dengan post image
+                    file_status=IMAGE_PENDING,
+                    filename=session.filename,
+                    size=session.size,
+                    content_type=session.content_type,
+                    position=position,
+                )
+                for position, session in enumerate(attachment_uploads)
+            ])
+        except UploadRejected as e:
+            raise serializers.ValidationError(str(e))
+        return post
 
 
 # ============================================
 # COMMENT SERIALIZER
 # ============================================
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer untuk Comment"""
     author = UserSerializer(read_only=True)
-    likes_count = serializers.IntegerField(read_only=True)
+    likes_count = serializers.SerializerMethodField()
     replies_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -337,15 +516,18 @@ class CommentSerializer(serializers.ModelSerializer):
             'updated_at',
         ]
     
+    def get_likes_count(self, obj):
+        return annotated_count(obj, 'likes_count', 'likes')
+    
     def get_replies_count(self, obj):
-        return obj.replies.count() if hasattr(obj, 'replies') else 0
+        return annotated_count(obj, 'replies_count', 'replies')
 
 
 # ============================================
 # NOTIFICATION SERIALIZER
 # ============================================
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer untuk Notification"""
     sender = UserSerializer(read_only=True)
     
@@ -361,4 +543,71 @@ class NotificationSerializer(serializers.ModelSerializer):
             'is_read',
             'created_at',
         ]
-        read_only_fields = ['id', 'sender', 'created_at']
\ No newline at end of file
+        read_only_fields = ['id', 'sender', 'created_at']
+
+
+# ============================================
+# EMAIL BROADCAST SERIALIZER
+# ============================================
+
+class EmailBroadcastSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer untuk Email Broadcast (admin only)"""
+    created_by = UserSerializer(read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = EmailBroadcast
+        fields = [
+            'id',
+            'subject',
+            'message',
+            'html_message',
+            'created_by',
+            'status',
+            'total_recipients',
+            'sent_count',
+            'failed_count',
+            'progress',
+            'last_error',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = [
+            'id',
+            'created_by',
+            'status',
+            'total_recipients',
+            'sent_count',
+            'failed_count',
+            'last_error',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+
+
+# ============================================
+# REQUEST PROFILE SERIALIZER
+# ============================================
+
+class RequestProfileSerializer(serializers.ModelSerializer):
+    """Metadata profil request (admin only), folded stacks diunduh terpisah"""
+    user = serializers.CharField(source='user.username', read_only=True, default=None)
+    
+    class Meta:
+        model = RequestProfile
+        fields = [
+            'id',
+            'user',
+            'method',
+            'path',
+            'route',
+            'status_code',
+            'duration_ms',
+            'cpu_samples',
+            'sample_interval_ms',
+            'memory_peak',
+            'created_at',
+        ]
+        read_only_fields = fields
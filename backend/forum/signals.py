@@ -0,0 +1,31 @@
+# backend/forum/signals.py
+"""
+Signal handlers forum
+
+Post / User / PostAttachment yang dihapus (langsung, lewat queryset, atau
+cascade dari User -> Post -> PostAttachment) melepas referensi image +
+varian setelah commit. Category yang dihapus tidak menghapus post
+(Post.category SET_NULL), jadi image-nya tetap dipakai.
+File fisiknya dibersihkan `manage.py gc_media`.
+"""
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .images import release_image
+from .models import Post, PostAttachment, User
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    release_image(instance, 'image')
+
+
+@receiver(post_delete, sender=User)
+def release_profile_picture(sender, instance, **kwargs):
+    release_image(instance, 'profile_picture')
+
+
+@receiver(post_delete, sender=PostAttachment)
+def release_attachment(sender, instance, **kwargs):
+    release_image(instance, 'file')
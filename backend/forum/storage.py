@@ -0,0 +1,359 @@
+# backend/forum/storage.py
+"""
+Content-addressed media storage (dedup)
+
+Setiap file disimpan sekali berdasarkan SHA-256 isinya:
+    blobs/ab/cd/abcdef...<64 hex>.jpg
+
+- Upload identik (screenshot, meme, logo kampus) -> tidak ada byte yang
+  ditulis, cuma ref_count MediaBlob yang naik
+- save() = +1 referensi, delete() = -1 referensi (cuma update DB, aman
+  dipanggil di request path); saat referensi terakhir hilang row MediaBlob
+  dihapus dan file fisiknya dibersihkan `manage.py gc_media` setelah grace period
+- Digest dipakai ulang kalau upload handler sudah menghitungnya saat
+  streaming (atribut `sha256` pada file), jadi isi tidak dibaca dua kali
+- Image pipeline menyimpan ulang original tanpa EXIF (digest baru). Blob
+  hasilnya mencatat digest upload asli (MediaBlob.source_digest), jadi
+  upload identik berikutnya langsung di-resolve ke blob hasil proses
+
+Driver (settings.MEDIA_STORAGE):
+- 'local' -> ContentAddressedFileSystemStorage (MEDIA_ROOT)
+- 's3'    -> ContentAddressedS3Storage (AWS S3 / MinIO / S3-compatible lain,
+             boto3 di-import lazy, cuma dibutuhkan kalau driver ini dipakai).
+             Mendukung direct upload: client PUT ke presigned URL langsung
+             di key blob, Django cuma verifikasi lalu mencatat referensi.
+"""
+
+import base64
+import hashlib
+import mimetypes
+import os
+import posixpath
+import tempfile
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.db import transaction
+from django.db.models import F
+from django.utils.functional import cached_property
+
+
+BLOB_PREFIX = 'blobs/'
+
+
+def file_digest(content):
+    """SHA-256 dari file (pakai hasil upload handler kalau ada)"""
+    digest = getattr(content, 'sha256', None)
+    if digest:
+        return digest
+    
+    hasher = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return hasher.hexdigest()
+
+
+def blob_name(digest, original_name):
+    ext = os.path.splitext(original_name)[1].lower()
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+def blob_digest(name):
+    """blobs/ab/cd/<sha256>.jpg -> <sha256>"""
+    return posixpath.splitext(posixpath.basename(name))[0]
+
+
+class ContentAddressedStorageMixin:
+    """Simpan file di path hasil hash isi + reference counting di MediaBlob"""
+    
+    def get_available_name(self, name, max_length=None):
+        # Nama blob ditentukan isi: file yang sama = nama yang sama
+        if is_blob(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+    
+    def _save(self, name, content):
+        from .models import MediaBlob
+        
+        digest = file_digest(content)
+        name = blob_name(digest, name)
+        
+        with transaction.atomic():
+            processed = self.resolve_processed(digest, lock=True)
+            if processed is not None:
+                # Upload asli yang sama pernah diproses: pakai hasilnya
+                MediaBlob.objects.filter(pk=processed.pk).update(ref_count=F('ref_count') + 1)
+                return processed.name
+            
+            blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                digest=digest,
+                defaults={'name': name, 'size': content.size},
+            )
+            if created and self.exists(blob.name):
+                # Sisa blob yang menunggu gc_media: tulis ulang supaya mtime
+                # baru dan GC tidak menghapusnya
+                super().delete(blob.name)
+            if not self.exists(blob.name):
+                # Blob baru (atau file fisik hilang): tulis sekali
+                super()._save(blob.name, content)
+            MediaBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') + 1)
+        
+        return blob.name
+    
+    def delete(self, name):
+        from .models import MediaBlob
+        
+        if not is_blob(name):
+            return super().delete(name)
+        
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                # Blob tanpa catatan referensi: hapus langsung
+                return super().delete(name)
+            
+            if blob.ref_count > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            
+            # Referensi terakhir: file dibiarkan untuk gc_media
+            blob.delete()
+    
+    def delete_file(self, name):
+        """Hapus file fisik tanpa menyentuh ref_count (cuma untuk gc_media)"""
+        super().delete(name)
+    
+    def claim(self, name, size):
+        """
+        +1 referensi untuk blob yang sudah ada di storage tanpa lewat save()
+        (direct upload yang sudah diverifikasi)
+        """
+        from .models import MediaBlob
+        
+        digest = blob_digest(name)
+        with transaction.atomic():
+            MediaBlob.objects.select_for_update().get_or_create(
+                digest=digest,
+                defaults={'name': name, 'size': size},
+            )
+            MediaBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') + 1)
+        return name
+    
+    def resolve_processed(self, digest, lock=False):
+        """
+        MediaBlob hasil image pipeline untuk upload asli dengan digest ini,
+        None kalau belum pernah diproses
+        """
+        from .models import MediaBlob
+        
+        blobs = MediaBlob.objects.filter(source_digest=digest, ref_count__gt=0)
+        if lock:
+            blobs = blobs.select_for_update()
+        return blobs.order_by('-created_at').first()
+    
+    def record_processed(self, source_name, processed_name):
+        """Catat blob hasil proses (mis. tanpa EXIF) untuk upload asli source_name"""
+        from .models import MediaBlob
+        
+        if is_blob(source_name) and source_name != processed_name:
+            MediaBlob.objects.filter(name=processed_name, source_digest='').update(
+                source_digest=blob_digest(source_name)
+            )
+    
+    def is_processed(self, name):
+        """True kalau blob ini sudah hasil image pipeline (jangan diproses ulang)"""
+        from .models import MediaBlob
+        
+        return MediaBlob.objects.filter(name=name).exclude(source_digest='').exists()
+    
+    def release(self, name):
+        """
+        Lepas satu referensi tanpa I/O file (untuk request path).
+        File non-blob (posts/, profiles/ lama) tidak disentuh, gc_media
+        yang menghapusnya kalau sudah tidak direferensikan.
+        """
+        if is_blob(name):
+            self.delete(name)
+
+
+class ContentAddressedFileSystemStorage(ContentAddressedStorageMixin, FileSystemStorage):
+    """MEDIA_ROOT lokal dengan dedup"""
+
+
+# ============================================
+# S3-COMPATIBLE STORAGE
+# ============================================
+
+class S3Storage(Storage):
+    """
+    Storage di bucket S3 (atau MinIO / S3-compatible lain lewat
+    MEDIA_S3_ENDPOINT_URL). Tidak ada disk bersama antar node.
+    """
+    
+    supports_direct_upload = True
+    
+    def __init__(self, bucket=None, endpoint_url=None, public_url=None):
+        self.bucket = bucket or settings.MEDIA_S3_BUCKET
+        self.endpoint_url = endpoint_url or settings.MEDIA_S3_ENDPOINT_URL or None
+        self.public_url = public_url if public_url is not None else settings.MEDIA_S3_PUBLIC_URL
+        if not self.bucket:
+            raise ImproperlyConfigured('MEDIA_STORAGE=s3 requires MEDIA_S3_BUCKET')
+    
+    @cached_property
+    def client(self):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise ImproperlyConfigured('MEDIA_STORAGE=s3 requires boto3 (pip install boto3)')
+        
+        return boto3.client(
+            's3',
+            endpoint_url=self.endpoint_url,
+            region_name=settings.MEDIA_S3_REGION,
+            aws_access_key_id=settings.MEDIA_S3_ACCESS_KEY or None,
+            aws_secret_access_key=settings.MEDIA_S3_SECRET_KEY or None,
+            config=Config(
+                signature_version='s3v4',
+                s3={'addressing_style': settings.MEDIA_S3_ADDRESSING_STYLE},
+                # Checksum cuma kalau diminta (ChecksumSHA256 untuk direct upload)
+                request_checksum_calculation='when_required',
+                response_checksum_validation='when_required',
+            ),
+        )
+    
+    def _is_missing(self, error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+    
+    def head(self, name, checksum=False):
+        """Metadata object, None kalau tidak ada"""
+        from botocore.exceptions import ClientError
+        
+        params = {'Bucket': self.bucket, 'Key': name}
+        if checksum:
+            params['ChecksumMode'] = 'ENABLED'
+        try:
+            return self.client.head_object(**params)
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise
+    
+    def read_range(self, name, start, end):
+        """Bytes [start, end] inklusif (mis. header image untuk sniffing)"""
+        response = self.client.get_object(Bucket=self.bucket, Key=name, Range=f'bytes={start}-{end}')
+        return response['Body'].read()
+    
+    def _open(self, name, mode='rb'):
+        # Di-spool ke disk di atas FILE_UPLOAD_MAX_MEMORY_SIZE, tidak pernah full di RAM
+        spool = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        response = self.client.get_object(Bucket=self.bucket, Key=name)
+        for chunk in response['Body'].iter_chunks(64 * 1024):
+            spool.write(chunk)
+        spool.seek(0)
+        return File(spool, name=name)
+    
+    def _save(self, name, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        extra = {'ContentType': mimetypes.guess_type(name)[0] or 'application/octet-stream'}
+        if is_blob(name):
+            extra['CacheControl'] = 'public, max-age=31536000, immutable'
+        self.client.upload_fileobj(content, self.bucket, name, ExtraArgs=extra)
+        return name
+    
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+    
+    def exists(self, name):
+        return self.head(name) is not None
+    
+    def size(self, name):
+        return self.head(name)['ContentLength']
+    
+    def get_modified_time(self, name):
+        return self.head(name)['LastModified']
+    
+    def listdir(self, path):
+        prefix = f'{path.rstrip("/")}/' if path else ''
+        directories, files = [], []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            directories += [p['Prefix'][len(prefix):].rstrip('/') for p in page.get('CommonPrefixes', [])]
+            files += [obj['Key'][len(prefix):] for obj in page.get('Contents', [])]
+        return directories, files
+    
+    def url(self, name):
+        if self.public_url:
+            return urljoin(self.public_url.rstrip('/') + '/', name)
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': name},
+            ExpiresIn=settings.MEDIA_S3_URL_EXPIRY,
+        )
+    
+    def presigned_put(self, name, content_type, sha256, expires_in):
+        """
+        URL PUT langsung ke bucket. x-amz-checksum-sha256 ikut ditandatangani,
+        jadi S3 menolak body yang isinya tidak cocok dengan digest (= nama key).
+        
+        Returns:
+            dict: url + header yang wajib dikirim client
+        """
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': name,
+                'ContentType': content_type,
+                'ChecksumSHA256': checksum,
+                'CacheControl': 'public, max-age=31536000, immutable',
+            },
+            ExpiresIn=expires_in,
+        )
+        return {
+            'url': url,
+            'method': 'PUT',
+            'headers': {
+                'Content-Type': content_type,
+                'x-amz-checksum-sha256': checksum,
+                'Cache-Control': 'public, max-age=31536000, immutable',
+            },
+        }
+
+
+class ContentAddressedS3Storage(ContentAddressedStorageMixin, S3Storage):
+    """S3 dengan dedup"""
+    
+    def verify_blob(self, name):
+        """
+        True kalau isi object cocok dengan digest di namanya. Pakai checksum
+        yang disimpan S3; kalau tidak ada (S3-compatible tanpa checksum),
+        object di-hash sambil streaming.
+        """
+        digest = blob_digest(name)
+        info = self.head(name, checksum=True)
+        if info is None:
+            return False
+        
+        stored = info.get('ChecksumSHA256')
+        if stored and '-' not in stored:
+            return base64.b64decode(stored).hex() == digest
+        
+        hasher = hashlib.sha256()
+        response = self.client.get_object(Bucket=self.bucket, Key=name)
+        for chunk in response['Body'].iter_chunks(64 * 1024):
+            hasher.update(chunk)
+        return hasher.hexdigest() == digest
@@ -1,3 +1,327 @@
-from django.test import TestCase
+# backend/forum/tests.py
+"""
+Query budget per endpoint API
 
-# Create your tests here.
+Setiap endpoint router + custom action dipanggil dua kali:
+- size 1  : page size 1, objek target punya 1 relasi (like, komentar, reply, ...)
+- size 50 : page size 50, objek target punya 50 relasi
+
+Jumlah query harus sama di kedua size (tidak ada N+1) dan <= budget
+endpoint. Kalau gagal, pesan error berisi diff SQL (dinormalisasi, tanpa
+literal) antara kedua size, atau daftar query kalau budget terlampaui.
+
+Cache dan counter throttle dikosongkan sebelum tiap request, jadi budget
+sudah termasuk jalur dingin: cek token version (1 query per request,
+counter throttle di cache, bukan DB). Budget = jumlah query sekarang;
+naik = sengaja, ubah angkanya di ENDPOINTS.
+
+    python manage.py test forum
+"""
+
+import difflib
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from .authentication import ForkaRefreshToken
+from .models import (
+    Category, Comment, EmailBroadcast, Notification, Post, PostAttachment,
+    RequestProfile, ThrottleCounter, User,
+)
+from .querylog import normalize_sql
+
+
+SIZES = (1, 50)
+PASSWORD = 'Budget-Password-123'
+
+
+class Case:
+    """Satu endpoint: path/body boleh berisi placeholder fixture per size ({post}, ...)"""
+    
+    def __init__(self, name, method, path, budget, user='reader', body=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.budget = budget
+        self.user = user
+        self.body = body
+
+
+ENDPOINTS = [
+    # Users
+    Case('users-list', 'get', '/api/users/', 3),
+    Case('users-detail', 'get', '/api/users/{author}/', 2),
+    Case('users-me', 'get', '/api/users/me/', 3),
+    Case('users-create', 'post', '/api/users/', 3, user='admin', body={
+        'username': 'created-{size}', 'email': 'created-{size}@example.com',
+    }),
+    Case('users-update', 'put', '/api/users/{member}/', 4, user='admin', body={
+        'username': 'renamed-{size}', 'email': 'renamed-{size}@example.com', 'bio': 'Edit',
+    }),
+    Case('users-partial-update', 'patch', '/api/users/{member}/', 3, user='admin', body={'bio': 'Edit'}),
+    Case('users-destroy', 'delete', '/api/users/{spare_member}/', 17, user='admin'),
+    Case('users-update-profile', 'patch', '/api/users/update_profile/', 6, body={'bio': 'Updated bio'}),
+    Case('users-update-profile-put', 'put', '/api/users/update_profile/', 6, body={'bio': 'Updated bio'}),
+    Case('users-change-password', 'post', '/api/users/change_password/', 2, user='spare', body={
+        'old_password': PASSWORD, 'new_password': 'Another-Password-456', 'new_password2': 'Another-Password-456',
+    }),
+    
+    # Categories
+    Case('categories-list', 'get', '/api/categories/', 3),
+    Case('categories-detail', 'get', '/api/categories/{category_slug}/', 2),
+    Case('categories-posts', 'get', '/api/categories/{category_slug}/posts/', 5),
+    Case('categories-create', 'post', '/api/categories/', 5, user='admin', body={
+        'name': 'New {size}', 'slug': 'new-{size}', 'description': 'Baru',
+    }),
+    Case('categories-update', 'put', '/api/categories/{category_slug}/', 5, user='admin', body={
+        'name': 'Category {size}', 'slug': 'cat-{size}', 'description': 'Edit',
+    }),
+    Case('categories-partial-update', 'patch', '/api/categories/{category_slug}/', 3, user='admin', body={
+        'description': 'Edit',
+    }),
+    Case('categories-destroy', 'delete', '/api/categories/{spare_category_slug}/', 4, user='admin'),
+    
+    # Posts
+    Case('posts-list', 'get', '/api/posts/', 4),
+    Case('posts-list-top', 'get', '/api/posts/?filter=top', 4),
+    Case('posts-list-hot', 'get', '/api/posts/?filter=hot', 4),
+    Case('posts-list-category', 'get', '/api/posts/?category={category}', 4),
+    Case('posts-detail', 'get', '/api/posts/{post}/', 4),
+    Case('posts-create', 'post', '/api/posts/', 8, user='author', body={
+        'title': 'Post baru {size}', 'content': 'Isi', 'category': '{category}',
+    }),
+    Case('posts-update', 'put', '/api/posts/{post}/', 6, user='author', body={
+        'title': 'Judul baru', 'content': 'Isi baru', 'category': '{category}',
+    }),
+    Case('posts-partial-update', 'patch', '/api/posts/{post}/', 5, user='author', body={'title': 'Judul baru'}),
+    Case('posts-destroy', 'delete', '/api/posts/{spare_post}/', 8, user='author'),
+    Case('posts-like', 'post', '/api/posts/{post}/like/', 6),
+    Case('posts-unlike', 'post', '/api/posts/{post}/like/', 6, user='spare'),
+    Case('posts-pin', 'post', '/api/posts/{post}/pin/', 4, user='admin'),
+    Case('posts-close', 'post', '/api/posts/{post}/close/', 4, user='admin'),
+    Case('posts-mark-solved', 'post', '/api/posts/{post}/mark_solved/', 5, user='author', body={
+        'comment_id': '{comment}',
+    }),
+    
+    # Comments
+    Case('comments-list', 'get', '/api/comments/', 3),
+    Case('comments-list-post', 'get', '/api/comments/?post={post}&top_level=true', 3),
+    Case('comments-detail', 'get', '/api/comments/{comment}/', 2),
+    Case('comments-replies', 'get', '/api/comments/{comment}/replies/', 3),
+    Case('comments-create', 'post', '/api/comments/', 5, body={'post': '{post}', 'content': 'Komentar'}),
+    Case('comments-update', 'put', '/api/comments/{comment}/', 4, user='author', body={
+        'post': '{post}', 'content': 'Edit',
+    }),
+    Case('comments-partial-update', 'patch', '/api/comments/{comment}/', 3, user='author', body={'content': 'Edit'}),
+    Case('comments-destroy', 'delete', '/api/comments/{spare_comment}/', 7, user='author'),
+    Case('comments-like', 'post', '/api/comments/{comment}/like/', 5),
+    Case('comments-unlike', 'post', '/api/comments/{comment}/like/', 5, user='spare'),
+    
+    # Notifications
+    Case('notifications-list', 'get', '/api/notifications/', 3),
+    Case('notifications-detail', 'get', '/api/notifications/{notification}/', 2),
+    Case('notifications-mark-read', 'post', '/api/notifications/{notification}/mark_read/', 3),
+    Case('notifications-mark-all-read', 'post', '/api/notifications/mark_all_read/', 2),
+    
+    # Broadcasts (admin)
+    Case('broadcasts-list', 'get', '/api/broadcasts/', 3, user='admin'),
+    Case('broadcasts-detail', 'get', '/api/broadcasts/{broadcast}/', 2, user='admin'),
+    Case('broadcasts-create', 'post', '/api/broadcasts/', 4, user='admin', body={
+        'subject': 'Info', 'message': 'Halo semua',
+    }),
+    Case('broadcasts-pause', 'post', '/api/broadcasts/{broadcast}/pause/', 3, user='admin'),
+    Case('broadcasts-resume', 'post', '/api/broadcasts/{paused_broadcast}/resume/', 4, user='admin'),
+    Case('broadcasts-cancel', 'post', '/api/broadcasts/{broadcast}/cancel/', 3, user='admin'),
+    
+    # Request profiles (admin)
+    Case('profiles-list', 'get', '/api/admin/profiles/', 3, user='admin'),
+    Case('profiles-detail', 'get', '/api/admin/profiles/{profile}/', 2, user='admin'),
+    Case('profiles-cpu', 'get', '/api/admin/profiles/{profile}/cpu/', 2, user='admin'),
+    Case('profiles-memory', 'get', '/api/admin/profiles/{profile}/memory/', 2, user='admin'),
+]
+
+
+def fill(value, fixtures):
+    if isinstance(value, dict):
+        return {key: fill(item, fixtures) for key, item in value.items()}
+    return value.format(**fixtures)
+
+
+@override_settings(
+    THROTTLE_DB_PURGE_PROBABILITY=0,
+    OTP_SWEEP_PROBABILITY=0,
+    REQUEST_TIMING_SAMPLE_RATE=0,
+    QUERY_LOG_ENABLED=False,
+)
+class QueryBudgetTests(TestCase):
+    """Jumlah query per endpoint konstan terhadap page size dan <= budget"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        password = make_password(PASSWORD)
+        
+        def user(username, **extra):
+            return User.objects.create(
+                username=username, email=f'{username}@example.com', password=password,
+                email_verified=True, **extra
+            )
+        
+        cls.users = {'admin': user('budget-admin', role='admin')}
+        likers = User.objects.bulk_create([
+            User(username=f'liker{index}', email=f'liker{index}@example.com', password=password)
+            for index in range(max(SIZES))
+        ])
+        
+        # Cukup row untuk page size terbesar di list global
+        Category.objects.bulk_create([
+            Category(name=f'Extra {index}', slug=f'extra-{index}', description='Extra')
+            for index in range(max(SIZES))
+        ])
+        EmailBroadcast.objects.bulk_create([
+            EmailBroadcast(subject=f'Broadcast {index}', message='Halo', created_by=cls.users['admin'])
+            for index in range(max(SIZES))
+        ])
+        RequestProfile.objects.bulk_create([
+            RequestProfile(
+                user=cls.users['admin'], method='GET', path='/api/posts/', route='PostViewSet.list',
+                status_code=200, duration_ms=1.0, cpu_folded='a;b 1', memory_folded='a.py:1 10',
+            )
+            for _ in range(max(SIZES))
+        ])
+        profile = RequestProfile.objects.first()
+        
+        cls.fixtures = {}
+        for size in SIZES:
+            author = cls.users[f'author{size}'] = user(f'author{size}')
+            reader = cls.users[f'reader{size}'] = user(f'reader{size}')
+            spare = cls.users[f'spare{size}'] = user(f'spare{size}')
+            member = user(f'member{size}')
+            spare_member = user(f'spare-member{size}')
+            
+            category = Category.objects.create(name=f'Category {size}', slug=f'cat-{size}', description='Test')
+            spare_category = Category.objects.create(name=f'Spare {size}', slug=f'spare-{size}', description='Test')
+            posts = Post.objects.bulk_create([
+                Post(title=f'Post {index}', slug=f'post-{size}-{index}', content='Isi', author=author, category=category)
+                for index in range(size)
+            ])
+            post = posts[0]
+            post.likes.add(*likers[:size])
+            # spare sudah like: like action = unlike
+            post.likes.add(spare)
+            PostAttachment.objects.bulk_create([
+                PostAttachment(post=post, file=f'attachments/{index}.jpg', filename=f'{index}.jpg', content_type='image/jpeg')
+                for index in range(size)
+            ])
+            spare_post = Post.objects.create(title='Spare', slug=f'spare-{size}', content='Isi', author=author, category=category)
+            
+            comments = Comment.objects.bulk_create([
+                Comment(post=post, author=liker, content='Komentar') for liker in likers[:size]
+            ])
+            comment = comments[0]
+            comment.author = author
+            comment.save(update_fields=['author'])
+            comment.likes.add(*likers[:size])
+            comment.likes.add(spare)
+            Comment.objects.bulk_create([
+                Comment(post=post, author=liker, parent=comment, content='Balasan') for liker in likers[:size]
+            ])
+            spare_comment = Comment.objects.create(post=post, author=author, content='Spare')
+            
+            notifications = Notification.objects.bulk_create([
+                Notification(recipient=reader, sender=liker, notification_type='like_post', post=post, message='Like')
+                for liker in likers[:size]
+            ])
+            broadcast = EmailBroadcast.objects.create(
+                subject='Queued', message='Halo', created_by=cls.users['admin'], status='queued'
+            )
+            paused_broadcast = EmailBroadcast.objects.create(
+                subject='Paused', message='Halo', created_by=cls.users['admin'], status='paused'
+            )
+            
+            cls.fixtures[size] = {
+                'size': size,
+                'author': author.pk,
+                'member': member.pk,
+                'spare_member': spare_member.pk,
+                'category': category.pk,
+                'category_slug': category.slug,
+                'spare_category_slug': spare_category.slug,
+                'post': post.pk,
+                'spare_post': spare_post.pk,
+                'comment': comment.pk,
+                'spare_comment': spare_comment.pk,
+                'notification': notifications[0].pk,
+                'broadcast': broadcast.pk,
+                'paused_broadcast': paused_broadcast.pk,
+                'profile': profile.pk,
+            }
+    
+    def setUp(self):
+        self.tokens = {
+            key: str(ForkaRefreshToken.for_user(user).access_token)
+            for key, user in self.users.items()
+        }
+    
+    def reset_state(self):
+        """Throttle counter & cache (token version, ...) dingin di setiap request"""
+        ThrottleCounter.objects.all().delete()
+        for alias in settings.CACHES:
+            caches[alias].clear()
+    
+    def request_queries(self, case, size):
+        user = case.user if case.user == 'admin' else f'{case.user}{size}'
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens[user]}')
+        fixtures = self.fixtures[size]
+        
+        self.reset_state()
+        with mock.patch.object(PageNumberPagination, 'page_size', size), \
+                CaptureQueriesContext(connection) as captured, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = getattr(client, case.method)(
+                fill(case.path, fixtures),
+                fill(case.body, fixtures) if case.body else None,
+                format='json',
+            )
+        
+        self.assertLess(
+            response.status_code, 400,
+            f"{case.name} (size {size}) returned {response.status_code}: {response.content[:500]!r}",
+        )
+        return [normalize_sql(query['sql']) for query in captured.captured_queries]
+    
+    def assertQueryBudget(self, case):
+        runs = {size: self.request_queries(case, size) for size in SIZES}
+        counts = {size: len(queries) for size, queries in runs.items()}
+        small, large = runs[min(SIZES)], runs[max(SIZES)]
+        
+        if len(set(counts.values())) > 1:
+            diff = '\n'.join(difflib.unified_diff(
+                small, large, f'size {min(SIZES)}', f'size {max(SIZES)}', lineterm='', n=1,
+            ))
+            self.fail(f"{case.name}: query count depends on page size {counts}\n{diff}")
+        
+        if counts[max(SIZES)] > case.budget:
+            listing = '\n'.join(
+                f"{'+' if index >= case.budget else ' '} {index + 1:>3}. {sql}"
+                for index, sql in enumerate(large)
+            )
+            self.fail(f"{case.name}: {counts[max(SIZES)]} queries, budget {case.budget}\n{listing}")
+
+
+def _budget_test(case):
+    def test(self):
+        self.assertQueryBudget(case)
+    test.__doc__ = f"{case.method.upper()} {case.path} <= {case.budget} queries"
+    return test
+
+
+for _case in ENDPOINTS:
+    setattr(QueryBudgetTests, f"test_{_case.name.replace('-', '_')}", _budget_test(_case))
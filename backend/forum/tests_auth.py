@@ -0,0 +1,425 @@
+# backend/forum/tests_auth.py
+"""
+Auth: login lockout, deploy check shared cache, JWT stateless + token_version,
+throttle logout, OTP store
+
+    python manage.py test forum.tests_auth
+"""
+
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+from django.db import transaction
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import lockout, otp
+from .authentication import ForkaRefreshToken, get_token_version
+from .checks import check_shared_caches
+from .models import OneTimeCode, User
+from .throttling import LoginRateThrottle, LogoutRateThrottle
+
+
+PASSWORD = 'Auth-Password-123'
+
+LOCMEM = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+REDIS = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'}
+DATABASE_CACHE = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'forka_cache'}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """check --deploy: state lintas worker di cache per proses / counter tanpa incr atomic"""
+    
+    def messages(self):
+        return [f'{error.id} {error.msg}' for error in check_shared_caches(None)]
+    
+    @override_settings(CACHES={'default': LOCMEM})
+    def test_locmem_is_reported(self):
+        messages = self.messages()
+        
+        self.assertIn("forum.E001 LOCKOUT_CACHE_ALIAS='default' uses LocMemCache, which is not shared between workers.", messages)
+        self.assertIn("forum.E001 TOKEN_VERSION_CACHE_ALIAS='default' uses LocMemCache, which is not shared between workers.", messages)
+    
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_dummy_cache_is_reported(self):
+        self.assertTrue(self.messages())
+    
+    @override_settings(CACHES={'default': REDIS})
+    def test_shared_cache_passes(self):
+        self.assertEqual(self.messages(), [])
+    
+    @override_settings(CACHES={'default': LOCMEM, 'shared': REDIS}, LOCKOUT_CACHE_ALIAS='shared', TOKEN_VERSION_CACHE_ALIAS='shared')
+    def test_throttle_counters_need_shared_cache(self):
+        self.assertEqual(self.messages(), [
+            "forum.E001 THROTTLE_CACHE_ALIAS='default' uses LocMemCache, which is not shared between workers.",
+        ])
+    
+    @override_settings(
+        CACHES={'default': LOCMEM, 'shared': REDIS}, LOCKOUT_CACHE_ALIAS='shared',
+        TOKEN_VERSION_CACHE_ALIAS='shared', THROTTLE_STORE='database',
+    )
+    def test_database_throttle_store_skips_throttle_alias(self):
+        self.assertEqual(self.messages(), [])
+    
+    @override_settings(CACHES={'default': DATABASE_CACHE, 'shared': REDIS}, TOKEN_VERSION_CACHE_ALIAS='default')
+    def test_counters_need_atomic_incr(self):
+        # token_version cuma get/set: DatabaseCache cukup, counter tidak
+        self.assertEqual(self.messages(), [
+            "forum.E002 LOCKOUT_CACHE_ALIAS='default' uses DatabaseCache, whose incr() is not atomic: concurrent requests lose counts.",
+            "forum.E002 THROTTLE_CACHE_ALIAS='default' uses DatabaseCache, whose incr() is not atomic: concurrent requests lose counts.",
+        ])
+    
+    @override_settings(DEBUG=False, CACHES={'default': LOCMEM})
+    def test_only_runs_with_deploy_flag(self):
+        # Commands biasa (migrate, check) tetap jalan dengan LocMem bawaan
+        call_command('check', stdout=StringIO())
+        with self.assertRaises(SystemCheckError):
+            call_command('check', deploy=True, stdout=StringIO(), stderr=StringIO())
+
+
+class LockoutTests(TestCase):
+    """Counter gagal login + lock window di shared cache, DB cuma saat terkunci"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='locked', email='locked@example.com', password=PASSWORD, email_verified=True
+        )
+    
+    def setUp(self):
+        caches[settings.LOCKOUT_CACHE_ALIAS].clear()
+    
+    def fail_logins(self, count):
+        results = [lockout.register_failed_login(self.user) for _ in range(count)]
+        return results[-1]
+    
+    def test_counter_below_threshold_does_not_write_db(self):
+        with self.assertNumQueries(0):
+            attempts, locked_until = self.fail_logins(settings.ACCOUNT_LOCKOUT_THRESHOLD - 1)
+        
+        self.assertEqual(attempts, settings.ACCOUNT_LOCKOUT_THRESHOLD - 1)
+        self.assertIsNone(locked_until)
+        self.assertIsNone(lockout.get_locked_until(self.user))
+    
+    def test_threshold_locks_account_and_persists_lock(self):
+        attempts, locked_until = self.fail_logins(settings.ACCOUNT_LOCKOUT_THRESHOLD)
+        
+        self.assertEqual(attempts, settings.ACCOUNT_LOCKOUT_THRESHOLD)
+        self.assertIsNotNone(locked_until)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_locked_until, locked_until)
+        
+        # Cache di-flush: lock tetap berlaku dari kolom DB
+        caches[settings.LOCKOUT_CACHE_ALIAS].clear()
+        self.assertEqual(lockout.get_locked_until(self.user), locked_until)
+    
+    def test_counter_is_shared_through_the_cache(self):
+        # Worker lain = instance User lain untuk row yang sama
+        for _ in range(settings.ACCOUNT_LOCKOUT_THRESHOLD - 1):
+            lockout.register_failed_login(User.objects.get(pk=self.user.pk))
+        
+        _, locked_until = lockout.register_failed_login(User.objects.get(pk=self.user.pk))
+        
+        self.assertIsNotNone(locked_until)
+        self.assertIsNotNone(lockout.get_locked_until(User.objects.get(pk=self.user.pk)))
+    
+    def test_clear_resets_cache_and_row(self):
+        self.fail_logins(settings.ACCOUNT_LOCKOUT_THRESHOLD)
+        self.user.refresh_from_db()
+        
+        lockout.clear_failed_logins(self.user)
+        
+        self.assertIsNone(lockout.get_locked_until(self.user))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.failed_login_attempts, 0)
+        self.assertIsNone(self.user.account_locked_until)
+    
+    @mock.patch.object(LoginRateThrottle, 'allow_request', return_value=True)
+    def test_login_view_rejects_correct_password_while_locked(self, allow_request):
+        client = APIClient()
+        for attempt in range(settings.ACCOUNT_LOCKOUT_THRESHOLD):
+            response = client.post('/api/auth/login/', {'username': 'locked', 'password': 'wrong'}, format='json')
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['attempts_remaining'], 0)
+        
+        response = client.post('/api/auth/login/', {'username': 'LOCKED', 'password': PASSWORD}, format='json')
+        
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('locked_until', response.data)
+
+
+class TokenVersionTests(TestCase):
+    """Token lama ditolak di semua worker setelah password/role/status aktif berubah"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='member', email='member@example.com', password=PASSWORD, email_verified=True
+        )
+    
+    def setUp(self):
+        caches[settings.TOKEN_VERSION_CACHE_ALIAS].clear()
+        self.token = str(ForkaRefreshToken.for_user(self.user).access_token)
+    
+    def get(self, token=None):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token or self.token}')
+        return client.get('/api/notifications/')
+    
+    def reload(self):
+        return User.objects.get(pk=self.user.pk)
+    
+    def test_warm_cache_authenticates_without_user_query(self):
+        get_token_version(self.user.pk)
+        
+        with mock.patch.object(User.objects, 'get', side_effect=AssertionError('user query')):
+            self.assertEqual(self.get().status_code, 200)
+    
+    def test_password_change_revokes_old_tokens(self):
+        self.assertEqual(self.get().status_code, 200)
+        
+        user = self.reload()
+        user.set_password('Another-Password-456')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        
+        self.assertEqual(self.get().status_code, 401)
+        self.assertEqual(get_token_version(user.pk), user.token_version)
+        fresh = str(ForkaRefreshToken.for_user(user).access_token)
+        self.assertEqual(self.get(fresh).status_code, 200)
+    
+    def test_role_change_revokes_old_role_claim(self):
+        self.get()
+        
+        user = self.reload()
+        user.role = 'admin'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(update_fields=['role'])
+        
+        self.assertEqual(self.get().status_code, 401)
+    
+    def test_deactivation_drops_cached_version(self):
+        self.get()
+        
+        user = self.reload()
+        user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(update_fields=['is_active'])
+        
+        self.assertIsNone(caches[settings.TOKEN_VERSION_CACHE_ALIAS].get(f'token_version:{user.pk}'))
+        self.assertIsNone(get_token_version(user.pk))
+        self.assertEqual(self.get().status_code, 401)
+    
+    def test_queryset_update_bumps_version(self):
+        self.get()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+        
+        self.assertEqual(self.reload().token_version, self.user.token_version + 1)
+        self.assertEqual(self.get().status_code, 401)
+    
+    def test_unrelated_queryset_update_keeps_version(self):
+        User.objects.filter(pk=self.user.pk).update(bio='Halo')
+        
+        self.assertEqual(self.reload().token_version, self.user.token_version)
+        self.assertEqual(self.get().status_code, 200)
+    
+    def test_rolled_back_change_is_not_published(self):
+        self.get()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                user = self.reload()
+                user.set_password('Another-Password-456')
+                user.save()
+                transaction.set_rollback(True)
+        
+        self.assertEqual(get_token_version(self.user.pk), self.user.token_version)
+        self.assertEqual(self.get().status_code, 200)
+    
+    def test_cached_version_expires_with_access_token(self):
+        cache = caches[settings.TOKEN_VERSION_CACHE_ALIAS]
+        
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            get_token_version(self.user.pk)
+        
+        lifetime = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+        self.assertEqual(cache_set.call_args.kwargs['timeout'], lifetime)
+
+
+@override_settings(THROTTLE_STORE='cache')
+class LogoutThrottleTests(TestCase):
+    """Logout punya bucket sendiri, per user (bukan per IP bersama verifikasi email)"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'nat{index}', email=f'nat{index}@example.com', password=PASSWORD)
+            for index in range(2)
+        ]
+    
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        self.client = APIClient(REMOTE_ADDR='10.1.2.3')
+    
+    def logout(self, user):
+        refresh = str(ForkaRefreshToken.for_user(user))
+        return self.client.post('/api/auth/logout/', {'refresh': refresh}, format='json')
+    
+    @mock.patch.object(LogoutRateThrottle, 'THROTTLE_RATES', {'logout': '2/hour'})
+    def test_limit_is_per_user_behind_one_ip(self):
+        statuses = [self.logout(self.users[0]).status_code for _ in range(3)]
+        other = self.logout(self.users[1]).status_code
+        
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(other, 200)
+    
+    def test_logout_does_not_use_verification_bucket(self):
+        for _ in range(12):
+            self.assertEqual(self.logout(self.users[0]).status_code, 200)
+        
+        response = self.client.post('/api/auth/resend-code/', {'email': 'nobody@example.com'}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+    
+    def test_invalid_token_is_keyed_by_ip(self):
+        throttle = LogoutRateThrottle()
+        request = mock.Mock(data={'refresh': 'garbage'}, META={'REMOTE_ADDR': '10.1.2.3'})
+        
+        self.assertEqual(throttle.get_cache_key(request, None), 'throttle_logout_10.1.2.3')
+
+
+class UserAdminRouteTests(TestCase):
+    """Create/update/delete di /api/users/ cuma admin, bukan sembarang user login"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = User.objects.create_user(username='member', email='member@example.com', password=PASSWORD)
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password=PASSWORD)
+        cls.admin = User.objects.create_user(
+            username='boss', email='boss@example.com', password=PASSWORD, role='admin'
+        )
+    
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        self.client = APIClient()
+    
+    def test_member_cannot_change_other_users(self):
+        self.client.force_authenticate(self.member)
+        
+        self.assertEqual(self.client.patch(f'/api/users/{self.other.pk}/', {'role': 'admin'}).status_code, 403)
+        self.assertEqual(self.client.delete(f'/api/users/{self.other.pk}/').status_code, 403)
+        self.assertEqual(self.client.post('/api/users/', {'username': 'x', 'email': 'x@example.com'}).status_code, 403)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.role, 'user')
+    
+    def test_admin_manages_users(self):
+        self.client.force_authenticate(self.admin)
+        
+        self.assertEqual(self.client.patch(f'/api/users/{self.other.pk}/', {'bio': 'Edit'}).status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/users/{self.other.pk}/').status_code, 204)
+        self.assertFalse(User.objects.filter(pk=self.other.pk).exists())
+
+
+class OTPStoreMixin:
+    """Test yang sama untuk kedua OTP store"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='otp', email='otp@example.com', password=PASSWORD)
+    
+    def setUp(self):
+        caches[settings.OTP_CACHE_ALIAS].clear()
+        self.code = otp.issue_code(otp.PURPOSE_VERIFY_EMAIL, self.user)
+    
+    def verify(self, code, consume=True):
+        return otp.verify_code(otp.PURPOSE_VERIFY_EMAIL, self.user, code, consume=consume)
+    
+    def wrong(self):
+        return '000000' if self.code != '000000' else '111111'
+    
+    def test_valid_code_is_single_use(self):
+        self.assertEqual(self.verify(self.code), otp.VALID)
+        self.assertEqual(self.verify(self.code), otp.EXPIRED)
+    
+    def test_check_without_consume_keeps_code(self):
+        self.assertEqual(self.verify(self.code, consume=False), otp.VALID)
+        self.assertEqual(self.verify(self.code), otp.VALID)
+    
+    def test_new_code_replaces_old(self):
+        old = self.code
+        self.code = otp.issue_code(otp.PURPOSE_VERIFY_EMAIL, self.user)
+        
+        if old != self.code:
+            self.assertEqual(self.verify(old), otp.INVALID)
+        self.assertEqual(self.verify(self.code), otp.VALID)
+    
+    def test_max_attempts_locks_code(self):
+        results = [self.verify(self.wrong()) for _ in range(settings.OTP_MAX_ATTEMPTS)]
+        
+        self.assertEqual(results, [otp.INVALID] * settings.OTP_MAX_ATTEMPTS)
+        # Percobaan berikutnya terkunci, walaupun kodenya benar
+        self.assertEqual(self.verify(self.code), otp.LOCKED)
+        self.assertEqual(self.verify(self.code), otp.EXPIRED)
+    
+    def test_double_submit_consumes_once(self):
+        # Request paralel memakai kode yang sama di antara cek hash dan penghapusan
+        def compare_then_consumed_elsewhere(stored, given):
+            otp.get_otp_store().delete(otp.PURPOSE_VERIFY_EMAIL, self.user.pk)
+            return True
+        
+        with mock.patch('forum.otp.hmac.compare_digest', side_effect=compare_then_consumed_elsewhere):
+            self.assertEqual(self.verify(self.code), otp.EXPIRED)
+
+
+class DatabaseOTPStoreTests(OTPStoreMixin, TestCase):
+    """OTP_STORE = 'database' (default)"""
+    
+    def test_expired_code(self):
+        OneTimeCode.objects.filter(user=self.user).update(expires_at=timezone.now())
+        
+        self.assertEqual(self.verify(self.code), otp.EXPIRED)
+        self.assertFalse(OneTimeCode.objects.filter(user=self.user).exists())
+    
+    def test_attempt_limit_is_checked_by_the_update(self):
+        update = QuerySet.update
+        
+        def parallel_guesses_first(queryset, **kwargs):
+            # Tebakan paralel lain menaikkan counter sampai batas tepat sebelum UPDATE ini
+            if queryset.model is OneTimeCode:
+                update(OneTimeCode.objects.filter(user=self.user), attempts=settings.OTP_MAX_ATTEMPTS)
+            return update(queryset, **kwargs)
+        
+        with mock.patch.object(QuerySet, 'update', parallel_guesses_first):
+            self.assertEqual(self.verify(self.code), otp.LOCKED)
+        self.assertFalse(OneTimeCode.objects.filter(user=self.user).exists())
+    
+    def test_wrong_guess_is_counted_before_the_hash_check(self):
+        OneTimeCode.objects.filter(user=self.user).update(attempts=settings.OTP_MAX_ATTEMPTS - 1)
+        
+        self.assertEqual(self.verify(self.wrong()), otp.INVALID)
+        self.assertEqual(OneTimeCode.objects.get(user=self.user).attempts, settings.OTP_MAX_ATTEMPTS)
+        self.assertEqual(self.verify(self.code), otp.LOCKED)
+
+
+@override_settings(OTP_STORE='cache')
+class CacheOTPStoreTests(OTPStoreMixin, TestCase):
+    """OTP_STORE = 'cache'"""
+    
+    def test_expired_code(self):
+        caches[settings.OTP_CACHE_ALIAS].clear()
+        
+        self.assertEqual(self.verify(self.code), otp.EXPIRED)
+    
+    @override_settings(CACHES={'default': LOCMEM}, OTP_STORE='cache')
+    def test_cache_store_needs_shared_cache(self):
+        messages = [error.msg for error in check_shared_caches(None)]
+        
+        self.assertIn("OTP_CACHE_ALIAS='default' uses LocMemCache, which is not shared between workers.", messages)
@@ -0,0 +1,96 @@
+# backend/forum/tests_availability.py
+"""
+Lookup case-insensitive + GET /api/auth/availability/
+
+    python manage.py test forum.tests_availability
+"""
+
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import FieldError
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .availability import availability_filter
+from .models import Category, User
+from .throttling import AvailabilityEmailRateThrottle
+
+
+class LowerLookupTests(TestCase):
+    """__lower cuma terdaftar di User.username / User.email"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Budi', email='Budi@Example.com', password='x')
+    
+    def test_user_fields_match_case_insensitively(self):
+        self.assertEqual(User.objects.get_by_username('BUDI'), self.user)
+        self.assertEqual(User.objects.get_by_email('budi@example.COM'), self.user)
+    
+    # Tabel kecil di PostgreSQL bisa tetap seq scan, plan cuma stabil di SQLite
+    @skipUnless(connection.vendor == 'sqlite', 'query plan check is SQLite-specific')
+    def test_email_lookup_uses_partial_index(self):
+        plan = User.objects.with_email('budi@example.com').explain()
+        
+        self.assertIn('forum_user_email_ci_uniq', plan)
+    
+    def test_blank_email_never_matches(self):
+        User.objects.create_user(username='noemail1', email='', password='x')
+        User.objects.create_user(username='noemail2', email='', password='x')
+        
+        self.assertFalse(User.objects.with_email('').exists())
+        with self.assertRaises(User.DoesNotExist):
+            User.objects.get_by_email('  ')
+    
+    def test_other_char_fields_are_untouched(self):
+        with self.assertRaises(FieldError):
+            Category.objects.filter(name__lower='news').exists()
+        with self.assertRaises(FieldError):
+            User.objects.filter(first_name__lower='budi').exists()
+
+
+class AvailabilityViewTests(TestCase):
+    """Username murah (60/menit), email dibatasi keras (enumerasi akun)"""
+    
+    URL = '/api/auth/availability/'
+    
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(username='taken', email='taken@example.com', password='x')
+    
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        availability_filter.rebuild()
+        self.client = APIClient(REMOTE_ADDR='10.2.3.4')
+    
+    def test_reports_taken_and_free_values(self):
+        response = self.client.get(self.URL, {'username': 'TAKEN', 'email': 'free@example.com'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['username']['available'])
+        self.assertTrue(response.data['email']['available'])
+    
+    def test_requires_username_or_email(self):
+        self.assertEqual(self.client.get(self.URL).status_code, 400)
+    
+    @mock.patch.object(AvailabilityEmailRateThrottle, 'THROTTLE_RATES', {'availability_email': '2/hour'})
+    def test_email_checks_have_their_own_strict_limit(self):
+        statuses = [
+            self.client.get(self.URL, {'email': f'guess{index}@example.com'}).status_code
+            for index in range(3)
+        ]
+        
+        self.assertEqual(statuses, [200, 200, 429])
+        # Cek username tidak ikut kena limit email
+        self.assertEqual(self.client.get(self.URL, {'username': 'someone'}).status_code, 200)
+    
+    @mock.patch.object(AvailabilityEmailRateThrottle, 'THROTTLE_RATES', {'availability_email': '1/hour'})
+    def test_email_limit_applies_to_authenticated_users(self):
+        self.client.force_authenticate(User.objects.get(username='taken'))
+        
+        statuses = [self.client.get(self.URL, {'email': 'x@example.com'}).status_code for _ in range(2)]
+        
+        self.assertEqual(statuses, [200, 429])
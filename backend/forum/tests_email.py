@@ -0,0 +1,378 @@
+# backend/forum/tests_email.py
+"""
+Outbox email transaksional + worker `send_queued_emails`, broadcast admin
++ worker `send_broadcasts`
+
+Test runner Django memakai backend locmem (django.core.mail.outbox) sebagai
+pengganti SMTP lokal; kegagalan SMTP disimulasikan dengan FailingBackend.
+
+    python manage.py test forum.tests_email
+"""
+
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .email_utils import (
+    claim_broadcast, claim_pending_emails, deliver_broadcast, deliver_outbox, queue_broadcast, queue_email,
+    send_password_reset_email, send_verification_email,
+)
+from .models import EmailBroadcast, EmailOutbox, User
+
+
+class FailingBackend(BaseEmailBackend):
+    """Backend email yang selalu gagal (server SMTP down)"""
+    
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError('SMTP unavailable')
+
+
+class OfflineBackend(BaseEmailBackend):
+    """Backend email yang bahkan tidak bisa membuka koneksi"""
+    
+    def open(self):
+        raise ConnectionRefusedError('SMTP unavailable')
+    
+    def send_messages(self, email_messages):
+        raise AssertionError('send without an open connection')
+
+
+def broken_insert(**kwargs):
+    """INSERT yang gagal di level DB, transaksi ditandai rusak seperti Model.save()"""
+    with transaction.mark_for_rollback_on_error(), connection.cursor() as cursor:
+        cursor.execute('INSERT INTO forum_missing_table VALUES (1)')
+
+
+class QueueEmailTests(TestCase):
+    """Email auth masuk outbox di transaksi caller, tidak langsung dikirim"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='mailer', email='mailer@example.com', password='x')
+    
+    def test_verification_email_is_queued_not_sent(self):
+        self.assertTrue(send_verification_email(self.user, '123456'))
+        
+        item = EmailOutbox.objects.get()
+        self.assertEqual(item.to_email, 'mailer@example.com')
+        self.assertEqual(item.status, 'pending')
+        self.assertIn('123456', item.body)
+        self.assertIn('123456', item.html_body)
+        self.assertEqual(mail.outbox, [])
+    
+    def test_queued_email_rolls_back_with_caller(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                queue_email('a@example.com', 'Subject', 'Body')
+                raise RuntimeError('request failed')
+        
+        self.assertFalse(EmailOutbox.objects.exists())
+    
+    def test_failed_insert_keeps_caller_transaction_usable(self):
+        with transaction.atomic():
+            with mock.patch.object(EmailOutbox.objects, 'create', side_effect=broken_insert):
+                self.assertFalse(send_verification_email(self.user, '123456'))
+                self.assertFalse(send_password_reset_email(self.user, '654321'))
+            # Tanpa savepoint di queue_email, query ini raise TransactionManagementError
+            self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+    
+    def test_database_error_propagates_from_queue_email(self):
+        with mock.patch.object(EmailOutbox.objects, 'create', side_effect=broken_insert):
+            with self.assertRaises(DatabaseError):
+                queue_email('a@example.com', 'Subject', 'Body')
+        
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+class DeliverOutboxTests(TestCase):
+    """Batch outbox: kirim, retry dengan backoff, reclaim lock worker mati"""
+    
+    @override_settings(EMAIL_HOST_USER='noreply@forka.test')
+    def test_pending_email_is_sent_and_marked(self):
+        item = queue_email('a@example.com', 'Subject', 'Body', '<p>Body</p>')
+        
+        self.assertEqual(deliver_outbox(), (1, 0))
+        
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['a@example.com'])
+        self.assertEqual(message.from_email, 'noreply@forka.test')
+        self.assertEqual(message.alternatives[0][1], 'text/html')
+        
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'sent')
+        self.assertEqual(item.attempts, 1)
+        self.assertIsNotNone(item.sent_at)
+        self.assertIsNone(item.locked_at)
+        # Kode OTP di isi email tidak disimpan setelah terkirim
+        self.assertEqual((item.body, item.html_body), ('', ''))
+    
+    def test_sent_email_is_not_delivered_twice(self):
+        queue_email('a@example.com', 'Subject', 'Body')
+        deliver_outbox()
+        
+        self.assertEqual(deliver_outbox(), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+    
+    def test_email_not_due_yet_is_skipped(self):
+        item = queue_email('a@example.com', 'Subject', 'Body')
+        EmailOutbox.objects.filter(pk=item.pk).update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        
+        self.assertEqual(deliver_outbox(), (0, 0))
+    
+    def test_batch_size_limits_one_run(self):
+        for index in range(3):
+            queue_email(f'user{index}@example.com', 'Subject', 'Body')
+        
+        self.assertEqual(deliver_outbox(batch_size=2), (2, 0))
+        self.assertEqual(deliver_outbox(batch_size=2), (1, 0))
+    
+    @override_settings(EMAIL_BACKEND='forum.tests_email.FailingBackend')
+    def test_failed_send_is_retried_with_backoff(self):
+        item = queue_email('a@example.com', 'Subject', 'Body')
+        before = timezone.now()
+        
+        self.assertEqual(deliver_outbox(), (0, 1))
+        
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'pending')
+        self.assertEqual(item.attempts, 1)
+        self.assertIn('SMTP unavailable', item.last_error)
+        self.assertGreaterEqual(item.next_attempt_at, before + timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_BASE))
+        
+        # Belum jatuh tempo: tidak dicoba lagi
+        self.assertEqual(deliver_outbox(), (0, 0))
+    
+    @override_settings(EMAIL_BACKEND='forum.tests_email.FailingBackend')
+    def test_email_fails_permanently_after_max_attempts(self):
+        item = queue_email('a@example.com', 'Subject', 'Body')
+        EmailOutbox.objects.filter(pk=item.pk).update(attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS - 1)
+        
+        deliver_outbox()
+        
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'failed')
+        self.assertEqual(item.attempts, settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+    
+    def test_stale_sending_email_is_reclaimed(self):
+        item = queue_email('a@example.com', 'Subject', 'Body')
+        stale = timezone.now() - timedelta(seconds=settings.EMAIL_OUTBOX_LOCK_TIMEOUT + 1)
+        EmailOutbox.objects.filter(pk=item.pk).update(status='sending', locked_at=stale)
+        
+        self.assertEqual(deliver_outbox(), (1, 0))
+    
+    def test_email_locked_by_live_worker_is_left_alone(self):
+        item = queue_email('a@example.com', 'Subject', 'Body')
+        EmailOutbox.objects.filter(pk=item.pk).update(status='sending', locked_at=timezone.now())
+        
+        self.assertEqual(deliver_outbox(), (0, 0))
+    
+    def test_slow_batch_renews_its_lease(self):
+        for index in range(2):
+            queue_email(f'user{index}@example.com', 'Subject', 'Body')
+        stale = timezone.now() - timedelta(seconds=settings.EMAIL_OUTBOX_LOCK_TIMEOUT + 1)
+        reclaimed = []
+        
+        def slow_send(connection, message, kind):
+            if not reclaimed:
+                # Email pertama makan waktu lebih lama dari lease
+                EmailOutbox.objects.filter(status='sending').update(locked_at=stale)
+            reclaimed.append(claim_pending_emails())
+            return 1
+        
+        with mock.patch('forum.email_utils._send', side_effect=slow_send):
+            self.assertEqual(deliver_outbox(), (2, 0))
+        
+        # Worker lain tidak mengambil email kedua di tengah batch
+        self.assertEqual(reclaimed[1], [])
+
+
+class PurgeEmailOutboxCommandTests(TestCase):
+    """manage.py purge_email_outbox: baris terkirim / gagal lama dihapus"""
+    
+    def test_purges_old_sent_and_failed_rows(self):
+        old = timezone.now() - timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS + 1)
+        old_sent = queue_email('a@example.com', 'Subject', 'Body')
+        old_failed = queue_email('b@example.com', 'Subject', 'Body')
+        recent_sent = queue_email('c@example.com', 'Subject', 'Body')
+        old_pending = queue_email('d@example.com', 'Subject', 'Body')
+        EmailOutbox.objects.filter(pk=old_sent.pk).update(status='sent', sent_at=old)
+        EmailOutbox.objects.filter(pk=old_failed.pk).update(status='failed', created_at=old)
+        EmailOutbox.objects.filter(pk=recent_sent.pk).update(status='sent', sent_at=timezone.now())
+        EmailOutbox.objects.filter(pk=old_pending.pk).update(created_at=old)
+        out = StringIO()
+        
+        call_command('purge_email_outbox', stdout=out)
+        
+        self.assertIn('Purged 2 outbox emails', out.getvalue())
+        self.assertEqual(set(EmailOutbox.objects.values_list('pk', flat=True)), {recent_sent.pk, old_pending.pk})
+
+
+class SendQueuedEmailsCommandTests(TestCase):
+    """manage.py send_queued_emails (cron --once dan loop worker)"""
+    
+    def test_once_delivers_one_batch(self):
+        queue_email('a@example.com', 'Subject', 'Body')
+        queue_email('b@example.com', 'Subject', 'Body')
+        out = StringIO()
+        
+        call_command('send_queued_emails', '--once', stdout=out)
+        
+        self.assertIn('Sent: 2, failed: 0', out.getvalue())
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['a@example.com', 'b@example.com'])
+    
+    def test_worker_loop_reuses_connection_until_interrupted(self):
+        queue_email('a@example.com', 'Subject', 'Body')
+        out = StringIO()
+        
+        # Loop kedua: outbox kosong -> sleep, di-interrupt seperti Ctrl+C
+        with mock.patch('forum.management.commands.send_queued_emails.time.sleep', side_effect=KeyboardInterrupt):
+            call_command('send_queued_emails', stdout=out)
+        
+        self.assertIn('Sent: 1, failed: 0', out.getvalue())
+        self.assertIn('Outbox worker stopped', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@mock.patch('forum.email_utils.time.sleep')
+class BroadcastTests(TestCase):
+    """Broadcast admin: batch + cursor, pause/cancel dari admin dihormati worker"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', role='admin')
+        User.objects.bulk_create([
+            User(username=f'member{index}', email=f'member{index}@example.com', email_verified=True)
+            for index in range(5)
+        ])
+        # Bukan penerima: belum verifikasi, tidak aktif, tanpa email
+        User.objects.create(username='unverified', email='unverified@example.com')
+        User.objects.create(username='inactive', email='inactive@example.com', email_verified=True, is_active=False)
+        User.objects.create(username='noemail', email='', email_verified=True)
+    
+    def claimed_broadcast(self):
+        queue_broadcast(EmailBroadcast.objects.create(subject='Info', message='Halo', created_by=self.admin))
+        return claim_broadcast()
+    
+    def test_queue_counts_verified_active_recipients(self, sleep):
+        broadcast = queue_broadcast(EmailBroadcast.objects.create(subject='Info', message='Halo'))
+        
+        self.assertEqual(broadcast.status, 'queued')
+        self.assertEqual(broadcast.total_recipients, 5)
+    
+    def test_delivers_one_email_per_recipient_and_completes(self, sleep):
+        broadcast = self.claimed_broadcast()
+        
+        self.assertEqual(deliver_broadcast(broadcast, batch_size=2, rate=1000), 'completed')
+        
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [
+            f'member{index}@example.com' for index in range(5)
+        ])
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'completed')
+        self.assertEqual((broadcast.sent_count, broadcast.failed_count), (5, 0))
+        self.assertEqual(broadcast.progress, 100)
+        self.assertIsNotNone(broadcast.finished_at)
+    
+    def test_resumes_from_cursor(self, sleep):
+        broadcast = self.claimed_broadcast()
+        third = User.objects.filter(username='member2').values_list('pk', flat=True).get()
+        EmailBroadcast.objects.filter(pk=broadcast.pk).update(last_user_id=third, sent_count=3)
+        broadcast.refresh_from_db()
+        
+        deliver_broadcast(broadcast, batch_size=2, rate=1000)
+        
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [
+            'member3@example.com', 'member4@example.com',
+        ])
+        self.assertEqual(broadcast.sent_count, 5)
+    
+    def test_pause_between_batches_stops_delivery(self, sleep):
+        broadcast = self.claimed_broadcast()
+        sent = []
+        
+        def send_then_pause(connection, message, kind):
+            sent.append(message)
+            if len(sent) == 2:
+                EmailBroadcast.objects.filter(pk=broadcast.pk).update(status='paused')
+            return 1
+        
+        with mock.patch('forum.email_utils._send', side_effect=send_then_pause):
+            self.assertEqual(deliver_broadcast(broadcast, batch_size=2, rate=1000), 'paused')
+        
+        self.assertEqual(len(sent), 2)
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'paused')
+        self.assertEqual(broadcast.sent_count, 2)
+    
+    def test_cancel_during_last_batch_is_not_overwritten(self, sleep):
+        broadcast = self.claimed_broadcast()
+        sent = []
+        
+        def send_then_cancel(connection, message, kind):
+            sent.append(message)
+            if len(sent) == 5:
+                EmailBroadcast.objects.filter(pk=broadcast.pk).update(status='cancelled', finished_at=timezone.now())
+            return 1
+        
+        with mock.patch('forum.email_utils._send', side_effect=send_then_cancel):
+            self.assertEqual(deliver_broadcast(broadcast, batch_size=10, rate=1000), 'cancelled')
+        
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'cancelled')
+        self.assertEqual(broadcast.sent_count, 5)
+    
+    @override_settings(EMAIL_BACKEND='forum.tests_email.FailingBackend')
+    def test_failed_recipients_are_counted(self, sleep):
+        broadcast = self.claimed_broadcast()
+        
+        self.assertEqual(deliver_broadcast(broadcast, batch_size=2, rate=1000), 'completed')
+        
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.sent_count, broadcast.failed_count), (0, 5))
+        self.assertIn('SMTP unavailable', broadcast.last_error)
+    
+    @override_settings(EMAIL_BACKEND='forum.tests_email.OfflineBackend')
+    def test_smtp_unavailable_pauses_at_cursor(self, sleep):
+        broadcast = self.claimed_broadcast()
+        
+        self.assertEqual(deliver_broadcast(broadcast, batch_size=2, rate=1000), 'paused')
+        
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'paused')
+        self.assertEqual(broadcast.last_user_id, 0)
+        self.assertIn('SMTP unavailable', broadcast.last_error)
+    
+    def test_rate_limit_sleeps_between_batches(self, sleep):
+        broadcast = self.claimed_broadcast()
+        
+        deliver_broadcast(broadcast, batch_size=5, rate=1)
+        
+        sleep.assert_called_once()
+        self.assertGreater(sleep.call_args[0][0], 4)
+    
+    def test_stale_sending_broadcast_is_reclaimed(self, sleep):
+        broadcast = self.claimed_broadcast()
+        self.assertIsNone(claim_broadcast())
+        
+        stale = timezone.now() - timedelta(seconds=settings.EMAIL_BROADCAST_LOCK_TIMEOUT + 1)
+        EmailBroadcast.objects.filter(pk=broadcast.pk).update(heartbeat_at=stale)
+        
+        self.assertEqual(claim_broadcast().pk, broadcast.pk)
+    
+    def test_command_once_sends_queued_broadcasts(self, sleep):
+        queue_broadcast(EmailBroadcast.objects.create(subject='Info', message='Halo', created_by=self.admin))
+        out = StringIO()
+        
+        call_command('send_broadcasts', '--once', '--rate', '1000', stdout=out)
+        
+        self.assertIn('completed: 5 sent, 0 failed', out.getvalue())
+        self.assertEqual(len(mail.outbox), 5)
@@ -0,0 +1,157 @@
+# backend/forum/tests_hashing.py
+"""
+Password hashing pool + async auth views
+
+    python manage.py test forum.tests_hashing
+"""
+
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .authentication import ForkaRefreshToken
+from .hashing import HashingPool, PasswordHashingBusy, check_password
+from .models import User
+
+
+PASSWORD = 'Hash-Password-123'
+
+# Hasher lama di urutan kedua: hash-nya valid tapi must_update=True
+UPGRADE_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+
+class HashingPoolTests(SimpleTestCase):
+    """Job (jalan + antri) dibatasi, pool penuh langsung ditolak"""
+    
+    def test_full_pool_rejects_immediately(self):
+        pool = HashingPool(workers=1, queue_depth=1)
+        release = threading.Event()
+        running = [pool.submit(release.wait) for _ in range(2)]
+        
+        with self.assertRaises(PasswordHashingBusy):
+            pool.submit(release.wait)
+        
+        release.set()
+        for future in running:
+            future.result(timeout=5)
+        # Slot kembali setelah job selesai (callback jalan di thread pool)
+        pool.executor.shutdown(wait=True)
+        self.assertTrue(pool._slots.acquire(blocking=False))
+    
+    def test_failed_job_releases_slot(self):
+        pool = HashingPool(workers=1, queue_depth=0)
+        
+        with self.assertRaises(ZeroDivisionError):
+            pool.submit(lambda: 1 / 0).result(timeout=5)
+        
+        self.assertEqual(pool.submit(lambda: 42).result(timeout=5), 42)
+
+
+class CheckPasswordTests(TestCase):
+    """check_password lewat pool + rehash transparan"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='hasher', email='hasher@example.com', password=PASSWORD)
+    
+    def test_correct_and_wrong_password(self):
+        self.assertTrue(check_password(self.user, PASSWORD))
+        self.assertFalse(check_password(self.user, 'wrong'))
+    
+    @override_settings(PASSWORD_HASHERS=UPGRADE_HASHERS)
+    def test_outdated_hash_is_upgraded_without_revoking_tokens(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password(PASSWORD, hasher='pbkdf2_sha1'))
+        user = User.objects.get(pk=self.user.pk)
+        version = user.token_version
+        
+        self.assertTrue(check_password(user, PASSWORD))
+        
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+        self.assertEqual(user.token_version, version)
+
+
+class AsyncAuthViewTests(TestCase):
+    """POST /api/auth/async/login/ dan /api/auth/async/change-password/"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='asyncuser', email='asyncuser@example.com', password=PASSWORD, email_verified=True
+        )
+    
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+    
+    def post(self, path, data, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        return self.client.post(path, data, content_type='application/json', **headers)
+    
+    def test_login_returns_tokens(self):
+        response = self.post('/api/auth/async/login/', {'username': 'ASYNCUSER', 'password': PASSWORD})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['username'], 'asyncuser')
+        self.assertIn('access', response.json()['tokens'])
+    
+    def test_login_wrong_password_counts_attempt(self):
+        response = self.post('/api/auth/async/login/', {'username': 'asyncuser', 'password': 'wrong'})
+        
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['attempts_remaining'], settings.ACCOUNT_LOCKOUT_THRESHOLD - 1)
+    
+    def test_login_rejects_invalid_json(self):
+        response = self.client.post('/api/auth/async/login/', 'not json', content_type='application/json')
+        
+        self.assertEqual(response.status_code, 400)
+    
+    def test_busy_pool_returns_503_with_retry_after(self):
+        with mock.patch('forum.views_auth_async.acheck_password', side_effect=PasswordHashingBusy()):
+            response = self.post('/api/auth/async/login/', {'username': 'asyncuser', 'password': PASSWORD})
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+    
+    def test_login_is_throttled_in_login_scope(self):
+        with mock.patch('forum.views_auth_async.LoginRateThrottle.allow_request', return_value=False):
+            response = self.post('/api/auth/async/login/', {'username': 'asyncuser', 'password': PASSWORD})
+        
+        self.assertEqual(response.status_code, 429)
+    
+    def test_change_password_revokes_old_token(self):
+        token = str(ForkaRefreshToken.for_user(self.user).access_token)
+        
+        response = self.post('/api/auth/async/change-password/', {
+            'old_password': PASSWORD,
+            'new_password': 'Another-Password-456',
+            'new_password2': 'Another-Password-456',
+        }, token=token)
+        
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.check_password('Another-Password-456'))
+        self.assertEqual(user.token_version, self.user.token_version + 1)
+    
+    def test_change_password_wrong_old_password(self):
+        token = str(ForkaRefreshToken.for_user(self.user).access_token)
+        
+        response = self.post('/api/auth/async/change-password/', {
+            'old_password': 'wrong',
+            'new_password': 'Another-Password-456',
+            'new_password2': 'Another-Password-456',
+        }, token=token)
+        
+        self.assertEqual(response.status_code, 400)
+    
+    def test_change_password_requires_token(self):
+        response = self.post('/api/auth/async/change-password/', {'old_password': PASSWORD})
+        
+        self.assertEqual(response.status_code, 401)
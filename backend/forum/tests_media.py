@@ -0,0 +1,887 @@
+# backend/forum/tests_media.py
+"""
+Media: image pipeline + content-addressed storage
+
+    python manage.py test forum.tests_media
+"""
+
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+try:
+    from botocore.exceptions import ClientError
+except ImportError:
+    ClientError = None
+
+from . import images
+from .media_gc import collect_orphans, recount_blobs
+from .media_urls import file_url, media_url
+from .models import (
+    IMAGE_FAILED, IMAGE_PENDING, IMAGE_READY, Category, MediaBlob, Post, PostAttachment, UploadSession, User,
+)
+from .storage import ContentAddressedS3Storage, blob_digest, blob_name
+from .throttling import UploadChunkRateThrottle, UploadRateThrottle
+from .uploads import StreamingImageUploadHandler, UploadRejected, verify_direct_upload
+
+
+def jpeg_bytes(size=(64, 48), color=(200, 30, 30), exif=True):
+    """JPEG kecil, opsional dengan EXIF (orientasi + model kamera)"""
+    buffer = BytesIO()
+    image = Image.new('RGB', size, color)
+    if exif:
+        tags = Image.Exif()
+        tags[0x0112] = 6  # Orientation: rotate 90
+        tags[0x0110] = 'Test Camera'
+        image.save(buffer, format='JPEG', exif=tags)
+    else:
+        image.save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class MediaRootMixin:
+    """MEDIA_ROOT sementara per test class"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls._media_root = tempfile.mkdtemp()
+        cls._media_override = override_settings(MEDIA_ROOT=cls._media_root)
+        cls._media_override.enable()
+        super().setUpClass()
+    
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_override.disable()
+        shutil.rmtree(cls._media_root, ignore_errors=True)
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=(16, 32))
+class ProcessPendingTests(MediaRootMixin, TestCase):
+    """Worker process_images: simpan dulu, lepas referensi lama setelah commit"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='painter', email='painter@example.com', password='x')
+    
+    def make_post(self, data):
+        name = default_storage.save('posts/photo.jpg', ContentFile(data))
+        return Post.objects.create(
+            title='Foto', slug=f'foto-{Post.objects.count()}', content='Isi',
+            author=self.author, image=name, image_status=IMAGE_PENDING,
+        )
+    
+    def refs(self, name):
+        blob = MediaBlob.objects.filter(name=name).first()
+        return blob.ref_count if blob else 0
+    
+    def test_strips_exif_and_releases_original_after_commit(self):
+        post = self.make_post(jpeg_bytes())
+        original = post.image.name
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(images.process_pending(Post, 'image'), (1, 0))
+        
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, IMAGE_READY)
+        self.assertNotEqual(post.image.name, original)
+        self.assertEqual(self.refs(original), 0)
+        self.assertEqual(self.refs(post.image.name), 1)
+        # Orientasi diterapkan (64x48 diputar), EXIF hilang
+        self.assertEqual((post.image_width, post.image_height), (48, 64))
+        with default_storage.open(post.image.name) as fh:
+            self.assertFalse(Image.open(fh).getexif())
+        self.assertEqual(sorted(post.image_variants), ['16', '32'])
+        for name in post.image_variants.values():
+            self.assertEqual(self.refs(name), 1)
+    
+    def test_failure_keeps_original_referenced(self):
+        post = self.make_post(jpeg_bytes())
+        original = post.image.name
+        
+        with mock.patch.object(images, '_webp_variant', side_effect=OSError('disk full')):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.assertEqual(images.process_pending(Post, 'image'), (0, 1))
+        
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, IMAGE_FAILED)
+        self.assertEqual(post.image.name, original)
+        self.assertEqual(self.refs(original), 1)
+        self.assertTrue(default_storage.exists(original))
+        # Original tanpa EXIF yang sempat disimpan dilepas lagi
+        self.assertEqual(MediaBlob.objects.filter(ref_count__gt=0).count(), 1)
+        self.assertEqual(callbacks, [])
+    
+    def test_reupload_during_processing_discards_result(self):
+        post = self.make_post(jpeg_bytes())
+        render = images._render_image
+        
+        def replace_image(instance, field):
+            result = render(instance, field)
+            # User mengganti image saat worker masih di Pillow/upload
+            Post.objects.filter(pk=post.pk).update(image='posts/new.jpg')
+            return result
+        
+        with mock.patch.object(images, '_render_image', side_effect=replace_image):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(images.process_pending(Post, 'image'), (0, 0))
+        
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, 'posts/new.jpg')
+        self.assertEqual(post.image_status, IMAGE_PENDING)
+        self.assertEqual(post.image_variants, {})
+        # Cuma original lama yang masih direferensikan (ditunggu release_image)
+        self.assertEqual(MediaBlob.objects.filter(ref_count__gt=0).count(), 1)
+    
+    def test_row_is_not_locked_while_rendering(self):
+        post = self.make_post(jpeg_bytes())
+        render = images._render_image
+        depth = len(connection.atomic_blocks)
+        
+        def check_unlocked(instance, field):
+            # Tidak ada transaksi (dan select_for_update) yang terbuka di sini
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            return render(instance, field)
+        
+        with mock.patch.object(images, '_render_image', side_effect=check_unlocked):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(images.process_pending(Post, 'image'), (1, 0))
+        
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, IMAGE_READY)
+    
+    def test_shared_original_keeps_other_reference(self):
+        data = jpeg_bytes()
+        first, second = self.make_post(data), self.make_post(data)
+        self.assertEqual(self.refs(first.image.name), 2)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            images.process_pending(Post, 'image')
+        
+        for post in (first, second):
+            post.refresh_from_db()
+            self.assertEqual(post.image_status, IMAGE_READY)
+        # Isi sama -> hasil proses sama: satu blob, dua referensi
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(self.refs(first.image.name), 2)
+        self.assertEqual(MediaBlob.objects.filter(ref_count__gt=0).count(), 3)
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=(16, 32))
+class ProcessedDedupTests(MediaRootMixin, TestCase):
+    """Upload asli yang sama di-resolve ke blob hasil proses (tanpa tulis byte)"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='meme', email='meme@example.com', password='x')
+    
+    def upload(self, data):
+        name = default_storage.save('posts/meme.jpg', ContentFile(data))
+        return Post.objects.create(
+            title='Meme', slug=f'meme-{Post.objects.count()}', content='Isi',
+            author=self.author, image=name, image_status=IMAGE_PENDING,
+        )
+    
+    def test_reupload_resolves_to_processed_blob(self):
+        data = jpeg_bytes()
+        first = self.upload(data)
+        with self.captureOnCommitCallbacks(execute=True):
+            images.process_pending(Post, 'image')
+        first.refresh_from_db()
+        blobs = MediaBlob.objects.count()
+        
+        with mock.patch.object(FileSystemStorage, '_save') as write:
+            second = self.upload(data)
+        
+        write.assert_not_called()
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 2)
+        self.assertEqual(MediaBlob.objects.count(), blobs)
+    
+    def test_processed_source_is_not_stripped_again(self):
+        data = jpeg_bytes()
+        first = self.upload(data)
+        with self.captureOnCommitCallbacks(execute=True):
+            images.process_pending(Post, 'image')
+        second = self.upload(data)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(images.process_pending(Post, 'image'), (1, 0))
+        
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(second.image_status, IMAGE_READY)
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(second.image_variants, first.image_variants)
+        self.assertEqual(MediaBlob.objects.get(name=second.image.name).ref_count, 2)
+        for name in second.image_variants.values():
+            self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 2)
+
+
+class UploadHandlerScopeTests(MediaRootMixin, TestCase):
+    """Handler streaming cuma di endpoint image, bukan global (admin dll)"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='root', email='root@example.com', password='x')
+        cls.category = Category.objects.create(name='Umum', slug='umum', description='Umum')
+    
+    def test_post_create_rejects_non_image_while_streaming(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        
+        response = client.post('/api/posts/', {
+            'title': 'Bukan gambar', 'content': 'Isi', 'category': self.category.pk,
+            'image': SimpleUploadedFile('notes.jpg', b'%PDF-1.4 not an image'),
+        }, format='multipart')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid image file', response.data['detail'])
+        self.assertFalse(Post.objects.exists())
+    
+    def test_profile_upload_is_streamed(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        complete = StreamingImageUploadHandler.file_complete
+        
+        with mock.patch.object(
+            StreamingImageUploadHandler, 'file_complete', autospec=True, side_effect=complete
+        ) as file_complete:
+            response = client.patch('/api/users/update_profile/', {
+                'profile_picture': SimpleUploadedFile('me.jpg', jpeg_bytes(exif=False)),
+            }, format='multipart')
+        
+        self.assertEqual(response.status_code, 200)
+        file_complete.assert_called_once()
+        self.admin.refresh_from_db()
+        self.assertEqual(self.admin.profile_picture_status, IMAGE_PENDING)
+    
+    def test_empty_file_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        
+        response = client.patch('/api/users/update_profile/', {
+            'profile_picture': SimpleUploadedFile('a.png', b''),
+        }, format='multipart')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid image file', response.data['detail'])
+        self.admin.refresh_from_db()
+        self.assertFalse(self.admin.profile_picture)
+    
+    def test_admin_file_upload_uses_default_handlers(self):
+        self.client.force_login(self.admin)
+        
+        response = self.client.post(f'/admin/forum/user/{self.admin.pk}/change/', {
+            'username': 'root',
+            'profile_picture': SimpleUploadedFile('doc.pdf', b'%PDF-1.4 not an image'),
+        })
+        
+        # Form admin menolak file lewat validasi biasa, bukan 500
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['adminform'].form.errors)
+
+
+class ServeMediaTests(MediaRootMixin, TestCase):
+    """GET /media/<path>: cek akses lalu transfer diserahkan ke web server / sendfile"""
+    
+    DATA = b'0123456789abcdef'
+    
+    def setUp(self):
+        self.blob = default_storage.save('posts/data.bin', ContentFile(self.DATA))
+        # File lama (sebelum blob) langsung di MEDIA_ROOT
+        FileSystemStorage().save('posts/legacy.jpg', ContentFile(b'legacy'))
+    
+    def get(self, path, **headers):
+        return self.client.get(f'/media/{path}', **headers)
+    
+    @override_settings(MEDIA_SERVE_MODE='python')
+    def test_python_mode_streams_blob_with_immutable_cache(self):
+        response = self.get(self.blob)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.DATA)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['ETag'], f'"{blob_digest(self.blob)}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+    
+    @override_settings(MEDIA_SERVE_MODE='python')
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get(self.blob)['ETag']
+        
+        self.assertEqual(self.get(self.blob, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+    
+    @override_settings(MEDIA_SERVE_MODE='python')
+    def test_range_requests(self):
+        partial = self.get(self.blob, HTTP_RANGE='bytes=2-5')
+        suffix = self.get(self.blob, HTTP_RANGE='bytes=-3')
+        invalid = self.get(self.blob, HTTP_RANGE='bytes=99-')
+        
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(b''.join(partial.streaming_content), b'2345')
+        self.assertEqual(partial['Content-Range'], f'bytes 2-5/{len(self.DATA)}')
+        self.assertEqual(b''.join(suffix.streaming_content), b'def')
+        self.assertEqual(invalid.status_code, 416)
+        self.assertEqual(invalid['Content-Range'], f'bytes */{len(self.DATA)}')
+    
+    @override_settings(MEDIA_SERVE_MODE='accel')
+    def test_accel_mode_hands_off_to_nginx(self):
+        response = self.get(self.blob)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.blob}')
+        self.assertEqual(response.content, b'')
+    
+    @override_settings(MEDIA_SERVE_MODE='sendfile')
+    def test_sendfile_mode_sends_full_path(self):
+        response = self.get(self.blob)
+        
+        self.assertEqual(response['X-Sendfile'], default_storage.path(self.blob))
+        self.assertEqual(response.content, b'')
+    
+    @override_settings(MEDIA_CACHE_MAX_AGE=600)
+    def test_legacy_file_uses_short_cache(self):
+        response = self.get('posts/legacy.jpg')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=600')
+        self.assertNotIn('ETag', response)
+    
+    def test_paths_outside_served_dirs_are_404(self):
+        for path in ('../manage.py', 'posts/../../manage.py', '.hidden/x', 'other/file.txt', 'posts/missing.jpg'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 404)
+    
+    def test_only_safe_methods(self):
+        self.assertEqual(self.client.post(f'/media/{self.blob}').status_code, 405)
+
+
+class MediaGCTests(MediaRootMixin, TestCase):
+    """Signal release + gc_media (collect_orphans / recount_blobs)"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='gc', email='gc@example.com', password='x')
+        cls.category = Category.objects.create(name='GC', slug='gc', description='GC')
+    
+    def make_post(self, data):
+        return Post.objects.create(
+            title='Post', slug=f'post-{Post.objects.count()}', content='Isi', author=self.author,
+            category=self.category, image=default_storage.save('posts/a.jpg', ContentFile(data)),
+        )
+    
+    def age(self, name, hours=48):
+        old = time.time() - hours * 3600
+        os.utime(default_storage.path(name), (old, old))
+    
+    def test_deleting_user_releases_post_images(self):
+        post = self.make_post(b'cascade')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.author.pk).delete()
+        
+        self.assertFalse(MediaBlob.objects.filter(name=post.image.name).exists())
+    
+    def test_deleting_category_keeps_post_images(self):
+        post = self.make_post(b'category')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        
+        post.refresh_from_db()
+        self.assertIsNone(post.category)
+        self.assertEqual(MediaBlob.objects.get(name=post.image.name).ref_count, 1)
+    
+    def test_collects_only_old_unreferenced_files(self):
+        live = self.make_post(b'live').image.name
+        orphan = self.make_post(b'orphan')
+        with self.captureOnCommitCallbacks(execute=True):
+            orphan.delete()
+        young = default_storage.save('posts/young.jpg', ContentFile(b'young'))
+        MediaBlob.objects.filter(name=young).delete()
+        for name in (live, orphan.image.name):
+            self.age(name)
+        
+        self.assertEqual(collect_orphans(default_storage, timedelta(hours=24), dry_run=True)[1], 1)
+        self.assertTrue(default_storage.exists(orphan.image.name))
+        
+        scanned, deleted, freed = collect_orphans(default_storage, timedelta(hours=24), batch_size=2)
+        
+        self.assertEqual((scanned, deleted, freed), (3, 1, len(b'orphan')))
+        self.assertFalse(default_storage.exists(orphan.image.name))
+        self.assertTrue(default_storage.exists(live))
+        self.assertTrue(default_storage.exists(young))
+        # Row sementara untuk lock tidak tertinggal
+        self.assertFalse(MediaBlob.objects.filter(name=orphan.image.name).exists())
+    
+    def test_zero_ref_blob_file_is_deleted(self):
+        name = default_storage.save('posts/zero.jpg', ContentFile(b'zero'))
+        MediaBlob.objects.filter(name=name).update(ref_count=0)
+        self.age(name)
+        
+        collect_orphans(default_storage, timedelta(hours=24))
+        
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+    
+    def test_recount_fixes_leaked_references(self):
+        post = self.make_post(b'leak')
+        MediaBlob.objects.filter(name=post.image.name).update(ref_count=5)
+        leaked = default_storage.save('posts/leaked.jpg', ContentFile(b'leaked'))
+        
+        self.assertEqual(recount_blobs(), (2, 2))
+        
+        self.assertEqual(MediaBlob.objects.get(name=post.image.name).ref_count, 1)
+        self.assertFalse(MediaBlob.objects.filter(name=leaked).exists())
+
+
+# ============================================
+# S3 STORAGE (client di-stub, tanpa bucket sungguhan)
+# ============================================
+
+class FakeBody:
+    def __init__(self, data):
+        self.data = data
+    
+    def read(self):
+        return self.data
+    
+    def iter_chunks(self, size):
+        for start in range(0, len(self.data), size):
+            yield self.data[start:start + size]
+
+
+class FakeS3Client:
+    """Bucket di memori, cukup untuk operasi yang dipakai S3Storage"""
+    
+    def __init__(self):
+        self.objects = {}
+        self.checksums = {}
+    
+    def put(self, key, data, checksum=True):
+        self.objects[key] = data
+        if checksum:
+            self.checksums[key] = base64.b64encode(hashlib.sha256(data).digest()).decode()
+    
+    def head_object(self, Bucket, Key, ChecksumMode=None):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': '404'}}, 'HeadObject')
+        info = {'ContentLength': len(self.objects[Key]), 'LastModified': timezone.now()}
+        if ChecksumMode and Key in self.checksums:
+            info['ChecksumSHA256'] = self.checksums[Key]
+        return info
+    
+    def get_object(self, Bucket, Key, Range=None):
+        data = self.objects[Key]
+        if Range:
+            start, end = map(int, Range[len('bytes='):].split('-'))
+            data = data[start:end + 1]
+        return {'Body': FakeBody(data)}
+    
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        self.put(key, fileobj.read())
+    
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+    
+    def generate_presigned_url(self, method, Params, ExpiresIn):
+        return f"https://bucket.example/{Params['Key']}?method={method}&expires={ExpiresIn}"
+
+
+def digest_key(data, ext='.jpg'):
+    return blob_name(hashlib.sha256(data).hexdigest(), f'x{ext}')
+
+
+@skipUnless(ClientError, 'boto3 not installed (only needed for MEDIA_STORAGE=s3)')
+class S3StorageTests(TestCase):
+    """verify_direct_upload, claim() ref counting, presign, redirect /media/"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='s3user', email='s3user@example.com', password='x')
+    
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        self.storage = ContentAddressedS3Storage(bucket='forka-test', public_url='')
+        self.storage.client = FakeS3Client()
+        self.bucket = self.storage.client
+        for module in ('forum.views_media', 'forum.views_uploads'):
+            patcher = mock.patch(f'{module}.default_storage', self.storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    # ----- verify_direct_upload -----
+    
+    def test_verify_accepts_matching_image(self):
+        data = jpeg_bytes(exif=False)
+        key = digest_key(data)
+        self.bucket.put(key, data)
+        
+        self.assertEqual(verify_direct_upload(self.storage, key, 'image'), ('JPEG', len(data)))
+    
+    def test_verify_hashes_object_without_stored_checksum(self):
+        data = jpeg_bytes(exif=False)
+        key = digest_key(data)
+        self.bucket.put(key, data, checksum=False)
+        
+        self.assertEqual(verify_direct_upload(self.storage, key, 'image')[0], 'JPEG')
+    
+    def test_verify_rejections(self):
+        image = jpeg_bytes(exif=False)
+        other = jpeg_bytes(color=(0, 0, 255), exif=False)
+        pdf = b'%PDF-1.4 not an image'
+        self.bucket.put(digest_key(image), other, checksum=False)
+        self.bucket.put(digest_key(pdf), pdf)
+        cases = {
+            'posts/not-a-blob.jpg': 'Invalid upload key',
+            digest_key(b'missing'): 'Upload not found',
+            digest_key(image): 'does not match its checksum',
+            digest_key(pdf): 'Invalid image file',
+        }
+        for key, message in cases.items():
+            with self.subTest(key=key), self.assertRaisesMessage(UploadRejected, message):
+                verify_direct_upload(self.storage, key, 'image')
+    
+    @override_settings(IMAGE_UPLOAD_FIELD_MAX_SIZES={'image': 100})
+    def test_verify_rejects_oversize_object(self):
+        data = jpeg_bytes(exif=False)
+        self.bucket.put(digest_key(data), data)
+        
+        with self.assertRaisesMessage(UploadRejected, 'Image size must be less than'):
+            verify_direct_upload(self.storage, digest_key(data), 'image')
+    
+    # ----- claim / release -----
+    
+    def test_claim_counts_references_and_release_keeps_object(self):
+        data = jpeg_bytes(exif=False)
+        key = digest_key(data)
+        self.bucket.put(key, data)
+        
+        self.storage.claim(key, len(data))
+        self.storage.claim(key, len(data))
+        self.assertEqual(MediaBlob.objects.get(name=key).ref_count, 2)
+        
+        self.storage.release(key)
+        self.assertEqual(MediaBlob.objects.get(name=key).ref_count, 1)
+        self.storage.release(key)
+        
+        # Referensi terakhir: row hilang, object menunggu gc_media
+        self.assertFalse(MediaBlob.objects.filter(name=key).exists())
+        self.assertIn(key, self.bucket.objects)
+    
+    def test_post_with_image_key_claims_blob(self):
+        data = jpeg_bytes(exif=False)
+        key = digest_key(data)
+        self.bucket.put(key, data)
+        category = Category.objects.create(name='S3', slug='s3', description='S3')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        
+        with mock.patch('forum.serializers.default_storage', self.storage):
+            response = client.post('/api/posts/', {
+                'title': 'Direct', 'content': 'Isi', 'category': category.pk, 'image_key': key,
+            }, format='json')
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Post.objects.get().image.name, key)
+        self.assertEqual(MediaBlob.objects.get(name=key).ref_count, 1)
+    
+    # ----- presign -----
+    
+    def presign(self, data):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.post('/api/uploads/presign/', {
+            'filename': 'foto.jpg', 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest(),
+        }, format='json')
+    
+    def test_presign_new_upload(self):
+        data = jpeg_bytes(exif=False)
+        
+        response = self.presign(data)
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['key'], digest_key(data))
+        self.assertEqual(response.data['upload']['method'], 'PUT')
+        self.assertIn('x-amz-checksum-sha256', response.data['upload']['headers'])
+    
+    def test_presign_skips_upload_of_processed_original(self):
+        raw = jpeg_bytes()
+        processed = jpeg_bytes(exif=False)
+        processed_key = digest_key(processed)
+        self.bucket.put(processed_key, processed)
+        self.storage.claim(processed_key, len(processed))
+        MediaBlob.objects.filter(name=processed_key).update(source_digest=hashlib.sha256(raw).hexdigest())
+        
+        response = self.presign(raw)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'key': processed_key, 'upload': None})
+    
+    # ----- /media/ -----
+    
+    def test_media_path_redirects_to_bucket(self):
+        key = digest_key(b'redirect')
+        
+        response = self.client.get(f'/media/{key}')
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith(f'https://bucket.example/{key}?method=get_object'))
+    
+    def test_media_path_redirects_to_public_url(self):
+        self.storage.public_url = 'https://cdn.example/media/'
+        key = digest_key(b'cdn')
+        
+        response = self.client.get(f'/media/{key}')
+        
+        self.assertEqual(response['Location'], f'https://cdn.example/media/{key}')
+
+
+# ============================================
+# RESUMABLE UPLOAD + ATTACHMENT
+# ============================================
+
+@override_settings(IMAGE_VARIANT_WIDTHS=(16,))
+class ResumableUploadTests(MediaRootMixin, TestCase):
+    """Session -> PATCH range -> finalize -> attachment lewat image pipeline"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._sessions_override = override_settings(UPLOAD_SESSION_DIR=os.path.join(cls._media_root, 'sessions'))
+        cls._sessions_override.enable()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls._sessions_override.disable()
+        super().tearDownClass()
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='uploader', email='uploader@example.com', password='x')
+        cls.category = Category.objects.create(name='Upload', slug='upload', description='Upload')
+    
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.data = jpeg_bytes(size=(80, 60))
+    
+    def start(self, data=None, **extra):
+        data = self.data if data is None else data
+        response = self.client.post('/api/uploads/sessions/', {
+            'filename': 'camera.jpg', 'size': len(data), **extra,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+    
+    def patch(self, session_id, start, end, data=None):
+        data = self.data if data is None else data
+        return self.client.generic(
+            'PATCH', f'/api/uploads/sessions/{session_id}/', data[start:end],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(data)}',
+        )
+    
+    def upload(self, **extra):
+        session_id = self.start(**extra)
+        middle = len(self.data) // 2
+        # Range kedua dulu: urutan bebas
+        self.assertEqual(self.patch(session_id, middle, len(self.data)).status_code, 200)
+        self.assertEqual(self.patch(session_id, 0, middle).status_code, 200)
+        return session_id
+    
+    def finalize(self, session_id):
+        return self.client.post(f'/api/uploads/sessions/{session_id}/finalize/')
+    
+    def test_attachment_is_stripped_by_worker(self):
+        session_id = self.upload()
+        self.assertEqual(self.finalize(session_id).data['status'], 'complete')
+        
+        response = self.client.post('/api/posts/', {
+            'title': 'Lampiran', 'content': 'Isi', 'category': self.category.pk,
+            'attachment_uploads': [session_id],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        attachment = PostAttachment.objects.get()
+        self.assertEqual(attachment.file_status, IMAGE_PENDING)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(images.process_pending(PostAttachment, 'file'), (1, 0))
+        
+        attachment.refresh_from_db()
+        self.assertEqual(attachment.file_status, IMAGE_READY)
+        with default_storage.open(attachment.file.name) as fh:
+            self.assertFalse(Image.open(fh).getexif())
+        detail = self.client.get(f"/api/posts/{response.data['id']}/").data
+        self.assertEqual(list(detail['attachments'][0]['srcset']), ['16'])
+    
+    def test_store_runs_without_holding_the_session(self):
+        session_id = self.upload()
+        seen = {}
+        save = default_storage.save
+        
+        def save_and_retry(name, content):
+            seen['status'] = UploadSession.objects.get(pk=session_id).status
+            seen['retry'] = self.finalize(session_id)
+            return save(name, content)
+        
+        with mock.patch('forum.resumable.default_storage.save', side_effect=save_and_retry):
+            response = self.finalize(session_id)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(seen['status'], 'finalizing')
+        self.assertEqual(seen['retry'].status_code, 400)
+        self.assertIn('already being finalized', seen['retry'].data['error'])
+        self.assertEqual(MediaBlob.objects.get(name=UploadSession.objects.get().file_name).ref_count, 1)
+    
+    def test_checksum_mismatch_reopens_session(self):
+        session_id = self.upload(sha256='0' * 64)
+        
+        response = self.finalize(session_id)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get(pk=session_id).status, 'uploading')
+        self.assertFalse(MediaBlob.objects.exists())
+    
+    def test_finalize_rechecks_overwritten_header(self):
+        data = self.data[:2] + b'%PDF-1.4 not an image' + self.data[23:]
+        session_id = self.start(data)
+        self.assertEqual(self.patch(session_id, 0, 3, self.data).status_code, 200)
+        # Range kedua menimpa header yang sudah lolos cek di offset 0
+        self.assertEqual(self.patch(session_id, 2, len(data), data).status_code, 200)
+        
+        response = self.finalize(session_id)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get(pk=session_id).status, 'uploading')
+        self.assertFalse(MediaBlob.objects.exists())
+    
+    def test_finalize_rejects_extension_mismatch(self):
+        session_id = self.upload(filename='camera.png')
+        
+        response = self.finalize(session_id)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MediaBlob.objects.exists())
+    
+    def test_filename_directories_are_dropped(self):
+        session_id = self.upload(filename='dcim/../camera.jpg')
+        
+        response = self.finalize(session_id)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'complete')
+    
+    def test_cancel_during_finalize_releases_blob(self):
+        session_id = self.upload()
+        save = default_storage.save
+        
+        def save_then_cancel(name, content):
+            stored = save(name, content)
+            self.client.delete(f'/api/uploads/sessions/{session_id}/')
+            return stored
+        
+        with mock.patch('forum.resumable.default_storage.save', side_effect=save_then_cancel):
+            response = self.finalize(session_id)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(MediaBlob.objects.exists())
+    
+    def test_patch_after_finalize_conflicts(self):
+        session_id = self.upload()
+        self.finalize(session_id)
+        
+        self.assertEqual(self.patch(session_id, 0, 10).status_code, 409)
+    
+    @mock.patch.object(UploadChunkRateThrottle, 'THROTTLE_RATES', {'upload_chunk': '2/hour'})
+    def test_chunks_have_their_own_limit(self):
+        session_id = self.start()
+        
+        statuses = [self.patch(session_id, 0, 10).status_code for _ in range(3)]
+        
+        self.assertEqual(statuses, [200, 200, 429])
+        # GET (resume) tidak dihitung
+        self.assertEqual(self.client.get(f'/api/uploads/sessions/{session_id}/').status_code, 200)
+    
+    @mock.patch.object(UploadRateThrottle, 'THROTTLE_RATES', {'upload': '1/hour', 'upload_chunk': '10/hour'})
+    def test_finalize_counts_as_upload(self):
+        # Create session sudah memakai satu-satunya jatah 'upload'
+        session_id = self.upload()
+        
+        self.assertEqual(self.finalize(session_id).status_code, 429)
+
+
+# ============================================
+# MEDIA URL
+# ============================================
+
+@override_settings(MEDIA_CDN_URL='', MEDIA_PUBLIC_URL='', MEDIA_URL_VERSION='', ALLOWED_HOSTS=['forka.test'])
+class MediaUrlTests(SimpleTestCase):
+    """media_url: CDN -> base request -> MEDIA_PUBLIC_URL -> relatif"""
+    
+    BLOB = 'blobs/ab/cd/' + 'a' * 64 + '.jpg'
+    
+    def setUp(self):
+        self.storage = FileSystemStorage()
+    
+    def request(self):
+        return RequestFactory().get('/api/posts/', HTTP_HOST='forka.test')
+    
+    @override_settings(MEDIA_CDN_URL='https://cdn.example/media')
+    def test_cdn_wins_over_request(self):
+        self.assertEqual(
+            media_url(self.BLOB, self.request(), self.storage), f'https://cdn.example/media/{self.BLOB}'
+        )
+    
+    def test_absolute_from_request_and_cached(self):
+        request = self.request()
+        
+        self.assertEqual(
+            media_url('posts/foto lama.jpg', request, self.storage), 'http://forka.test/media/posts/foto%20lama.jpg'
+        )
+        with mock.patch.object(request, 'build_absolute_uri') as build:
+            media_url(self.BLOB, request, self.storage)
+        build.assert_not_called()
+    
+    @override_settings(MEDIA_PUBLIC_URL='https://forka.id/media/')
+    def test_public_url_without_request(self):
+        self.assertEqual(media_url(self.BLOB, storage=self.storage), f'https://forka.id/media/{self.BLOB}')
+    
+    def test_relative_without_request_or_public_url(self):
+        self.assertEqual(media_url(self.BLOB, storage=self.storage), f'/media/{self.BLOB}')
+    
+    @override_settings(MEDIA_URL_VERSION='7')
+    def test_version_only_on_mutable_files(self):
+        self.assertEqual(media_url('posts/a.jpg', storage=self.storage), '/media/posts/a.jpg?v=7')
+        self.assertEqual(media_url(self.BLOB, storage=self.storage), f'/media/{self.BLOB}')
+    
+    def test_remote_storage_builds_its_own_url(self):
+        storage = mock.Mock(spec=['url'])
+        storage.url.return_value = 'https://bucket.example/x?sig=1'
+        
+        self.assertEqual(media_url(self.BLOB, self.request(), storage), 'https://bucket.example/x?sig=1')
+        storage.url.assert_called_once_with(self.BLOB)
+    
+    def test_empty_names(self):
+        self.assertIsNone(media_url(''))
+        self.assertIsNone(file_url(None))
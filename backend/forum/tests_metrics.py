@@ -0,0 +1,298 @@
+# backend/forum/tests_metrics.py
+"""
+Monitoring endpoints: /metrics, slow-query log antar proses, profil request,
+benchmark_api
+
+    python manage.py test forum.tests_metrics
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import metrics, querylog
+from .metrics import MetricsMiddleware
+from .authentication import ForkaRefreshToken
+from .models import RequestProfile, User
+from .profiler import requested_modes
+
+
+@override_settings(METRICS_TOKEN='')
+class MetricsViewTests(TestCase):
+    """/metrics cuma untuk scrape langsung dari jaringan internal"""
+    
+    def get(self, remote_addr, **headers):
+        return self.client.get('/metrics', REMOTE_ADDR=remote_addr, **headers)
+    
+    def test_internal_address_can_scrape(self):
+        response = self.get('10.0.0.5')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'forka_http_request_duration_seconds', response.content)
+    
+    def test_loopback_is_not_allowed_by_default(self):
+        # nginx di host yang sama proxy dari 127.0.0.1
+        self.assertEqual(self.get('127.0.0.1').status_code, 404)
+        self.assertEqual(self.get('::1').status_code, 404)
+    
+    def test_external_address_gets_404(self):
+        self.assertEqual(self.get('203.0.113.9').status_code, 404)
+    
+    def test_proxied_requests_are_refused(self):
+        for header in ('HTTP_X_FORWARDED_FOR', 'HTTP_X_REAL_IP', 'HTTP_FORWARDED'):
+            with self.subTest(header=header):
+                self.assertEqual(self.get('10.0.0.5', **{header: '10.0.0.6'}).status_code, 404)
+    
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.get('10.0.0.5').status_code, 404)
+        self.assertEqual(self.get('10.0.0.5', HTTP_AUTHORIZATION='Bearer wrong').status_code, 404)
+        self.assertEqual(self.get('10.0.0.5', HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
+        # Token tidak menggantikan cek alamat
+        self.assertEqual(self.get('203.0.113.9', HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 404)
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Latency & jumlah query per route, juga di chain ASGI (tanpa adapter thread)"""
+    
+    async def test_async_chain_is_observed(self):
+        async def get_response(request):
+            await sync_to_async(User.objects.count)()
+            return HttpResponse(status=204)
+        
+        middleware = MetricsMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        
+        with mock.patch.object(metrics, 'request_duration') as duration, \
+                mock.patch.object(metrics, 'request_db_queries') as queries:
+            response = await middleware(RequestFactory().get('/api/posts/'))
+        
+        self.assertEqual(response.status_code, 204)
+        duration.labels.assert_called_once_with('unmatched', 'GET', 204)
+        queries.labels.return_value.observe.assert_called_once_with(1)
+
+
+class QueryLogTests(SimpleTestCase):
+    """Snapshot per proses di QUERY_LOG_DIR: reset generasi, file worker mati"""
+    
+    databases = {'default'}
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        override = override_settings(QUERY_LOG_DIR=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        querylog.stats.reset()
+        self.addCleanup(querylog.stats.reset)
+    
+    def write_snapshot(self, pid, generation='', count=1):
+        with open(os.path.join(self.dir, f'{pid}.json'), 'w') as fh:
+            json.dump({
+                'pid': pid,
+                'generation': generation,
+                'dropped': 0,
+                'entries': {'abc': {'sql': 'SELECT ?', 'count': count, 'total': 0.1, 'max': 0.1, 'recent': [0.1]}},
+                'slow': [],
+            }, fh)
+    
+    def dead_pid(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        return process.pid
+    
+    def test_report_merges_live_processes(self):
+        self.write_snapshot(os.getppid(), count=3)
+        
+        report = querylog.build_report()
+        
+        self.assertEqual(report['processes'], 2)
+        self.assertEqual(report['queries'][0]['count'], 3)
+    
+    def test_dead_worker_files_are_pruned(self):
+        pid = self.dead_pid()
+        self.write_snapshot(pid)
+        
+        report = querylog.build_report()
+        
+        self.assertEqual(report['processes'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dir, f'{pid}.json')))
+    
+    def test_reset_reaches_other_processes(self):
+        # "Proses lain": statistik di memori sebelum reset
+        other = querylog.QueryStats()
+        other.record('SELECT 1', 0.01)
+        
+        querylog.reset_all()
+        # Snapshot yang ditulis sebelum proses lain melihat reset tidak dihitung
+        self.write_snapshot(os.getppid(), generation=other.generation)
+        self.assertEqual(querylog.build_report()['queries'], [])
+        
+        with mock.patch('forum.querylog.os.getpid', return_value=os.getppid()):
+            other.flush()
+        
+        self.assertEqual(other.entries, {})
+        self.assertEqual(other.generation, querylog.stats.generation)
+    
+    def test_queries_do_not_flush_on_the_request_path(self):
+        connection.ensure_connection()
+        querylog.install(None, connection)
+        self.addCleanup(connection.execute_wrappers.remove, querylog.query_logger)
+        
+        with mock.patch.object(querylog.stats, 'flush') as flush:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        
+        flush.assert_not_called()
+        self.assertEqual(sum(entry['count'] for entry in querylog.stats.entries.values()), 1)
+
+
+    @override_settings(QUERY_LOG_ENABLED=True)
+    def test_flusher_starts_on_first_request_only(self):
+        with mock.patch.object(querylog.stats, 'start_flusher') as start_flusher, \
+                mock.patch.object(os, 'register_at_fork'):
+            querylog.connect()
+            self.addCleanup(connection_created.disconnect, dispatch_uid='forka_querylog')
+            # migrate / worker / test: tidak ada thread maupun file
+            start_flusher.assert_not_called()
+            
+            middleware = querylog.QueryLogMiddleware(lambda request: HttpResponse())
+            middleware(RequestFactory().get('/'))
+        
+        start_flusher.assert_called_once_with()
+    
+    @override_settings(QUERY_LOG_ENABLED=True, QUERY_LOG_SLOW_MS=0)
+    async def test_async_chain_records_route_of_origin(self):
+        async def get_response(request):
+            await sync_to_async(querylog.query_logger)(lambda *args: None, 'SELECT 1', None, False, {})
+            return HttpResponse()
+        
+        request = RequestFactory().get('/')
+        middleware = querylog.QueryLogMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        
+        with mock.patch.object(querylog.stats, 'start_flusher'), \
+                mock.patch.object(querylog, 'route_name', return_value='PostViewSet.list') as route_name:
+            with self.assertLogs('forum.querylog', 'WARNING'):
+                await middleware(request)
+        
+        route_name.assert_called_once_with(request)
+        self.assertEqual(querylog.stats.slow[-1]['route'], 'PostViewSet.list')
+    
+    def test_disabled_under_test_runner(self):
+        self.assertFalse(settings.QUERY_LOG_ENABLED)
+
+
+class RequestProfileViewTests(TestCase):
+    """Download folded stacks: id tidak valid -> 404, default profil cpu saja"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='profadmin', email='profadmin@example.com', password='x', role='admin')
+        cls.profile = RequestProfile.objects.create(
+            user=cls.admin, method='GET', path='/api/posts/', cpu_folded='main;view 3', memory_folded='forum/views.py:1 64',
+        )
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+    
+    def test_download_folded_stacks(self):
+        # Satu query: kolom folded tidak di-defer lalu dimuat ulang
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/admin/profiles/{self.profile.pk}/cpu/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'main;view 3')
+        self.assertIn(f'profile-{self.profile.pk}-cpu.folded', response['Content-Disposition'])
+        self.assertEqual(self.client.get(f'/api/admin/profiles/{self.profile.pk}/memory/').content, b'forum/views.py:1 64')
+    
+    def test_unknown_or_non_numeric_id_is_404(self):
+        self.assertEqual(self.client.get('/api/admin/profiles/999999/cpu/').status_code, 404)
+        self.assertEqual(self.client.get('/api/admin/profiles/abc/memory/').status_code, 404)
+    
+    def test_requires_admin(self):
+        self.client.force_authenticate(None)
+        
+        self.assertEqual(self.client.get(f'/api/admin/profiles/{self.profile.pk}/cpu/').status_code, 401)
+    
+    def test_memory_profiling_must_be_requested_explicitly(self):
+        factory = RequestFactory()
+        
+        self.assertEqual(requested_modes(factory.get('/', HTTP_X_FORKA_PROFILE='1')), ('cpu',))
+        self.assertEqual(requested_modes(factory.get('/', {'_profile': 'yes'})), ('cpu',))
+        self.assertEqual(requested_modes(factory.get('/', HTTP_X_FORKA_PROFILE='all')), ('cpu', 'memory'))
+        self.assertEqual(requested_modes(factory.get('/')), ())
+
+
+@override_settings(PROFILER_ENABLED=True)
+class ProfilerMiddlewareTests(TestCase):
+    """Profil cuma untuk admin yang minta, juga lewat chain ASGI"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='profiled', email='profiled@example.com', password='x', role='admin')
+        cls.member = User.objects.create_user(username='member', email='member@example.com', password='x')
+    
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+    
+    def headers(self, user):
+        return {
+            'Authorization': f'Bearer {ForkaRefreshToken.for_user(user).access_token}',
+            'X-Forka-Profile': '1',
+        }
+    
+    def test_admin_request_is_profiled(self):
+        response = self.client.get('/api/categories/', headers=self.headers(self.admin))
+        
+        profile = RequestProfile.objects.get(pk=response['X-Forka-Profile-Id'])
+        self.assertEqual(profile.route, 'CategoryViewSet.list')
+        self.assertEqual(profile.status_code, 200)
+    
+    def test_non_admin_is_not_profiled(self):
+        response = self.client.get('/api/categories/', headers=self.headers(self.member))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Forka-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+    
+    async def test_async_request_is_profiled(self):
+        headers = await sync_to_async(self.headers)(self.admin)
+        
+        response = await self.async_client.get('/api/categories/', headers=headers)
+        
+        self.assertEqual(response.status_code, 200)
+        profile = await RequestProfile.objects.aget(pk=response['X-Forka-Profile-Id'])
+        self.assertEqual(profile.route, 'CategoryViewSet.list')
+        self.assertGreater(profile.cpu_samples + profile.duration_ms, 0)
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+    """benchmark_api gagal (bukan lolos diam-diam) tanpa baseline untuk scale itu"""
+    
+    def test_missing_baseline_fails_before_seeding(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = os.path.join(tmp, 'baseline.json')
+            with open(baseline, 'w') as fh:
+                json.dump({'0.01': {'categories': {'queries': 3, 'p50_ms': 4.0}}}, fh)
+            
+            with mock.patch('forum.management.commands.benchmark_api.setup_databases') as setup:
+                with self.assertRaisesMessage(CommandError, 'No baseline for scale 0.5'):
+                    call_command('benchmark_api', scale=0.5, baseline=baseline)
+        
+        setup.assert_not_called()
@@ -0,0 +1,125 @@
+# backend/forum/tests_throttling.py
+"""
+Sliding window throttle: kedua counter store + throttle DRF
+
+    python manage.py test forum.tests_throttling
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.request import Request
+
+from .models import ThrottleCounter
+from .throttling import (
+    AnonRateThrottle, CacheCounterStore, DatabaseCounterStore, SlidingWindowLimiter, get_counter_store,
+)
+
+
+# Awal window ke-1000 (duration 60): elapsed dihitung dari sini
+WINDOW_START = 60 * 1000
+
+
+class LimiterMixin:
+    """Test yang sama untuk kedua store"""
+    
+    def make_store(self):
+        raise NotImplementedError
+    
+    def setUp(self):
+        self.store = self.make_store()
+        self.limiter = SlidingWindowLimiter(self.store)
+    
+    def hits(self, count, now=WINDOW_START + 1):
+        return [self.limiter.hit('k', 3, 60, now=now)[0] for _ in range(count)]
+    
+    def test_allows_up_to_limit(self):
+        self.assertEqual(self.hits(4), [True, True, True, False])
+    
+    def test_rejected_requests_are_not_counted(self):
+        self.hits(10)
+        
+        self.assertEqual(self.store.get_many(['k:1000']), [3])
+    
+    def test_previous_window_is_weighted(self):
+        self.hits(3)
+        
+        # Setengah window berikutnya: 3 * 0.5 = 1.5 masih dihitung
+        allowed = [self.limiter.hit('k', 3, 60, now=WINDOW_START + 90)[0] for _ in range(3)]
+        
+        self.assertEqual(allowed, [True, False, False])
+    
+    def test_wait_until_window_frees_a_slot(self):
+        self.hits(3, now=WINDOW_START)
+        
+        allowed, wait = self.limiter.hit('k', 3, 60, now=WINDOW_START + 10)
+        
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 50 + 60 * (1 - 2 / 3))
+    
+    def test_in_flight_request_counts_before_check(self):
+        # Request paralel sudah increment tapi belum selesai cek
+        self.hits(2)
+        self.store.incr('k:1000', timeout=120)
+        
+        self.assertEqual(self.hits(1), [False])
+        self.assertEqual(self.store.get_many(['k:1000']), [3])
+
+
+class CacheLimiterTests(LimiterMixin, TestCase):
+    """THROTTLE_STORE = 'cache' (default)"""
+    
+    def make_store(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        return CacheCounterStore(settings.THROTTLE_CACHE_ALIAS)
+    
+    def test_hit_does_not_touch_database(self):
+        with self.assertNumQueries(0):
+            self.hits(5)
+
+
+@override_settings(THROTTLE_DB_PURGE_PROBABILITY=0)
+class DatabaseLimiterTests(LimiterMixin, TestCase):
+    """THROTTLE_STORE = 'database' (tabel ThrottleCounter)"""
+    
+    def make_store(self):
+        return DatabaseCounterStore()
+    
+    def test_one_row_per_window(self):
+        self.hits(3)
+        self.hits(3, now=WINDOW_START + 119)
+        
+        self.assertEqual(
+            list(ThrottleCounter.objects.order_by('key').values_list('key', 'count')),
+            [('k:1000', 3), ('k:1001', 2)],
+        )
+    
+    @override_settings(THROTTLE_DB_PURGE_PROBABILITY=1)
+    def test_new_window_purges_expired_rows(self):
+        ThrottleCounter.objects.create(key='old:1', count=1, expires_at='2000-01-01T00:00:00Z')
+        
+        self.hits(1)
+        
+        self.assertFalse(ThrottleCounter.objects.filter(key='old:1').exists())
+
+
+class GlobalThrottleTests(TestCase):
+    """Throttle global (anon/user) default ke cache: GET tidak menulis ke DB"""
+    
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+    
+    def test_default_store_is_cache(self):
+        self.assertIsInstance(get_counter_store(), CacheCounterStore)
+    
+    @override_settings(THROTTLE_STORE='database')
+    def test_database_store_is_opt_in(self):
+        self.assertIsInstance(get_counter_store(), DatabaseCounterStore)
+    
+    def test_anon_get_makes_no_queries(self):
+        request = Request(RequestFactory().get('/api/posts/', REMOTE_ADDR='10.0.0.1'))
+        throttle = AnonRateThrottle()
+        
+        with self.assertNumQueries(0):
+            self.assertTrue(throttle.allow_request(request, None))
+        self.assertFalse(ThrottleCounter.objects.exists())
@@ -0,0 +1,128 @@
+# backend/forum/tests_timing.py
+"""
+Request timing: Server-Timing header + log logfmt
+
+    python manage.py test forum.tests_timing
+"""
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .authentication import ForkaRefreshToken
+from .models import Category, User
+from .timing import RequestTimer, RequestTimingMiddleware, _current_timer, timed
+
+
+def phases(header):
+    """'db;dur=1.0;desc="2 queries", total;dur=3.0' -> {'db': [...], 'total': [...]}"""
+    entries = {}
+    for entry in header.split(', '):
+        name, *params = entry.split(';')
+        entries[name] = params
+    return entries
+
+
+class TimedTests(SimpleTestCase):
+    """timed() tanpa request = no-op, nested dihitung sekali"""
+    
+    def test_no_timer_outside_sampled_request(self):
+        with timed('serialize'):
+            pass
+        
+        self.assertIsNone(_current_timer.get())
+    
+    def test_nested_phase_counted_once(self):
+        timer = RequestTimer()
+        token = _current_timer.set(timer)
+        try:
+            with timed('serialize'):
+                with timed('serialize'):
+                    pass
+        finally:
+            _current_timer.reset(token)
+        
+        self.assertEqual(timer.counts['serialize'], 1)
+    
+    def test_server_timing_skips_unused_phases(self):
+        timer = RequestTimer()
+        timer.add('db', 0.002)
+        timer.add('db', 0.001)
+        
+        self.assertEqual(timer.server_timing(0.01), 'db;dur=3.0;desc="2 queries", total;dur=10.0')
+    
+    @override_settings(REQUEST_TIMING_ENABLED=False)
+    def test_disabled_middleware_is_removed(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            RequestTimingMiddleware(lambda request: None)
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SAMPLE_RATE=1.0, REQUEST_TIMING_HEADER=True)
+class RequestTimingMiddlewareTests(TestCase):
+    """Header Server-Timing + satu baris log per request yang di-sample"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='timer', email='timer@example.com', password='x')
+        Category.objects.create(name='Waktu', slug='waktu', description='Waktu')
+    
+    def get(self, token=None):
+        client = APIClient()
+        if token:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client.get('/api/categories/')
+    
+    def test_sampled_request_reports_phases(self):
+        with self.assertLogs('forum.timing', 'INFO') as logs:
+            response = self.get()
+        
+        entries = phases(response['Server-Timing'])
+        self.assertEqual(list(entries)[-1], 'total')
+        self.assertIn('db', entries)
+        self.assertIn('serialize', entries)
+        self.assertIn('render', entries)
+        self.assertRegex(logs.output[0], r'method=GET path=/api/categories/ status=200 total_ms=[\d.]+ .*db_queries=\d+')
+    
+    def test_authenticated_request_reports_auth(self):
+        token = ForkaRefreshToken.for_user(self.user).access_token
+        
+        self.assertIn('auth', phases(self.get(token)['Server-Timing']))
+    
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_request_is_untouched(self):
+        with self.assertNoLogs('forum.timing'):
+            response = self.get()
+        
+        self.assertNotIn('Server-Timing', response)
+    
+    async def test_async_request_reports_phases(self):
+        with self.assertLogs('forum.timing', 'INFO') as logs:
+            response = await self.async_client.get('/api/categories/')
+        
+        entries = phases(response['Server-Timing'])
+        self.assertIn('db', entries)
+        self.assertIn('render', entries)
+        self.assertIn('status=200', logs.output[0])
+    
+    async def test_async_chain_times_queries_in_sync_threads(self):
+        async def get_response(request):
+            # Query di thread sync_to_async, koneksi berbeda dari thread ini
+            await sync_to_async(User.objects.count)()
+            return HttpResponse()
+        
+        middleware = RequestTimingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        
+        with self.assertLogs('forum.timing', 'INFO'):
+            response = await middleware(RequestFactory().get('/api/categories/'))
+        
+        self.assertIn('desc="1 queries"', phases(response['Server-Timing'])['db'])
+    
+    @override_settings(REQUEST_TIMING_HEADER=False)
+    def test_header_can_be_disabled(self):
+        with self.assertLogs('forum.timing', 'INFO'):
+            response = self.get()
+        
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,308 @@
+# backend/forum/throttling.py
+"""
+Rate limiting dengan sliding window counter di shared store
+
+DRF default throttle menyimpan list timestamp per key di cache default
+(LocMem per proses kalau CACHES tidak di-set), jadi limit berlipat sesuai
+jumlah worker dan list-nya terus membesar. Di sini tiap key cuma butuh
+2 counter (window sekarang + window sebelumnya):
+
+    estimated = previous * (1 - elapsed / duration) + current
+
+Counter window sekarang di-increment dulu (atomic), baru dicek; request
+yang ditolak di-decrement lagi. Request paralel masing-masing dapat nilai
+counter berbeda, jadi tidak bisa lolos bersamaan melewati limit.
+
+Store (settings.THROTTLE_STORE):
+- 'cache': Django cache alias THROTTLE_CACHE_ALIAS (default). Harus Redis
+  atau Memcached: cuma di situ incr atomic. DatabaseCache/FileBasedCache
+  incr-nya get+set (count hilang saat paralel) dan LocMem tidak shared,
+  semuanya ditolak `manage.py check --deploy` (forum/checks.py). GET tidak
+  menulis ke DB.
+- 'database': tabel ThrottleCounter, UPDATE + baca count di satu transaksi.
+  Tiap request (termasuk GET) = query tulis, cuma untuk deployment tanpa
+  cache shared.
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import throttling
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import metrics
+
+
+# ============================================
+# COUNTER STORES
+# ============================================
+
+class CacheCounterStore:
+    """Counter di Django cache; add+incr cuma atomic di Redis/Memcached"""
+    
+    def __init__(self, alias):
+        self.cache = caches[alias]
+    
+    def get_many(self, keys):
+        values = self.cache.get_many(keys)
+        return [values.get(key, 0) for key in keys]
+    
+    def incr(self, key, timeout):
+        self.cache.add(key, 0, timeout=timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Key expired di antara add() dan incr()
+            self.cache.set(key, 1, timeout=timeout)
+            return 1
+    
+    def decr(self, key):
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
+
+
+class DatabaseCounterStore:
+    """Counter di tabel ThrottleCounter (UPDATE count = count + 1)"""
+    
+    def __init__(self):
+        from .models import ThrottleCounter
+        self.model = ThrottleCounter
+    
+    def get_many(self, keys):
+        counts = dict(
+            self.model.objects
+            .filter(key__in=keys, expires_at__gt=timezone.now())
+            .values_list('key', 'count')
+        )
+        return [counts.get(key, 0) for key in keys]
+    
+    @staticmethod
+    def _increment(counters):
+        """
+        UPDATE lalu baca count di transaksi yang sama: row terkunci sampai
+        commit, jadi nilai yang dibaca milik increment ini sendiri
+        
+        Returns:
+            int | None: count baru, None kalau row belum ada
+        """
+        with transaction.atomic():
+            if counters.update(count=F('count') + 1):
+                return counters.values_list('count', flat=True).get()
+        return None
+    
+    def incr(self, key, timeout):
+        counters = self.model.objects.filter(key=key)
+        count = self._increment(counters)
+        if count is not None:
+            return count
+        try:
+            with transaction.atomic():
+                self.model.objects.create(
+                    key=key,
+                    count=1,
+                    expires_at=timezone.now() + timedelta(seconds=timeout),
+                )
+            self._maybe_purge()
+            return 1
+        except IntegrityError:
+            # Request lain baru saja membuat counter yang sama
+            return self._increment(counters) or 1
+    
+    def decr(self, key):
+        self.model.objects.filter(key=key, count__gt=0).update(count=F('count') - 1)
+    
+    def _maybe_purge(self):
+        # Bersihkan counter lama sesekali (window baru = row baru)
+        if random.random() < settings.THROTTLE_DB_PURGE_PROBABILITY:
+            self.model.objects.filter(expires_at__lte=timezone.now()).delete()
+
+
+def get_counter_store():
+    if settings.THROTTLE_STORE == 'database':
+        return DatabaseCounterStore()
+    return CacheCounterStore(settings.THROTTLE_CACHE_ALIAS)
+
+
+# ============================================
+# SLIDING WINDOW LIMITER
+# ============================================
+
+class SlidingWindowLimiter:
+    """Sliding window counter: O(1) storage per key, shared antar worker"""
+    
+    def __init__(self, store=None):
+        self.store = store or get_counter_store()
+    
+    def hit(self, key, limit, duration, now=None):
+        """
+        Coba pakai satu slot
+        
+        Returns:
+            tuple: (allowed, wait_seconds)
+        """
+        now = time.time() if now is None else now
+        window = int(now // duration)
+        elapsed = now - window * duration
+        current_key = f'{key}:{window}'
+        
+        # Increment dulu: count ini sudah termasuk request paralel lain
+        current = self.store.incr(current_key, timeout=duration * 2)
+        previous, = self.store.get_many([f'{key}:{window - 1}'])
+        weight = 1 - elapsed / duration
+        
+        if previous * weight + current > limit:
+            # Request yang ditolak tidak ikut dihitung
+            self.store.decr(current_key)
+            return False, self._wait(previous, current - 1, limit, duration, elapsed)
+        
+        return True, 0
+    
+    @staticmethod
+    def _wait(previous, current, limit, duration, elapsed):
+        """Detik sampai estimated count turun di bawah limit"""
+        if current + 1 <= limit and previous:
+            wait = duration * (1 - (limit - current - 1) / previous) - elapsed
+            return max(wait, 0)
+        # Window ini sudah penuh: tunggu window berikutnya, lalu sampai
+        # bobot window ini turun cukup
+        wait = duration - elapsed
+        if current:
+            wait += max(duration * (1 - (limit - 1) / current), 0)
+        return wait
+
+
+# ============================================
+# DRF THROTTLE CLASSES
+# ============================================
+
+class SlidingWindowThrottleMixin:
+    """Ganti penyimpanan history DRF dengan SlidingWindowLimiter"""
+    
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        
+        allowed, self._wait_seconds = SlidingWindowLimiter().hit(
+            self.key, self.num_requests, self.duration
+        )
+        if not allowed:
+            metrics.throttle_rejections.labels(self.scope).inc()
+        return allowed
+    
+    def wait(self):
+        return getattr(self, '_wait_seconds', None)
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    """Global limit untuk anonymous user (per IP)"""
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    """Global limit untuk authenticated user (per user id)"""
+
+
+class LoginRateThrottle(AnonRateThrottle):
+    """5 login attempts per minute"""
+    scope = 'login'
+
+
+class RegisterRateThrottle(AnonRateThrottle):
+    """3 registrations per hour per IP"""
+    scope = 'register'
+
+
+class VerifyEmailRateThrottle(AnonRateThrottle):
+    """10 verification attempts per hour"""
+    scope = 'verify_email'
+
+
+class LogoutRateThrottle(AnonRateThrottle):
+    """
+    Logout per user (claim refresh token di body), bukan per IP: user di
+    belakang NAT kampus tidak saling mengunci. Token tidak valid -> per IP
+    """
+    scope = 'logout'
+    
+    def get_cache_key(self, request, view):
+        try:
+            ident = f"user:{RefreshToken(request.data.get('refresh', ''))[api_settings.USER_ID_CLAIM]}"
+        except (TokenError, KeyError, AttributeError):
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class AvailabilityRateThrottle(AnonRateThrottle):
+    """Live username check dari form register (per IP)"""
+    scope = 'availability'
+
+
+class AvailabilityEmailRateThrottle(AnonRateThrottle):
+    """
+    Cek email jauh lebih ketat dari username: jawaban "sudah dipakai"
+    membuka enumerasi akun yang sengaja ditutup forgot_password.
+    Per IP, juga untuk user yang login. Request tanpa email tidak dihitung
+    """
+    scope = 'availability_email'
+    
+    def allow_request(self, request, view):
+        if not request.query_params.get('email'):
+            return True
+        return super().allow_request(request, view)
+    
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class WriteRateThrottle(UserRateThrottle):
+    """
+    Per-user limit yang cuma berlaku untuk create/update
+    (list, detail, like, dll tidak dihitung)
+    """
+    write_actions = ('create', 'update', 'partial_update')
+    
+    def allow_request(self, request, view):
+        if getattr(view, 'action', None) not in self.write_actions:
+            return True
+        return super().allow_request(request, view)
+
+
+class PostWriteRateThrottle(WriteRateThrottle):
+    """Limit buat/edit post per user"""
+    scope = 'post_write'
+
+
+class CommentWriteRateThrottle(WriteRateThrottle):
+    """Limit buat/edit comment per user"""
+    scope = 'comment_write'
+
+
+class UploadRateThrottle(UserRateThrottle):
+    """Presigned URL / upload session per user"""
+    scope = 'upload'
+
+
+class UploadChunkRateThrottle(UploadRateThrottle):
+    """
+    PATCH byte range resumable upload per user. Bucket sendiri: satu file
+    10MB = 10 chunk 1MB, jangan menghabiskan limit 'upload'
+    """
+    scope = 'upload_chunk'
+    
+    def allow_request(self, request, view):
+        if request.method != 'PATCH':
+            return True
+        return super().allow_request(request, view)
@@ -0,0 +1,194 @@
+# backend/forum/timing.py
+"""
+Request timing: ke mana waktu satu request habis
+
+Per request yang ter-sample (REQUEST_TIMING_SAMPLE_RATE):
+- db         -> jumlah & total waktu query (execute_wrapper tiap koneksi)
+- auth       -> StatelessJWTAuthentication.authenticate
+- serialize  -> to_representation serializer output (TimedSerializerMixin),
+                termasuk query lazy yang dipicu di dalamnya
+- render     -> renderer DRF (JSON)
+- total      -> seluruh middleware chain di bawah RequestTimingMiddleware
+
+Hasilnya dikirim sebagai header Server-Timing (DevTools -> Network -> Timing)
+dan satu baris log logfmt di logger forum.timing:
+
+    request method=GET path=/api/posts/ status=200 total_ms=41.2 db_ms=12.0 db_queries=4 ...
+
+Request yang tidak ter-sample tidak diinstrumentasi (wrapper query cuma
+membaca ContextVar). Timer dibawa ContextVar, bukan wrapper per request
+di koneksi thread ini: di ASGI query jalan di thread sync_to_async, dengan
+koneksinya sendiri. Middleware sync & async capable.
+"""
+
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+_current_timer = ContextVar('forka_request_timer', default=None)
+
+# Urutan di header / log
+PHASES = ('db', 'auth', 'serialize', 'render')
+
+
+class RequestTimer:
+    """Akumulasi durasi (detik) dan jumlah kejadian per fase"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.depth = defaultdict(int)
+    
+    def add(self, phase, seconds):
+        self.durations[phase] += seconds
+        self.counts[phase] += 1
+    
+    def elapsed(self):
+        return time.perf_counter() - self.started
+    
+    def server_timing(self, total):
+        entries = []
+        for phase in PHASES:
+            if phase not in self.durations:
+                continue
+            entry = f'{phase};dur={self.durations[phase] * 1000:.1f}'
+            if phase == 'db':
+                entry += f';desc="{self.counts[phase]} queries"'
+            entries.append(entry)
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
+    
+    def log_fields(self, total):
+        fields = [f'total_ms={total * 1000:.1f}']
+        for phase in PHASES:
+            fields.append(f'{phase}_ms={self.durations.get(phase, 0) * 1000:.1f}')
+        fields.append(f"db_queries={self.counts.get('db', 0)}")
+        return ' '.join(fields)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Ukur blok kode sebagai `phase` pada request yang sedang di-sample.
+    Nested (serializer di dalam serializer) cuma dihitung yang terluar.
+    """
+    timer = _current_timer.get()
+    if timer is None or timer.depth[phase]:
+        yield
+        return
+    
+    timer.depth[phase] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.depth[phase] -= 1
+        timer.add(phase, time.perf_counter() - start)
+
+
+class TimedSerializerMixin:
+    """Catat waktu to_representation sebagai fase 'serialize'"""
+    
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+def db_wrapper(execute, sql, params, many, context):
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.add('db', time.perf_counter() - start)
+
+
+def install(sender, connection, **kwargs):
+    """connection_created: pasang wrapper sekali per koneksi"""
+    if db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, db_wrapper)
+
+
+def connect():
+    """Dipanggil dari ForumConfig.ready()"""
+    if settings.REQUEST_TIMING_ENABLED:
+        connection_created.connect(install, dispatch_uid='forka_timing')
+
+
+class RequestTimingMiddleware:
+    """
+    Paling atas di MIDDLEWARE supaya total mencakup semua middleware lain
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= settings.REQUEST_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        
+        timer = RequestTimer()
+        with self._active(timer):
+            response = self.get_response(request)
+        return self._report(request, response, timer)
+    
+    async def __acall__(self, request):
+        if random.random() >= settings.REQUEST_TIMING_SAMPLE_RATE:
+            return await self.get_response(request)
+        
+        timer = RequestTimer()
+        with self._active(timer):
+            response = await self.get_response(request)
+        return self._report(request, response, timer)
+    
+    @contextmanager
+    def _active(self, timer):
+        token = _current_timer.set(timer)
+        try:
+            yield
+        finally:
+            _current_timer.reset(token)
+    
+    def _report(self, request, response, timer):
+        total = timer.elapsed()
+        if settings.REQUEST_TIMING_HEADER:
+            response['Server-Timing'] = timer.server_timing(total)
+        logger.info(
+            f"request method={request.method} path={request.path} "
+            f"status={response.status_code} {timer.log_fields(total)}"
+        )
+        return response
+    
+    def process_template_response(self, request, response):
+        # DRF Response di-render setelah view selesai, sebelum balik ke middleware
+        timer = _current_timer.get()
+        if timer is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timer.add('render', time.perf_counter() - start)
+            )
+        return response
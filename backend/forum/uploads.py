@@ -0,0 +1,219 @@
+# backend/forum/uploads.py
+"""
+Streaming upload handler untuk image (post image & profile picture)
+
+- Chunk langsung ditulis ke temp file (tidak ada buffer full di RAM),
+  memori per upload ~ satu chunk (64KB)
+- Magic bytes + header image dicek di chunk pertama: bukan JPEG/PNG/GIF/WEBP,
+  dimensi terlalu besar -> request langsung ditolak (400) tanpa baca sisa body
+- Batas ukuran dicek per chunk (dan dari Content-Length sebelum mulai baca)
+- SHA-256 dihitung sambil streaming, dipakai ContentAddressedStorage
+  supaya file tidak dibaca ulang
+
+Tidak dipasang global (FILE_UPLOAD_HANDLERS): view yang menerima image
+memakai StreamingImageUploadMixin, upload lain (admin, dll) tetap pakai
+handler default Django.
+
+Hasil di file upload:
+    file.image_format  -> 'JPEG' / 'PNG' / 'GIF' / 'WEBP'
+    file.image_size    -> (width, height) kalau header terbaca di chunk pertama
+    file.sha256        -> hex digest
+
+verify_direct_upload() menjalankan cek yang sama untuk object yang
+di-PUT client langsung ke bucket (presigned URL, MEDIA_STORAGE=s3).
+"""
+
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+from PIL import Image
+
+from .storage import is_blob
+from . import metrics
+
+
+# Signature -> format Pillow
+MAGIC_SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+
+# Sama dengan chunk pertama handler streaming
+DIRECT_UPLOAD_SNIFF_BYTES = 64 * 1024
+
+# Format -> ekstensi nama file yang boleh dipakai
+ALLOWED_IMAGE_FORMATS = {
+    'JPEG': ('jpg', 'jpeg'),
+    'PNG': ('png',),
+    'GIF': ('gif',),
+    'WEBP': ('webp',),
+}
+
+CONTENT_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'GIF': 'image/gif',
+    'WEBP': 'image/webp',
+}
+
+
+class UploadRejected(MultiPartParserError):
+    """Upload ditolak saat streaming (DRF MultiPartParser -> 400 ParseError)"""
+
+
+def sniff_image_format(head):
+    """Format image dari magic bytes, None kalau bukan image yang diizinkan"""
+    for signature, fmt in MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return fmt
+    if len(head) >= 12 and head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def sniff_upload(file):
+    """
+    Format dari file upload: hasil handler kalau ada, kalau tidak
+    (mis. file dibuat di test / admin) baca magic bytes langsung
+    """
+    fmt = getattr(file, 'image_format', None)
+    if fmt:
+        return fmt
+    
+    position = file.tell()
+    file.seek(0)
+    head = file.read(32)
+    file.seek(position)
+    return sniff_image_format(head)
+
+
+def read_image_size(head):
+    """
+    (width, height) dari header di chunk pertama, None kalau header
+    belum lengkap (mis. EXIF JPEG besar). Pillow cuma parse header di sini.
+    """
+    try:
+        with Image.open(BytesIO(head)) as image:
+            return image.size
+    except Image.DecompressionBombError:
+        raise UploadRejected('Image dimensions are too large')
+    except Exception:
+        return None
+
+
+def inspect_image_head(head):
+    """
+    Validasi chunk pertama file: magic bytes + batas piksel
+    
+    Returns:
+        tuple: (format, (width, height) atau None)
+    """
+    fmt = sniff_image_format(head)
+    if fmt is None:
+        raise UploadRejected('Invalid image file. Allowed: JPEG, PNG, GIF, WEBP')
+    
+    size = read_image_size(head)
+    if size and size[0] * size[1] > settings.IMAGE_MAX_PIXELS:
+        raise UploadRejected('Image dimensions are too large')
+    return fmt, size
+
+
+def verify_direct_upload(storage, key, field_name):
+    """
+    Cek object hasil direct upload (presigned PUT) sebelum dicatat:
+    ada, ukuran dalam batas, isinya image, dan isi cocok dengan digest di key
+    
+    Returns:
+        tuple: (format, size_in_bytes)
+    """
+    if not is_blob(key) or not getattr(storage, 'supports_direct_upload', False):
+        raise UploadRejected('Invalid upload key')
+    
+    info = storage.head(key)
+    if info is None:
+        raise UploadRejected('Upload not found. PUT the file to the presigned URL first')
+    
+    size = info['ContentLength']
+    limit = max_upload_size(field_name)
+    if size > limit:
+        raise UploadRejected(f'Image size must be less than {limit // (1024 * 1024)}MB')
+    
+    fmt, _ = inspect_image_head(storage.read_range(key, 0, DIRECT_UPLOAD_SNIFF_BYTES - 1))
+    
+    if not storage.verify_blob(key):
+        raise UploadRejected('Uploaded content does not match its checksum')
+    metrics.upload_size.labels('direct').observe(size)
+    return fmt, size
+
+
+def max_upload_size(field_name):
+    return settings.IMAGE_UPLOAD_FIELD_MAX_SIZES.get(field_name, settings.IMAGE_UPLOAD_MAX_SIZE)
+
+
+class StreamingImageUploadHandler(TemporaryFileUploadHandler):
+    """Temp-file upload handler dengan validasi image sejak chunk pertama"""
+    
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Body jelas kebesaran: tolak sebelum membaca apa pun
+        limit = settings.IMAGE_UPLOAD_MAX_SIZE + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if content_length and content_length > limit:
+            raise UploadRejected(
+                f'Request body too large (max {settings.IMAGE_UPLOAD_MAX_SIZE // (1024 * 1024)}MB per image)'
+            )
+        return super().handle_raw_input(input_data, META, content_length, boundary, encoding)
+    
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.max_size = max_upload_size(self.field_name)
+        self.received = 0
+        self.hasher = hashlib.sha256()
+        self.image_format = None
+        self.image_size = None
+    
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0:
+            self._inspect_head(raw_data)
+        
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            raise UploadRejected(f'Image size must be less than {self.max_size // (1024 * 1024)}MB')
+        
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+    
+    def _inspect_head(self, head):
+        self.image_format, self.image_size = inspect_image_head(head)
+    
+    def file_complete(self, file_size):
+        if self.image_format is None or file_size == 0:
+            # Part kosong: receive_data_chunk tidak pernah dipanggil
+            self.file.close()
+            raise UploadRejected('Invalid image file. Allowed: JPEG, PNG, GIF, WEBP')
+        
+        file = super().file_complete(file_size)
+        file.image_format = self.image_format
+        file.image_size = self.image_size
+        file.sha256 = self.hasher.hexdigest()
+        # Content-Type dari isi file, bukan dari client
+        file.content_type = CONTENT_TYPES[self.image_format]
+        metrics.upload_size.labels('multipart').observe(file_size)
+        return file
+
+
+class StreamingImageUploadMixin:
+    """
+    Pasang StreamingImageUploadHandler untuk action di `image_upload_actions`
+    (sebelum body di-parse). Endpoint lain tidak terpengaruh
+    """
+    image_upload_actions = ()
+    
+    def initialize_request(self, request, *args, **kwargs):
+        drf_request = super().initialize_request(request, *args, **kwargs)
+        if getattr(self, 'action', None) in self.image_upload_actions:
+            request.upload_handlers = [StreamingImageUploadHandler(request)]
+        return drf_request
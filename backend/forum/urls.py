@@ -7,16 +7,27 @@ from .views import (
     PostViewSet,
     CommentViewSet,
     NotificationViewSet,
+    EmailBroadcastViewSet,
 )
 from .views_auth import (
     register_user,
     verify_email,
     resend_verification_code,
     login_user,
+    logout_user,
+    check_availability,
     forgot_password,
     verify_reset_code,
     reset_password,
 )
+from .views_auth_async import login_user_async, change_password_async
+from .views_uploads import (
+    presign_upload,
+    create_upload_session,
+    upload_session_detail,
+    finalize_upload_session,
+)
+from .views_metrics import slow_queries, RequestProfileViewSet
 
 
 # Router untuk automatic URL routing
@@ -26,6 +37,8 @@ router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'posts', PostViewSet, basename='post')
 router.register(r'comments', CommentViewSet, basename='comment')
 router.register(r'notifications', NotificationViewSet, basename='notification')
+router.register(r'broadcasts', EmailBroadcastViewSet, basename='broadcast')
+router.register(r'admin/profiles', RequestProfileViewSet, basename='request-profile')
 
 urlpatterns = [
     # ✨ Secure Authentication Endpoints
@@ -33,9 +46,22 @@ urlpatterns = [
     path('auth/verify-email/', verify_email, name='verify_email'),
     path('auth/resend-code/', resend_verification_code, name='resend_code'),
     path('auth/login/', login_user, name='login'),
+    path('auth/logout/', logout_user, name='logout'),
+    path('auth/availability/', check_availability, name='check_availability'),
+    path('auth/async/login/', login_user_async, name='login_async'),
+    path('auth/async/change-password/', change_password_async, name='change_password_async'),
     path('auth/forgot-password/', forgot_password, name='forgot_password'),
     path('auth/verify-reset-code/', verify_reset_code, name='verify_reset_code'),
     path('auth/reset-password/', reset_password, name='reset_password'),
+    
+    # Uploads (resumable sessions, presigned direct upload for MEDIA_STORAGE=s3)
+    path('uploads/presign/', presign_upload, name='presign_upload'),
+    path('uploads/sessions/', create_upload_session, name='upload_sessions'),
+    path('uploads/sessions/<uuid:session_id>/', upload_session_detail, name='upload_session_detail'),
+    path('uploads/sessions/<uuid:session_id>/finalize/', finalize_upload_session, name='finalize_upload_session'),
+    
+    # Monitoring (admin)
+    path('admin/slow-queries/', slow_queries, name='slow_queries'),
 
     
     # Router URLs
@@ -52,6 +78,10 @@ AUTHENTICATION (Rate Limited):
   POST   /api/auth/verify-email/      - Verify email code (10/hour)
   POST   /api/auth/resend-code/       - Resend verification (10/hour)
   POST   /api/auth/login/             - Login (5/minute)
+  POST   /api/auth/logout/            - Revoke refresh token (30/hour per user)
+  GET    /api/auth/availability/      - Live username/email check (60/minute, email 10/hour)
+  POST   /api/auth/async/login/       - Login, async (ASGI, hashing on worker pool)
+  POST   /api/auth/async/change-password/ - Change password, async
   POST   /api/token/refresh/          - Refresh JWT token
 
 USERS:
@@ -60,6 +90,8 @@ USERS:
   GET    /api/users/me/               - Current user info
   PUT    /api/users/update_profile/   - Update profile
   POST   /api/users/change_password/  - Change password
+  PUT    /api/users/{id}/             - Update user (admin only)
+  DELETE /api/users/{id}/             - Delete user (admin only)
 
 CATEGORIES:
   GET    /api/categories/             - List categories
@@ -77,6 +109,14 @@ POSTS (XSS Protected):
   POST   /api/posts/{id}/pin/         - Pin (mod/admin)
   POST   /api/posts/{id}/close/       - Close (mod/admin)
 
+UPLOADS:
+  POST   /api/uploads/presign/        - Presigned PUT URL for a post image (S3 storage)
+  POST   /api/uploads/sessions/       - Start resumable upload (image / attachment)
+  GET    /api/uploads/sessions/{id}/  - Received byte ranges (resume)
+  PATCH  /api/uploads/sessions/{id}/  - Upload byte range (Content-Range)
+  DELETE /api/uploads/sessions/{id}/  - Cancel upload
+  POST   /api/uploads/sessions/{id}/finalize/ - Store completed upload
+
 COMMENTS (XSS Protected):
   GET    /api/comments/               - List comments
   POST   /api/comments/               - Create comment
@@ -91,6 +131,20 @@ NOTIFICATIONS:
   POST   /api/notifications/{id}/mark_read/ - Mark as read
   POST   /api/notifications/mark_all_read/  - Mark all read
 
+EMAIL BROADCAST (Admin only):
+  GET    /api/broadcasts/                   - List broadcasts + progress
+  POST   /api/broadcasts/                   - Queue broadcast to verified users
+  POST   /api/broadcasts/{id}/pause/        - Pause delivery
+  POST   /api/broadcasts/{id}/resume/       - Resume from last recipient
+  POST   /api/broadcasts/{id}/cancel/       - Cancel delivery
+
+MONITORING (Admin only):
+  GET    /api/admin/slow-queries/           - Slow-query report by SQL fingerprint
+  DELETE /api/admin/slow-queries/           - Reset slow-query stats
+  GET    /api/admin/profiles/               - Request profiles (header X-Forka-Profile: 1)
+  GET    /api/admin/profiles/{id}/cpu/      - CPU folded stacks (flamegraph)
+  GET    /api/admin/profiles/{id}/memory/   - Memory allocation folded stacks
+
 SECURITY FEATURES:
 ✅ Rate Limiting (prevents brute force)
 ✅ Email Verification (v2l)
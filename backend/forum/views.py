@@ -4,26 +4,29 @@ Complete Forum Views with Mark as Solved Feature
 Updated: 2025-01-05
 """
 
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, mixins, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from django.db.models import Q, Count
+from django.db.models import Q, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.settings import api_settings
 from django.utils.timezone import now
 from datetime import timedelta
 
-from .models import User, Category, Post, Comment, Notification
+from .models import User, Category, Post, Comment, Notification, EmailBroadcast
 from .serializers import (
     UserSerializer, UserDetailSerializer, UserRegistrationSerializer,
     UserUpdateSerializer,
     CategorySerializer,
     PostSerializer, PostCreateSerializer,
     CommentSerializer,
-    NotificationSerializer
+    NotificationSerializer,
+    EmailBroadcastSerializer,
 )
 from .permissions import (
     PostPermission,
@@ -31,23 +34,84 @@ from .permissions import (
     IsAdminOnly,
     IsModeratorOrAdmin
 )
+from .email_utils import queue_broadcast
+from .throttling import PostWriteRateThrottle, CommentWriteRateThrottle
+from .hashing import check_password, set_password
+from .uploads import StreamingImageUploadMixin
+
+
+# ============================================
+# COUNT ANNOTATIONS
+# ============================================
+
+def count_subquery(model, field):
+    """
+    COUNT(*) relasi per row sebagai subquery terkorelasi. Beberapa Count()
+    lewat JOIN saling mengalikan row (komentar x like); subquery tidak, dan
+    dengan ORDER BY + LIMIT cuma dihitung untuk row di halaman itu.
+    """
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(rows.annotate(total=Count('*')).values('total')), 0)
+
+
+def post_queryset():
+    """Queryset untuk semua output PostSerializer (relasi + likes/comments count)"""
+    return (
+        Post.objects
+        .select_related('author', 'category')
+        .prefetch_related('attachments')
+        .annotate(
+            likes_count=count_subquery(Post.likes.through, 'post'),
+            comments_count=count_subquery(Comment, 'post'),
+        )
+    )
+
+
+def comment_queryset():
+    """Queryset untuk semua output CommentSerializer (author + likes/replies count)"""
+    return (
+        Comment.objects
+        .select_related('author', 'post')
+        .annotate(
+            likes_count=count_subquery(Comment.likes.through, 'comment'),
+            replies_count=count_subquery(Comment, 'parent'),
+        )
+    )
 
 
 # ============================================
 # USER VIEWSET
 # ============================================
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(StreamingImageUploadMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    # Action yang butuh row user lengkap (lihat StatelessJWTAuthentication)
+    full_user_actions = ('me', 'update_profile', 'change_password')
+    image_upload_actions = ('update_profile',)
+    
+    def get_permissions(self):
+        """Create/update/delete user lain cuma admin (AdminUsers.jsx), profil sendiri lewat update_profile"""
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            return [IsAdminOnly()]
+        return super().get_permissions()
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return UserDetailSerializer
         return UserSerializer
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.annotate(
+                posts_count=count_subquery(Post, 'author'),
+                comments_count=count_subquery(Comment, 'author'),
+            )
+        return queryset
+    
     def get_serializer_context(self):
         """Pass request context to serializer"""
         context = super().get_serializer_context()
@@ -110,7 +174,7 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if not user.check_password(old_password):
+        if not check_password(user, old_password):
             return Response(
                 {'error': 'Old password is incorrect'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -130,7 +194,7 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        user.set_password(new_password)
+        set_password(user, new_password)
         user.save()
         
         return Response({
@@ -146,7 +210,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
     """
     API endpoint untuk Categories
     """
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(posts_count=count_subquery(Post, 'category'))
     serializer_class = CategorySerializer
     lookup_field = 'slug'
     
@@ -158,18 +222,19 @@ class CategoryViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def posts(self, request, slug=None):
-        """Get posts dari category ini"""
+        """Get posts dari category ini (paginated, terbaru dulu)"""
         category = self.get_object()
-        posts = Post.objects.filter(category=category)
-        serializer = PostSerializer(posts, many=True, context={'request': request})
-        return Response(serializer.data)
+        posts = post_queryset().filter(category=category).order_by('-created_at')
+        page = self.paginate_queryset(posts)
+        serializer = PostSerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
 
 
 # ============================================
 # POST VIEWSET - WITH MARK AS SOLVED
 # ============================================
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(StreamingImageUploadMixin, viewsets.ModelViewSet):
     """
     API endpoint untuk Posts
     - support image upload
@@ -185,6 +250,8 @@ class PostViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'content']
     ordering_fields = ['created_at', 'views_count']
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    throttle_classes = [*api_settings.DEFAULT_THROTTLE_CLASSES, PostWriteRateThrottle]
+    image_upload_actions = ('create', 'update', 'partial_update')
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -200,11 +267,7 @@ class PostViewSet(viewsets.ModelViewSet):
         """
         Queryset with filters and annotations
         """
-        queryset = (
-            Post.objects
-            .select_related('author', 'category')
-            .annotate(comments_count=Count('comments'))
-        )
+        queryset = post_queryset()
 
         # Filter by author
         author_id = self.request.query_params.get('author')
@@ -256,7 +319,7 @@ class PostViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
 
-        post = Post.objects.get(id=serializer.instance.id)
+        post = post_queryset().get(id=serializer.instance.id)
         output_serializer = PostSerializer(
             post,
             context={'request': request}
@@ -280,7 +343,7 @@ class PostViewSet(viewsets.ModelViewSet):
         """Like/Unlike post"""
         post = self.get_object()
 
-        if request.user in post.likes.all():
+        if post.likes.filter(pk=request.user.pk).exists():
             post.likes.remove(request.user)
             return Response({
                 'status': 'unliked',
@@ -391,13 +454,15 @@ class PostViewSet(viewsets.ModelViewSet):
 # ============================================
 
 class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all().select_related('author', 'post')
+    queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [CommentPermission]
+    full_user_actions = ('create',)  # response includes the nested author
+    throttle_classes = [*api_settings.DEFAULT_THROTTLE_CLASSES, CommentWriteRateThrottle]
     ordering = ['-created_at']
 
     def get_queryset(self):
-        queryset = Comment.objects.select_related('author', 'post')
+        queryset = comment_queryset()
 
         # Filter by post
         post_id = self.request.query_params.get('post')
@@ -425,7 +490,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         """Like/Unlike comment"""
         comment = self.get_object()
         
-        if request.user in comment.likes.all():
+        if comment.likes.filter(pk=request.user.pk).exists():
             comment.likes.remove(request.user)
             return Response({
                 'status': 'unliked',
@@ -442,7 +507,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     def replies(self, request, pk=None):
         """Get replies for a comment"""
         comment = self.get_object()
-        replies = comment.replies.select_related('author')
+        replies = comment_queryset().filter(parent=comment)
         serializer = self.get_serializer(replies, many=True)
         return Response(serializer.data)
 
@@ -460,7 +525,11 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         """Only show notifications untuk current user"""
-        return Notification.objects.filter(recipient=self.request.user).order_by('-created_at')
+        return (
+            Notification.objects.filter(recipient=self.request.user)
+            .select_related('sender')
+            .order_by('-created_at')
+        )
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
@@ -477,6 +546,64 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         return Response({'status': 'all marked as read'})
 
 
+# ============================================
+# EMAIL BROADCAST VIEWSET (ADMIN)
+# ============================================
+
+class EmailBroadcastViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint untuk email broadcast (admin only)
+    Broadcast langsung masuk antrian dan dikirim oleh worker `send_broadcasts`
+    """
+    queryset = EmailBroadcast.objects.select_related('created_by')
+    serializer_class = EmailBroadcastSerializer
+    permission_classes = [IsAdminOnly]
+    full_user_actions = ('create',)  # response includes the nested creator
+    
+    def perform_create(self, serializer):
+        broadcast = serializer.save(created_by=self.request.user)
+        queue_broadcast(broadcast)
+    
+    @action(detail=True, methods=['post'])
+    def pause(self, request, pk=None):
+        """Pause broadcast yang sedang antri/berjalan"""
+        broadcast = self.get_object()
+        if broadcast.status not in ['queued', 'sending']:
+            return Response(
+                {'error': f'Cannot pause a {broadcast.status} broadcast'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        broadcast.status = 'paused'
+        broadcast.save(update_fields=['status'])
+        return Response(self.get_serializer(broadcast).data)
+    
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Lanjutkan broadcast dari penerima terakhir"""
+        broadcast = self.get_object()
+        if broadcast.status not in ['paused', 'draft']:
+            return Response(
+                {'error': f'Cannot resume a {broadcast.status} broadcast'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queue_broadcast(broadcast)
+        return Response(self.get_serializer(broadcast).data)
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Batalkan broadcast"""
+        broadcast = self.get_object()
+        if broadcast.status in ['completed', 'cancelled']:
+            return Response(
+                {'error': f'Broadcast already {broadcast.status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        broadcast.status = 'cancelled'
+        broadcast.finished_at = now()
+        broadcast.save(update_fields=['status', 'finished_at'])
+        return Response(self.get_serializer(broadcast).data)
+
+
 # ============================================
 # VIEWS SUMMARY
 # ============================================
@@ -489,12 +616,14 @@ USER ENDPOINTS:
   GET    /api/users/me/             - Current user info
   PUT    /api/users/update_profile/ - Update profile (with image)
   POST   /api/users/change_password/- Change password
+  PUT    /api/users/{id}/           - Update user (admin only)
+  DELETE /api/users/{id}/           - Delete user (admin only)
 
 CATEGORY ENDPOINTS:
   GET    /api/categories/           - List categories
   POST   /api/categories/           - Create (admin only)
   GET    /api/categories/{slug}/    - Category detail
-  GET    /api/categories/{slug}/posts/ - Posts in category
+  GET    /api/categories/{slug}/posts/ - Posts in category (paginated)
 
 POST ENDPOINTS:
   GET    /api/posts/                - List posts (with filters)
@@ -521,6 +650,14 @@ NOTIFICATION ENDPOINTS:
   POST   /api/notifications/{id}/mark_read/ - Mark as read
   POST   /api/notifications/mark_all_read/  - Mark all read
 
+EMAIL BROADCAST ENDPOINTS (admin only):
+  GET    /api/broadcasts/               - List broadcasts + progress
+  POST   /api/broadcasts/               - Queue broadcast to all verified users
+  GET    /api/broadcasts/{id}/          - Broadcast detail + progress
+  POST   /api/broadcasts/{id}/pause/    - Pause delivery
+  POST   /api/broadcasts/{id}/resume/   - Resume from last recipient
+  POST   /api/broadcasts/{id}/cancel/   - Cancel delivery
+
 FILTERS & SEARCH:
   ?author=<id>         - Filter by author
   ?category=<id>       - Filter by category
@@ -11,9 +11,9 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework.throttling import AnonRateThrottle
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from django.contrib.auth.password_validation import validate_password
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db import transaction
@@ -21,32 +21,32 @@ from django.views.decorators.csrf import csrf_exempt  # ✅ IMPORT INI
 import bleach
 import logging
 
-from .models import User, EmailVerification, PasswordReset
+from .models import User
 from .serializers import UserRegistrationSerializer, UserSerializer
 from .email_utils import send_verification_email, send_password_reset_email
+from . import otp
+from .authentication import ForkaRefreshToken
+from .revocation import revoke
+from .hashing import PasswordHashingBusy, check_password
+from .throttling import (
+    LoginRateThrottle,
+    RegisterRateThrottle,
+    VerifyEmailRateThrottle,
+    LogoutRateThrottle,
+    AvailabilityRateThrottle,
+    AvailabilityEmailRateThrottle,
+)
+from .availability import (
+    normalize_username,
+    username_taken,
+    email_taken,
+    remember_user,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
-# ============================================
-# CUSTOM THROTTLE CLASSES
-# ============================================
-
-class LoginRateThrottle(AnonRateThrottle):
-    """5 login attempts per minute"""
-    rate = '5/minute'
-
-
-class RegisterRateThrottle(AnonRateThrottle):
-    """3 registrations per hour per IP"""
-    rate = '3/hour'
-
-
-class VerifyEmailRateThrottle(AnonRateThrottle):
-    """10 verification attempts per hour"""
-    rate = '10/hour'
-
 
 # ============================================
 # HELPER FUNCTIONS
@@ -71,6 +71,15 @@ def sanitize_input(text):
     return clean_text.strip()
 
 
+def otp_error(result, kind):
+    """Pesan error untuk hasil otp.verify_code selain VALID"""
+    if result == otp.LOCKED:
+        return 'Too many attempts. Please request a new code.'
+    if result == otp.EXPIRED:
+        return f'{kind.capitalize()} code has expired'
+    return f'Invalid {kind} code'
+
+
 def validate_email_format(email):
     """Validate email format"""
     from django.core.validators import validate_email as django_validate_email
@@ -113,14 +122,14 @@ def register_user(request):
                 'error': 'Invalid email format'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check if email already exists
-        if User.objects.filter(email=data.get('email')).exists():
+        # Check if email already exists (case-insensitive)
+        if User.objects.with_email(data.get('email')).exists():
             return Response({
                 'error': 'Email already registered'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check if username already exists
-        if User.objects.filter(username=data.get('username')).exists():
+        # Check if username already exists (case-insensitive)
+        if User.objects.filter(username__lower=normalize_username(data.get('username'))).exists():
             return Response({
                 'error': 'Username already taken'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -148,11 +157,13 @@ def register_user(request):
             user.email_verified = False  # Require email verification
             user.save()
             
-            # Generate and send verification code
-            verification = EmailVerification.objects.create(user=user)
+            # Generate verification code and queue the email in the same
+            # transaction (delivered by the outbox worker, no SMTP wait here)
+            code = otp.issue_code(otp.PURPOSE_VERIFY_EMAIL, user)
             
-            if send_verification_email(user, verification.code):
-                logger.info(f"User registered: {user.username} - Email verification sent")
+            if send_verification_email(user, code):
+                transaction.on_commit(lambda: remember_user(user))
+                logger.info(f"User registered: {user.username} - Email verification queued")
                 
                 return Response({
                     'message': 'Registration successful! Please check your email for verification code.',
@@ -164,8 +175,8 @@ def register_user(request):
                     'email_verification_required': True
                 }, status=status.HTTP_201_CREATED)
             else:
-                # If email fails, delete user
-                user.delete()
+                # If queueing fails, roll back the new user
+                transaction.set_rollback(True)
                 return Response({
                     'error': 'Failed to send verification email. Please try again.'
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -177,6 +188,57 @@ def register_user(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# ============================================
+# USERNAME / EMAIL AVAILABILITY
+# ============================================
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@throttle_classes([AvailabilityRateThrottle, AvailabilityEmailRateThrottle])
+def check_availability(request):
+    """
+    Live availability check for the register form
+    
+    GET /api/auth/availability/?username=budi&email=budi@example.com
+    
+    - Case-insensitive ("Budi" == "budi")
+    - Bloom filter first, DB only for probable hits
+    - Result is a hint; register_user still checks the DB
+    - Email checks are throttled far harder than usernames (an email
+      that is taken reveals a registered account)
+    """
+    username = sanitize_input(request.query_params.get('username', ''))
+    email = sanitize_input(request.query_params.get('email', ''))
+    
+    if not username and not email:
+        return Response({
+            'error': 'Username or email is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    result = {}
+    
+    if username:
+        result['username'] = {
+            'value': username,
+            'available': not username_taken(username),
+        }
+    
+    if email:
+        if not validate_email_format(email):
+            result['email'] = {
+                'value': email,
+                'available': False,
+                'error': 'Invalid email format',
+            }
+        else:
+            result['email'] = {
+                'value': email,
+                'available': not email_taken(email),
+            }
+    
+    return Response(result, status=status.HTTP_200_OK)
+
+
 # ============================================
 # EMAIL VERIFICATION
 # ============================================
@@ -204,40 +266,27 @@ def verify_email(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        user = User.objects.get(email=email)
+        user = User.objects.get_by_email(email)
         
         if user.email_verified:
             return Response({
                 'error': 'Email already verified'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Find valid verification code
-        verification = EmailVerification.objects.filter(
-            user=user,
-            code=code,
-            is_used=False
-        ).order_by('-created_at').first()
+        # Check code (one-time use, attempts limited)
+        result = otp.verify_code(otp.PURPOSE_VERIFY_EMAIL, user, code)
         
-        if not verification:
+        if result != otp.VALID:
             return Response({
-                'error': 'Invalid verification code'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not verification.is_valid():
-            return Response({
-                'error': 'Verification code has expired'
+                'error': otp_error(result, 'verification')
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Mark as verified
-        with transaction.atomic():
-            user.email_verified = True
-            user.save()
-            
-            verification.is_used = True
-            verification.save()
+        user.email_verified = True
+        user.save(update_fields=['email_verified'])
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = ForkaRefreshToken.for_user(user)
         
         logger.info(f"Email verified for user: {user.username}")
         
@@ -286,23 +335,17 @@ def resend_verification_code(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        user = User.objects.get(email=email)
+        user = User.objects.get_by_email(email)
         
         if user.email_verified:
             return Response({
                 'error': 'Email already verified'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Invalidate old codes
-        EmailVerification.objects.filter(
-            user=user,
-            is_used=False
-        ).update(is_used=True)
-        
-        # Generate new code
-        verification = EmailVerification.objects.create(user=user)
+        # Generate new code (replaces the old one)
+        code = otp.issue_code(otp.PURPOSE_VERIFY_EMAIL, user)
         
-        if send_verification_email(user, verification.code):
+        if send_verification_email(user, code):
             return Response({
                 'message': 'Verification code sent to your email'
             }, status=status.HTTP_200_OK)
@@ -348,24 +391,25 @@ def login_user(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        user = User.objects.get(username=username)
+        user = User.objects.get_by_username(username)
         
-        # Check if account is locked
-        if user.is_account_locked():
-            lock_time_remaining = (user.account_locked_until - timezone.now()).seconds // 60
+        # Check if account is locked (cache lookup, no DB write)
+        locked_until = user.get_locked_until()
+        if locked_until:
+            lock_time_remaining = (locked_until - timezone.now()).seconds // 60
             return Response({
                 'error': f'Account locked. Try again in {lock_time_remaining} minutes.',
-                'locked_until': user.account_locked_until.isoformat()
+                'locked_until': locked_until.isoformat()
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Verify password
-        if not user.check_password(password):
-            user.increment_failed_login()
+        # Verify password (hashing on bounded pool, rehash if params changed)
+        if not check_password(user, password):
+            attempts, _ = user.increment_failed_login()
             logger.warning(f"Failed login attempt for user: {username}")
             
             return Response({
                 'error': 'Invalid credentials',
-                'attempts_remaining': 5 - user.failed_login_attempts
+                'attempts_remaining': max(settings.ACCOUNT_LOCKOUT_THRESHOLD - attempts, 0)
             }, status=status.HTTP_401_UNAUTHORIZED)
         
         # Check email verification
@@ -376,11 +420,11 @@ def login_user(request):
                 'email': user.email
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Successful login
+        # Successful login (only writes if old lockout state is stored on the row)
         user.reset_failed_login()
         
         # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = ForkaRefreshToken.for_user(user)
         
         logger.info(f"Successful login: {username}")
         
@@ -398,6 +442,11 @@ def login_user(request):
         return Response({
             'error': 'Invalid credentials'
         }, status=status.HTTP_401_UNAUTHORIZED)
+    except PasswordHashingBusy as e:
+        # Pool penuh: tolak cepat, jangan tahan worker
+        return Response({
+            'error': e.detail
+        }, status=e.status_code, headers={'Retry-After': '1'})
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         return Response({
@@ -438,18 +487,12 @@ def forgot_password(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        user = User.objects.get(email=email)
-        
-        # Invalidate old reset codes
-        PasswordReset.objects.filter(
-            user=user,
-            is_used=False
-        ).update(is_used=True)
+        user = User.objects.get_by_email(email)
         
-        # Generate new reset code
-        reset_code = PasswordReset.objects.create(user=user)
+        # Generate new reset code (replaces the old one)
+        reset_code = otp.issue_code(otp.PURPOSE_PASSWORD_RESET, user)
         
-        if send_password_reset_email(user, reset_code.code):
+        if send_password_reset_email(user, reset_code):
             logger.info(f"Password reset code sent to {email}")
             return Response({
                 'message': 'If this email is registered, a reset code has been sent'
@@ -496,23 +539,14 @@ def verify_reset_code(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        user = User.objects.get(email=email)
+        user = User.objects.get_by_email(email)
         
-        # Find valid reset code
-        reset_code = PasswordReset.objects.filter(
-            user=user,
-            code=code,
-            is_used=False
-        ).order_by('-created_at').first()
+        # Check reset code (don't consume yet, attempts still counted)
+        result = otp.verify_code(otp.PURPOSE_PASSWORD_RESET, user, code, consume=False)
         
-        if not reset_code:
+        if result != otp.VALID:
             return Response({
-                'error': 'Invalid reset code'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not reset_code.is_valid():
-            return Response({
-                'error': 'Reset code has expired'
+                'error': otp_error(result, 'reset')
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Code is valid, return success (don't mark as used yet)
@@ -569,7 +603,7 @@ def reset_password(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        user = User.objects.get(email=email)
+        user = User.objects.get_by_email(email)
         
         # Validate password strength
         try:
@@ -579,21 +613,12 @@ def reset_password(request):
                 'error': list(e.messages)
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Find valid reset code
-        reset_code = PasswordReset.objects.filter(
-            user=user,
-            code=code,
-            is_used=False
-        ).order_by('-created_at').first()
+        # Check and consume reset code
+        result = otp.verify_code(otp.PURPOSE_PASSWORD_RESET, user, code)
         
-        if not reset_code:
+        if result != otp.VALID:
             return Response({
-                'error': 'Invalid or expired reset code'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not reset_code.is_valid():
-            return Response({
-                'error': 'Reset code has expired'
+                'error': otp_error(result, 'reset')
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Reset password (atomic transaction)
@@ -601,10 +626,6 @@ def reset_password(request):
             user.set_password(new_password)
             user.save()
             
-            # Mark code as used
-            reset_code.is_used = True
-            reset_code.save()
-            
             # Reset failed login attempts
             user.reset_failed_login()
         
@@ -622,4 +643,43 @@ def reset_password(request):
         logger.error(f"Reset password error: {str(e)}")
         return Response({
             'error': 'Password reset failed'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ============================================
+# LOGOUT (Revoke Refresh Token)
+# ============================================
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([LogoutRateThrottle])
+def logout_user(request):
+    """
+    Revoke refresh token (logout)
+    
+    Security:
+    - Rate limited per user (own bucket, not shared with email verification)
+    - Refresh token tidak bisa dipakai lagi untuk /api/token/refresh/
+    - Access token yang sudah ada tetap valid sampai expired (1 jam)
+    - CSRF exempt (using JWT)
+    """
+    raw_token = request.data.get('refresh', '')
+    
+    if not raw_token:
+        return Response({
+            'error': 'Refresh token is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        refresh = ForkaRefreshToken(raw_token)
+    except TokenError:
+        return Response({
+            'error': 'Invalid or expired token'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    revoke(refresh['jti'], refresh['exp'])
+    
+    return Response({
+        'message': 'Logged out successfully'
+    }, status=status.HTTP_200_OK)
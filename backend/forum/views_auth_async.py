@@ -0,0 +1,203 @@
+# backend/forum/views_auth_async.py
+"""
+Async auth endpoints (untuk deploy ASGI: uvicorn/daphne)
+
+Password hashing di-offload ke forum.hashing pool, jadi event loop
+tetap bisa melayani request lain selama PBKDF2 jalan.
+Logika sama dengan login_user / UserViewSet.change_password;
+DRF function views tidak async, jadi request/response di sini
+pakai Django JsonResponse langsung.
+"""
+
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .models import User
+from .serializers import UserSerializer
+from .authentication import ForkaRefreshToken, StatelessJWTAuthentication
+from .hashing import PasswordHashingBusy, acheck_password, aset_password
+from .throttling import LoginRateThrottle
+from .views_auth import sanitize_input
+
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# HELPER FUNCTIONS
+# ============================================
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _busy_response():
+    response = JsonResponse({
+        'error': PasswordHashingBusy.default_detail
+    }, status=PasswordHashingBusy.status_code)
+    response['Retry-After'] = '1'
+    return response
+
+
+def _throttled_response(throttle):
+    response = JsonResponse({
+        'error': 'Too many requests. Please try again later.'
+    }, status=429)
+    wait = throttle.wait()
+    if wait is not None:
+        response['Retry-After'] = str(int(wait) + 1)
+    return response
+
+
+def _login_payload(user):
+    refresh = ForkaRefreshToken.for_user(user)
+    return {
+        'user': UserSerializer(user).data,
+        'tokens': {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        }
+    }
+
+
+# ============================================
+# ASYNC LOGIN
+# ============================================
+
+@csrf_exempt
+@require_POST
+async def login_user_async(request):
+    """
+    Async version of login_user
+    
+    Security:
+    - Rate limited (same 'login' scope)
+    - Account lockout
+    - Hashing on bounded pool, 503 + Retry-After when full
+    """
+    throttle = LoginRateThrottle()
+    if not await sync_to_async(throttle.allow_request)(request, None):
+        return _throttled_response(throttle)
+    
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    
+    username = sanitize_input(data.get('username', ''))
+    password = data.get('password', '')  # Don't sanitize password
+    
+    if not username or not password:
+        return JsonResponse({
+            'error': 'Username and password are required'
+        }, status=400)
+    
+    try:
+        user = await User.objects.aget_by_username(username)
+        
+        locked_until = await sync_to_async(user.get_locked_until)()
+        if locked_until:
+            lock_time_remaining = (locked_until - timezone.now()).seconds // 60
+            return JsonResponse({
+                'error': f'Account locked. Try again in {lock_time_remaining} minutes.',
+                'locked_until': locked_until.isoformat()
+            }, status=403)
+        
+        if not await acheck_password(user, password):
+            attempts, _ = await sync_to_async(user.increment_failed_login)()
+            logger.warning(f"Failed login attempt for user: {username}")
+            
+            return JsonResponse({
+                'error': 'Invalid credentials',
+                'attempts_remaining': max(settings.ACCOUNT_LOCKOUT_THRESHOLD - attempts, 0)
+            }, status=401)
+        
+        if not user.email_verified:
+            return JsonResponse({
+                'error': 'Email not verified',
+                'email_verification_required': True,
+                'email': user.email
+            }, status=403)
+        
+        await sync_to_async(user.reset_failed_login)()
+        payload = await sync_to_async(_login_payload)(user)
+        
+        logger.info(f"Successful login: {username}")
+        return JsonResponse(payload, status=200)
+    
+    except User.DoesNotExist:
+        logger.warning(f"Login attempt for non-existent user: {username}")
+        return JsonResponse({'error': 'Invalid credentials'}, status=401)
+    except PasswordHashingBusy:
+        return _busy_response()
+    except Exception as e:
+        logger.error(f"Async login error: {str(e)}")
+        return JsonResponse({'error': 'Login failed'}, status=500)
+
+
+# ============================================
+# ASYNC CHANGE PASSWORD
+# ============================================
+
+@csrf_exempt
+@require_POST
+async def change_password_async(request):
+    """
+    Async version of UserViewSet.change_password (JWT required)
+    """
+    try:
+        auth = await sync_to_async(StatelessJWTAuthentication().authenticate)(request)
+    except (InvalidToken, AuthenticationFailed):
+        return JsonResponse({'error': 'Invalid or expired token'}, status=401)
+    if auth is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided.'}, status=401)
+    
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    
+    old_password = data.get('old_password')
+    new_password = data.get('new_password')
+    new_password2 = data.get('new_password2')
+    
+    if not old_password or not new_password or not new_password2:
+        return JsonResponse({'error': 'All fields are required'}, status=400)
+    
+    try:
+        # Token user bisa stateless (field deferred), ambil row lengkap
+        user = await User.objects.aget(pk=auth[0].pk, is_active=True)
+        
+        if not await acheck_password(user, old_password):
+            return JsonResponse({'error': 'Old password is incorrect'}, status=400)
+        
+        if new_password != new_password2:
+            return JsonResponse({'error': 'New passwords do not match'}, status=400)
+        
+        try:
+            await sync_to_async(validate_password)(new_password, user)
+        except ValidationError as e:
+            return JsonResponse({'error': list(e.messages)}, status=400)
+        
+        await aset_password(user, new_password)
+        await user.asave()
+        
+        return JsonResponse({'message': 'Password changed successfully'})
+    
+    except User.DoesNotExist:
+        return JsonResponse({'error': 'User not found'}, status=401)
+    except PasswordHashingBusy:
+        return _busy_response()
@@ -0,0 +1,200 @@
+# backend/forum/views_media.py
+"""
+Media serving (post image, profile picture, varian WebP)
+
+Django cuma cek akses lalu menyerahkan transfer file ke web server:
+- MEDIA_SERVE_MODE = 'accel'    -> X-Accel-Redirect (nginx, location internal)
+- MEDIA_SERVE_MODE = 'sendfile' -> X-Sendfile (Apache mod_xsendfile / lighttpd)
+- MEDIA_SERVE_MODE = 'python'   -> FileResponse; di gunicorn dikirim lewat
+  wsgi.file_wrapper (sendfile), worker tidak membaca isi file
+
+Range request (video player, resume download) dilayani web server untuk
+accel/sendfile, dan oleh RangeFile untuk mode python.
+
+Nama blob (blobs/ab/cd/<sha256>.ext) tidak pernah berubah isinya, jadi
+di-cache 1 tahun + immutable; file lama (posts/, profiles/) pakai
+MEDIA_CACHE_MAX_AGE + Last-Modified.
+
+Dengan MEDIA_STORAGE=s3 view ini cuma redirect ke URL bucket / CDN.
+"""
+
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect,
+)
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from .storage import blob_digest, is_blob
+
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# ============================================
+# HELPER FUNCTIONS
+# ============================================
+
+def clean_media_path(path):
+    """
+    Normalisasi path request, None kalau tidak boleh diakses
+    (traversal, dotfile, folder di luar MEDIA_SERVE_DIRS)
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    parts = path.split('/')
+    if not path or path.startswith('..') or any(part.startswith('.') for part in parts):
+        return None
+    if parts[0] not in settings.MEDIA_SERVE_DIRS:
+        return None
+    return path
+
+
+def blob_etag(name):
+    """Nama blob = SHA-256 isi file, langsung jadi ETag"""
+    return f'"{blob_digest(name)}"'
+
+
+def cache_headers(response, name, stat):
+    if is_blob(name):
+        response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        response['ETag'] = blob_etag(name)
+    else:
+        response['Cache-Control'] = f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
+
+
+def parse_range(header, size):
+    """
+    (start, end) inklusif untuk satu range 'bytes=a-b', None kalau tanpa
+    Range / format tidak didukung (kirim file penuh), 'invalid' kalau di luar file
+    """
+    match = RANGE_RE.match(header or '')
+    if not match:
+        return None
+    
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500 -> 500 byte terakhir
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'invalid'
+    return start, end
+
+
+class RangeFile:
+    """
+    File yang dibatasi ke satu range. fileno() tetap diekspos supaya
+    wsgi.file_wrapper (gunicorn) bisa pakai sendfile dari posisi start.
+    """
+    
+    def __init__(self, fh, start, length):
+        fh.seek(start)
+        self._fh = fh
+        self.remaining = length
+        self.name = fh.name
+    
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._fh.read(size)
+        self.remaining -= len(data)
+        return data
+    
+    def fileno(self):
+        return self._fh.fileno()
+    
+    def close(self):
+        self._fh.close()
+
+
+def _offload_response(name, full_path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SERVE_MODE == 'accel':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + name
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+def _file_response(request, full_path, content_type, size):
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(open(full_path, 'rb'), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+# ============================================
+# MEDIA VIEW
+# ============================================
+
+@require_safe
+def serve_media(request, path):
+    """GET/HEAD /media/<path>"""
+    name = clean_media_path(path)
+    if name is None:
+        raise Http404('Media not found')
+    
+    try:
+        full_path = default_storage.path(name)
+    except NotImplementedError:
+        # Storage remote (S3): file dilayani bucket / CDN langsung
+        return HttpResponseRedirect(default_storage.url(name))
+    
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Media not found')
+    
+    # Blob immutable: ETag cocok berarti isi pasti sama
+    if is_blob(name) and request.META.get('HTTP_IF_NONE_MATCH') == blob_etag(name):
+        return cache_headers(HttpResponseNotModified(), name, stat)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return cache_headers(HttpResponseNotModified(), name, stat)
+    
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    
+    if settings.MEDIA_SERVE_MODE in ('accel', 'sendfile'):
+        response = _offload_response(name, full_path, content_type)
+    else:
+        response = _file_response(request, full_path, content_type, stat.st_size)
+    
+    response['X-Content-Type-Options'] = 'nosniff'
+    return cache_headers(response, name, stat)
@@ -0,0 +1,104 @@
+# backend/forum/views_metrics.py
+"""
+Monitoring endpoints
+
+    GET /metrics                            Prometheus (cuma dari METRICS_ALLOWED_NETWORKS)
+    GET /api/admin/slow-queries/            Slow-query report (admin)
+    GET /api/admin/profiles/                Profil request (admin, forum/profiler.py)
+    GET /api/admin/profiles/{id}/cpu/       Folded stacks CPU (flamegraph)
+    GET /api/admin/profiles/{id}/memory/    Folded stacks alokasi memori
+
+/metrics dari alamat lain balas 404, supaya endpoint tidak kelihatan dari
+luar. Pakai REMOTE_ADDR, bukan X-Forwarded-For (bisa dipalsukan client).
+Request yang membawa X-Forwarded-For / X-Real-IP / Forwarded datang lewat
+reverse proxy (REMOTE_ADDR = proxy, biasanya loopback) dan selalu ditolak:
+scrape langsung ke port gunicorn. METRICS_TOKEN menambah bearer token.
+"""
+
+from django.http import Http404, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
+from rest_framework import status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.response import Response
+
+from .models import RequestProfile
+from .permissions import IsAdminOnly
+from .serializers import RequestProfileSerializer
+from . import metrics, querylog
+
+
+@require_safe
+def metrics_view(request):
+    """GET /metrics"""
+    if not metrics.scrape_allowed(request):
+        raise Http404
+    
+    if not metrics.enabled():
+        return HttpResponse(
+            'Metrics disabled (install prometheus_client, METRICS_ENABLED=True)\n',
+            status=503,
+            content_type='text/plain',
+        )
+    
+    body, content_type = metrics.render_latest()
+    return HttpResponse(body, content_type=content_type)
+
+
+@csrf_exempt
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminOnly])
+def slow_queries(request):
+    """
+    GET    /api/admin/slow-queries/?sort=total&limit=20
+           sort: total | p95 | max | count
+    DELETE /api/admin/slow-queries/   reset statistik semua proses
+    """
+    if request.method == 'DELETE':
+        querylog.reset_all()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    sort = request.query_params.get('sort', 'total')
+    if sort not in querylog.SORT_KEYS:
+        return Response({
+            'error': f"sort must be one of: {', '.join(querylog.SORT_KEYS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 200)
+    except ValueError:
+        return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(querylog.build_report(sort=sort, limit=limit))
+
+
+class RequestProfileViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Profil request yang diminta admin (header X-Forka-Profile)
+    """
+    queryset = RequestProfile.objects.select_related('user').defer('cpu_folded', 'memory_folded')
+    serializer_class = RequestProfileSerializer
+    permission_classes = [IsAdminOnly]
+    
+    def get_queryset(self):
+        # Download cuma butuh satu kolom folded, jangan di-defer (query kedua)
+        if self.action in ('cpu', 'memory'):
+            return RequestProfile.objects.only('pk', f'{self.action}_folded')
+        return super().get_queryset()
+    
+    def _download(self, field, kind):
+        # get_object(): pk bukan angka / tidak ada -> 404, bukan 500
+        profile = self.get_object()
+        response = HttpResponse(getattr(profile, field), content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.pk}-{kind}.folded"'
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def cpu(self, request, pk=None):
+        """Folded stacks (jumlah sample), untuk flamegraph.pl / speedscope"""
+        return self._download('cpu_folded', 'cpu')
+    
+    @action(detail=True, methods=['get'])
+    def memory(self, request, pk=None):
+        """Folded stacks (byte teralokasi di akhir request)"""
+        return self._download('memory_folded', 'memory')
@@ -0,0 +1,244 @@
+# backend/forum/views_uploads.py
+"""
+Upload endpoints
+
+Resumable upload session (semua storage), lihat forum/resumable.py:
+    POST /api/uploads/sessions/ -> PATCH byte range -> finalize, lalu
+    POST /api/posts/ dengan image_upload / attachment_uploads
+
+Direct upload ke object storage (MEDIA_STORAGE=s3)
+
+Alur:
+1. Client hitung SHA-256 file, POST /api/uploads/presign/
+2. Server balas presigned PUT URL ke key blob (blobs/ab/cd/<sha256>.ext);
+   kalau blob sudah ada (file identik pernah di-upload, atau blob tanpa
+   EXIF hasil prosesnya) upload dilewati
+3. Client PUT file langsung ke bucket (tidak lewat worker Django)
+4. Client POST /api/posts/ dengan image_key=<key>; serializer verifikasi
+   object lalu mencatat referensinya
+"""
+
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .models import MediaBlob, UploadSession
+from .serializers import ALLOWED_IMAGE_FORMATS
+from .storage import blob_name
+from .throttling import UploadChunkRateThrottle, UploadRateThrottle
+from .uploads import CONTENT_TYPES, UploadRejected, max_upload_size
+from . import resumable
+
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+# ============================================
+# HELPER FUNCTIONS
+# ============================================
+
+def _image_format(filename):
+    """Format image dari ekstensi nama file, None kalau tidak diizinkan"""
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return next((fmt for fmt, extensions in ALLOWED_IMAGE_FORMATS.items() if ext in extensions), None)
+
+
+def _invalid_format_response():
+    allowed = [ext for extensions in ALLOWED_IMAGE_FORMATS.values() for ext in extensions]
+    return Response({
+        'error': f"Invalid image format. Allowed: {', '.join(allowed)}"
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _session_payload(session):
+    return {
+        'id': str(session.pk),
+        'filename': session.filename,
+        'size': session.size,
+        'received': session.received,
+        'received_bytes': session.received_bytes,
+        'status': session.status,
+        'chunk_size': settings.UPLOAD_CHUNK_SIZE,
+        'expires_at': session.expires_at,
+    }
+
+
+def _get_session(request, session_id):
+    return UploadSession.objects.filter(
+        pk=session_id,
+        user=request.user,
+        expires_at__gt=timezone.now(),
+    ).first()
+
+
+# ============================================
+# RESUMABLE UPLOAD SESSIONS
+# ============================================
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([UploadRateThrottle])
+def create_upload_session(request):
+    """
+    Mulai resumable upload
+    
+    POST /api/uploads/sessions/
+    {"filename": "foto.jpg", "size": 7340032, "sha256": "<hex, opsional>"}
+    """
+    filename = str(request.data.get('filename', ''))[:255]
+    sha256 = str(request.data.get('sha256', '')).lower()
+    try:
+        size = int(request.data.get('size', 0))
+    except (TypeError, ValueError):
+        size = 0
+    
+    limit = max_upload_size('image')
+    if size <= 0 or size > limit:
+        return Response({
+            'error': f'Image size must be less than {limit // (1024 * 1024)}MB'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if _image_format(filename) is None:
+        return _invalid_format_response()
+    if sha256 and not SHA256_RE.match(sha256):
+        return Response({'error': 'sha256 must be a hex SHA-256 digest'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    active = UploadSession.objects.filter(
+        user=request.user,
+        status='uploading',
+        expires_at__gt=timezone.now(),
+    ).count()
+    if active >= settings.UPLOAD_SESSION_MAX_ACTIVE:
+        return Response({
+            'error': 'Too many unfinished uploads. Finish or cancel one first.'
+        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    
+    session = resumable.create_session(request.user, filename, size, sha256)
+    return Response(_session_payload(session), status=status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+@api_view(['GET', 'PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([*api_settings.DEFAULT_THROTTLE_CLASSES, UploadChunkRateThrottle])
+def upload_session_detail(request, session_id):
+    """
+    GET    -> status + range yang sudah diterima
+    PATCH  -> kirim satu byte range (Content-Range: bytes start-end/total)
+    DELETE -> batalkan upload
+    """
+    session = _get_session(request, session_id)
+    if session is None:
+        return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.method == 'GET':
+        return Response(_session_payload(session), status=status.HTTP_200_OK)
+    
+    if request.method == 'DELETE':
+        resumable.abort(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    if session.status != 'uploading':
+        return Response({'error': 'Upload already finalized'}, status=status.HTTP_409_CONFLICT)
+    
+    # Body dibaca langsung dari stream (bukan request.data / request.body)
+    stream = request.stream
+    if stream is None:
+        return Response({'error': 'Request body is empty'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        start, end = resumable.parse_content_range(request.META.get('HTTP_CONTENT_RANGE'), session.size)
+        session = resumable.write_chunk(session, start, end, stream)
+    except UploadRejected as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(_session_payload(session), status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([UploadRateThrottle])
+def finalize_upload_session(request, session_id):
+    """
+    Semua byte sudah diterima -> simpan sebagai blob
+    
+    POST /api/uploads/sessions/{id}/finalize/
+    """
+    session = _get_session(request, session_id)
+    if session is None:
+        return Response({'error': 'Upload session not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        session = resumable.finalize(session)
+    except UploadRejected as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(_session_payload(session), status=status.HTTP_200_OK)
+
+
+# ============================================
+# DIRECT UPLOAD (PRESIGNED URL)
+# ============================================
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([UploadRateThrottle])
+def presign_upload(request):
+    """
+    Presigned PUT URL untuk upload post image langsung ke bucket
+    
+    POST /api/uploads/presign/
+    {"filename": "foto.jpg", "size": 1234567, "sha256": "<hex>"}
+    """
+    if not getattr(default_storage, 'supports_direct_upload', False):
+        return Response({
+            'error': 'Direct upload is not enabled on this server'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    filename = str(request.data.get('filename', ''))
+    sha256 = str(request.data.get('sha256', '')).lower()
+    try:
+        size = int(request.data.get('size', 0))
+    except (TypeError, ValueError):
+        size = 0
+    
+    if not SHA256_RE.match(sha256):
+        return Response({'error': 'sha256 must be a hex SHA-256 digest'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    limit = max_upload_size('image')
+    if size <= 0 or size > limit:
+        return Response({
+            'error': f'Image size must be less than {limit // (1024 * 1024)}MB'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    fmt = _image_format(filename)
+    if fmt is None:
+        return _invalid_format_response()
+    
+    # File identik sudah ada (atau hasil prosesnya): tidak perlu upload lagi
+    blob = default_storage.resolve_processed(sha256) or MediaBlob.objects.filter(digest=sha256).first()
+    if blob and default_storage.exists(blob.name):
+        return Response({'key': blob.name, 'upload': None}, status=status.HTTP_200_OK)
+    
+    key = blob_name(sha256, filename)
+    upload = default_storage.presigned_put(
+        key,
+        content_type=CONTENT_TYPES[fmt],
+        sha256=sha256,
+        expires_in=settings.MEDIA_PRESIGN_EXPIRY,
+    )
+    return Response({
+        'key': key,
+        'upload': upload,
+        'expires_in': settings.MEDIA_PRESIGN_EXPIRY,
+    }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,38 @@
+# backend/gunicorn.conf.py
+"""
+Gunicorn config, otomatis dipakai kalau gunicorn dijalankan dari backend/:
+
+    gunicorn forka_backend.wsgi:application
+
+Jumlah worker dari env WEB_CONCURRENCY (bawaan gunicorn).
+
+Prometheus multiprocess mode (forum/metrics.py): tiap worker menulis
+metric ke PROMETHEUS_MULTIPROC_DIR, /metrics menjumlahkan semuanya.
+Folder dikosongkan saat master start (angka dari run sebelumnya tidak
+ikut terhitung), dan file worker yang mati ditandai di child_exit.
+"""
+
+import os
+import shutil
+import tempfile
+
+
+# Di-set sebelum worker fork & import aplikasi, jadi semua worker memakai folder yang sama
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'forka-prometheus'),
+)
+
+
+def on_starting(server):
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
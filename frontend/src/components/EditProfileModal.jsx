@@ -135,6 +135,7 @@ const EditProfileModal = ({ isOpen, onClose, currentUser, onUpdate }) => {
                 // Jika tidak, tampilkan gambar SAAT INI (atau fallback)
                 <ProfileImage
                   src={currentUser?.profile_picture}
+                  srcset={currentUser?.profile_picture_srcset}
                   username={currentUser?.username}
                   size="2xl"
                 />
@@ -5,11 +5,22 @@
 import { useState } from 'react';
 import { ImageOff } from 'lucide-react';
 
+/**
+ * Convert API srcset map ({ "160": url, "480": url }) to an <img srcSet> string
+ */
+export const toSrcSet = (srcset) => {
+  if (!srcset) return undefined;
+  return Object.entries(srcset)
+    .map(([width, url]) => `${url} ${width}w`)
+    .join(', ');
+};
+
 /**
  * ProfileImage Component
  * Displays user profile picture with automatic fallback to avatar
  * 
  * @param {string} src - Image URL from API
+ * @param {object} srcset - Optional WebP variants map from API (profile_picture_srcset)
  * @param {string} username - Username for fallback avatar
  * @param {string} size - Size: xs, sm, md, lg, xl, 2xl
  * @param {string} className - Additional CSS classes
@@ -17,11 +28,12 @@ import { ImageOff } from 'lucide-react';
  * Usage:
  * <ProfileImage 
  *   src={user.profile_picture} 
+ *   srcset={user.profile_picture_srcset}
  *   username={user.username} 
  *   size="md" 
  * />
  */
-export const ProfileImage = ({ src, username, size = 'md', className = '' }) => {
+export const ProfileImage = ({ src, srcset, username, size = 'md', className = '' }) => {
   const [imageError, setImageError] = useState(false);
   const [imageLoading, setImageLoading] = useState(true);
 
@@ -35,6 +47,9 @@ export const ProfileImage = ({ src, username, size = 'md', className = '' }) =>
     '2xl': 'w-32 h-32 text-4xl',
   };
 
+  // Rendered width, lets the browser pick the smallest srcset variant
+  const sizePixels = { xs: '32px', sm: '40px', md: '48px', lg: '64px', xl: '96px', '2xl': '128px' };
+
   // ✅ Debug: Log image URL
   if (src && !imageError && imageLoading) {
     console.log('🖼️ Loading Profile Image:', src);
@@ -52,6 +67,8 @@ export const ProfileImage = ({ src, username, size = 'md', className = '' }) =>
         {/* Actual image */}
         <img
           src={src}
+          srcSet={toSrcSet(srcset)}
+          sizes={sizePixels[size]}
           alt={`${username}'s profile`}
           className={`w-full h-full object-cover ${
             imageLoading ? 'opacity-0' : 'opacity-100'
@@ -89,17 +106,19 @@ export const ProfileImage = ({ src, username, size = 'md', className = '' }) =>
  * Displays post image with error handling
  * 
  * @param {string} src - Image URL from API
+ * @param {object} srcset - Optional WebP variants map from API (image_srcset)
  * @param {string} alt - Alt text for image
  * @param {string} className - Additional CSS classes
  * 
  * Usage:
  * <PostImage 
  *   src={post.image} 
+ *   srcset={post.image_srcset}
  *   alt={post.title}
  *   className="mb-4" 
  * />
  */
-export const PostImage = ({ src, alt = 'Post image', className = '' }) => {
+export const PostImage = ({ src, srcset, sizes = '(max-width: 768px) 100vw, 768px', alt = 'Post image', className = '' }) => {
   const [imageError, setImageError] = useState(false);
   const [imageLoading, setImageLoading] = useState(true);
 
@@ -137,6 +156,8 @@ export const PostImage = ({ src, alt = 'Post image', className = '' }) => {
       {/* Actual image */}
       <img
         src={src}
+        srcSet={toSrcSet(srcset)}
+        sizes={sizes}
         alt={alt}
         className={`w-full rounded-lg object-cover ${
           imageLoading ? 'hidden' : 'block'
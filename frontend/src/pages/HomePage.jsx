@@ -236,6 +236,7 @@ const HomePage = () => {
                 >
                   <ProfileImage
                     src={user?.profile_picture}
+                    srcset={user?.profile_picture_srcset}
                     username={user?.username}
                     size="sm"
                   />
@@ -505,6 +506,7 @@ const HomePage = () => {
                     <div className="flex items-start gap-4">
                       <ProfileImage
                         src={post.author?.profile_picture}
+                        srcset={post.author?.profile_picture_srcset}
                         username={post.author?.username}
                         size="md"
                         className="flex-shrink-0"
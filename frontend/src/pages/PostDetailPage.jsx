@@ -183,6 +183,7 @@ const PostDetailPage = () => {
               <div className="flex items-start gap-4 mb-6">
                 <ProfileImage
                   src={post.author?.profile_picture}
+                  srcset={post.author?.profile_picture_srcset}
                   username={post.author?.username}
                   size="lg"
                   className="flex-shrink-0"
@@ -220,6 +221,7 @@ const PostDetailPage = () => {
 
               <PostImage 
                 src={post.image} 
+                srcset={post.image_srcset}
                 alt={post.title} 
                 className="my-6" 
               />
@@ -324,6 +326,7 @@ const PostDetailPage = () => {
               <div className="text-center mb-4">
                 <ProfileImage
                   src={post.author?.profile_picture}
+                  srcset={post.author?.profile_picture_srcset}
                   username={post.author?.username}
                   size="xl"
                   className="mx-auto mb-4"
@@ -406,6 +409,7 @@ const CommentItem = ({ comment, postId }) => {
       <div className="flex items-start gap-4">
         <ProfileImage
           src={comment.author?.profile_picture}
+          srcset={comment.author?.profile_picture_srcset}
           username={comment.author?.username}
           size="sm"
           className="flex-shrink-0"
@@ -480,6 +484,7 @@ const CommentItem = ({ comment, postId }) => {
                 <div key={reply.id} className="flex items-start gap-3">
                   <ProfileImage
                     src={reply.author?.profile_picture}
+                    srcset={reply.author?.profile_picture_srcset}
                     username={reply.author?.username}
                     size="xs"
                     className="flex-shrink-0"
@@ -147,6 +147,7 @@ const ProfilePage = () => {
               <div className="text-center mb-6">
                 <ProfileImage
                   src={profileUser.profile_picture}
+                  srcset={profileUser.profile_picture_srcset}
                   username={profileUser.username}
                   size="2xl"
                   className="mx-auto mb-4"
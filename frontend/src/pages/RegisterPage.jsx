@@ -1,5 +1,5 @@
 // frontend/src/pages/RegisterPage.jsx
-import { useState, useRef } from 'react';
+import { useState, useRef, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { Eye, EyeOff, AlertCircle, CheckCircle, X, Mail } from 'lucide-react';
 import api from 'src/config/api';
@@ -11,6 +11,39 @@ import toast from 'react-hot-toast';
 
 const isValidEmail = (email) => /^[^\s@]+@[^\s@]+\.[^\s@]+$/.test(email);
 
+const AVAILABILITY_DEBOUNCE_MS = 400;
+
+// Debounced GET /auth/availability/ untuk satu field
+const useAvailabilityCheck = (field, value, isCheckable, setAvailability) => {
+  useEffect(() => {
+    if (!isCheckable) {
+      setAvailability(prev => ({ ...prev, [field]: null }));
+      return;
+    }
+
+    setAvailability(prev => ({ ...prev, [field]: 'checking' }));
+    let cancelled = false;
+
+    const timer = setTimeout(async () => {
+      try {
+        const response = await api.get('/auth/availability/', { params: { [field]: value } });
+        if (!cancelled) {
+          const result = response.data[field];
+          setAvailability(prev => ({ ...prev, [field]: result?.available ? 'available' : 'taken' }));
+        }
+      } catch {
+        // Throttled / network error: submit will still validate
+        if (!cancelled) setAvailability(prev => ({ ...prev, [field]: null }));
+      }
+    }, AVAILABILITY_DEBOUNCE_MS);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [field, value, isCheckable, setAvailability]);
+};
+
 const censorEmail = (email) => {
   if (!email) return '';
   const [localPart, domain] = email.split('@');
@@ -70,12 +103,30 @@ const RegisterPage = () => {
   const [errors, setErrors] = useState({});
   const [isLoading, setIsLoading] = useState(false);
 
+  // Availability States (null | 'checking' | 'available' | 'taken')
+  const [availability, setAvailability] = useState({ username: null, email: null });
+
   // OTP States
   const [showOtpModal, setShowOtpModal] = useState(false);
   const [otpCode, setOtpCode] = useState(['', '', '', '', '', '']);
   const [verifyingOtp, setVerifyingOtp] = useState(false);
   const [resendingOtp, setResendingOtp] = useState(false);
 
+  // ============================================
+  // LIVE AVAILABILITY CHECK (debounced)
+  // ============================================
+
+  useAvailabilityCheck('username', formData.username.trim(), formData.username.trim().length >= 3, setAvailability);
+  useAvailabilityCheck('email', formData.email.trim(), isValidEmail(formData.email.trim()), setAvailability);
+
+  const renderAvailability = (field, takenText) => {
+    const state = availability[field];
+    if (errors[field] || !state) return null;
+    if (state === 'checking') return <p className="text-sm text-gray-500 mt-1">Checking availability...</p>;
+    if (state === 'taken') return <p className="text-sm text-red-600 mt-1">{takenText}</p>;
+    return <p className="text-sm text-green-600 mt-1">Available</p>;
+  };
+
   // ============================================
   // HANDLERS
   // ============================================
@@ -295,6 +346,7 @@ const RegisterPage = () => {
                 required
               />
               {errors.username && <p className="text-sm text-red-600 mt-1">{errors.username}</p>}
+              {renderAvailability('username', 'Username already taken')}
             </div>
 
             {/* Email */}
@@ -310,6 +362,7 @@ const RegisterPage = () => {
                 required
               />
               {errors.email && <p className="text-sm text-red-600 mt-1">{errors.email}</p>}
+              {renderAvailability('email', 'Email already registered')}
             </div>
 
             {/* Password */}
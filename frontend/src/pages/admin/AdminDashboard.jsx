@@ -176,6 +176,7 @@ const AdminDashboard = () => {
                     <div className="flex items-center gap-3">
                       <ProfileImage
                         src={user.profile_picture}
+                        srcset={user.profile_picture_srcset}
                         username={user.username}
                         size="sm"
                       />
@@ -182,6 +182,7 @@ const AdminPosts = () => {
                     <div className="flex items-center gap-2">
                       <ProfileImage
                         src={post.author?.profile_picture}
+                        srcset={post.author?.profile_picture_srcset}
                         username={post.author?.username}
                         size="xs"
                       />
@@ -175,6 +175,7 @@ const AdminUsers = () => {
                         {/* ✅ 2. GANTI AVATAR USER */}
                         <ProfileImage
                           src={user.profile_picture}
+                          srcset={user.profile_picture_srcset}
                           username={user.username}
                           size="sm"
                         />